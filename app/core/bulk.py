@@ -0,0 +1,133 @@
+import csv
+import io
+import zlib
+from enum import Enum
+from typing import Any
+from typing import AsyncIterator
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import orjson
+
+from app.core.exceptions import BadRequestError
+
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json")
+CSV_CONTENT_TYPES = ("text/csv",)
+
+# a record is either the parsed row or the reason it could not be parsed
+Record = Tuple[int, Union[dict, str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer.strip():
+        yield buffer.rstrip(b"\r")
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record: Any = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield row_number, "Invalid JSON"
+            continue
+        yield row_number, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    header = None
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            values = next(csv.reader([line.decode("utf-8")]))
+        except (UnicodeDecodeError, csv.Error):
+            values = None
+        if header is None:
+            if values is None:
+                raise BadRequestError(detail="Invalid CSV header")
+            header = [column.strip() for column in values]
+            continue
+
+        row_number += 1
+        if values is None or len(values) != len(header):
+            yield row_number, f"Expected {len(header)} columns"
+            continue
+        yield row_number, {column: value for column, value in zip(header, values) if value != ""}
+
+
+def iter_records(chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[Record]:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in CSV_CONTENT_TYPES:
+        return iter_csv_records(chunks)
+    if media_type in NDJSON_CONTENT_TYPES:
+        return iter_ndjson_records(chunks)
+    raise BadRequestError(detail=f"Unsupported content type: {media_type or 'missing'}")
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {ExportFormat.ndjson: "application/x-ndjson", ExportFormat.csv: "text/csv"}
+
+
+def encode_csv_rows(rows: Sequence[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson_rows(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(columns, row)), default=str) + b"\n" for row in rows)
+
+
+async def encode_rows(
+    columns: Sequence[str], partitions: AsyncIterator[Sequence[Sequence[Any]]], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    if export_format == ExportFormat.csv:
+        yield encode_csv_rows([columns])
+    async for rows in partitions:
+        if export_format == ExportFormat.csv:
+            yield encode_csv_rows(rows)
+        else:
+            yield encode_ndjson_rows(columns, rows)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q-values and the `*` wildcard."""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0))) > 0
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(level, wbits=31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,169 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Hashable
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class CacheBackend:
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+
+class LocalCache(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._cache.set(key, value, self._cache.ttl if ttl is None else min(ttl, self._cache.ttl))
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.pop(key)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisCache(CacheBackend):
+    def __init__(self, client: Redis, prefix: str = "cache:", ttl: float = 300.0) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self.client.get(self.prefix + key)
+        except RedisError as e:
+            logger.warning("redis cache get failed: %s", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        try:
+            await self.client.set(self.prefix + key, value, px=int((self.ttl if ttl is None else ttl) * 1000))
+        except RedisError as e:
+            logger.warning("redis cache set failed: %s", e)
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self.client.delete(*[self.prefix + key for key in keys])
+        except RedisError as e:
+            logger.warning("redis cache delete failed: %s", e)
+
+    async def clear(self) -> None:
+        try:
+            async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+                await self.client.delete(key)
+        except RedisError as e:
+            logger.warning("redis cache clear failed: %s", e)
+
+
+class TieredCache(CacheBackend):
+    """In-process tier in front of a shared one; the local tier keeps a short ttl so other workers' writes show up."""
+
+    def __init__(self, local: CacheBackend, remote: Optional[CacheBackend] = None) -> None:
+        self.local = local
+        self.remote = remote
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.local.get(key)
+        if value is None and self.remote is not None:
+            value = await self.remote.get(key)
+            if value is not None:
+                await self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.local.set(key, value, ttl)
+        if self.remote is not None:
+            await self.remote.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        await self.local.delete(*keys)
+        if self.remote is not None:
+            await self.remote.delete(*keys)
+
+    async def clear(self) -> None:
+        await self.local.clear()
+        if self.remote is not None:
+            await self.remote.clear()
+
+
+def get_redis_client() -> Optional[Redis]:
+    if not settings.REDIS_URL:
+        return None
+    return Redis.from_url(settings.REDIS_URL)
+
+
+redis_client = get_redis_client()
+
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+repository_cache = TieredCache(
+    local=LocalCache(maxsize=settings.REPOSITORY_CACHE_LOCAL_SIZE, ttl=settings.REPOSITORY_CACHE_LOCAL_TTL),
+    remote=(
+        RedisCache(redis_client, prefix="repository:", ttl=settings.REPOSITORY_CACHE_TTL)
+        if redis_client is not None
+        else None
+    ),
+)
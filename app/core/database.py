@@ -1,7 +1,28 @@
 import asyncio
+import itertools
+import logging
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from datetime import timezone
+from functools import lru_cache
+from typing import Any
 from typing import AsyncIterator
-
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from uuid import UUID
+from uuid import uuid4
+
+from sqlalchemy import Column
+from sqlalchemy import Table
+from sqlalchemy import text
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import async_scoped_session
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import AsyncConnection
@@ -10,12 +31,31 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql.expression import and_
 
+from app.core.cache import TTLCache
+from app.core.exceptions import BadRequestError
+from app.core.exceptions import ValidationError
+from app.core.instrumentation import instrument_engine
 from app.core.settings import settings
+from app.core.tracing import trace_engine
 from app.models import Base
 
 
+logger = logging.getLogger(__name__)
+
+# pass as `bind_arguments` on read-only statements to let the session serve them from a replica
+REPLICA_READ = {"replica": True}
+
+_route_key: ContextVar[Optional[Hashable]] = ContextVar("db_route_key", default=None)
+
+
+def bind_route_key(key: Optional[Hashable]) -> None:
+    """Ties the current request to a principal so reads after its writes stay on the primary."""
+    _route_key.set(key)
+
+
 SQLALCHEMY_QUERY_MAPPER = {
     "eq": "__eq__",
     "ne": "__ne__",
@@ -38,9 +78,47 @@ SQLALCHEMY_QUERY_MAPPER = {
 # BaseModel = declarative_base()
 
 
+def engine_options() -> Dict[str, Any]:
+    connect_args: Dict[str, Any] = {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER_MODE:
+        # transaction pooling hands each statement to any server connection, so nothing may stay prepared
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+
+    return {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        "connect_args": connect_args,
+    }
+
+
+def pool_status(engine: Optional[AsyncEngine]) -> Dict[str, int]:
+    pool = engine.pool if engine is not None else None
+    if not isinstance(pool, QueuePool):
+        return {"size": 0, "checked_in": 0, "checked_out": 0, "overflow": 0, "max_overflow": 0}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+
+
 class Database:
     def __init__(self, db_url: str = settings.DATABASE_URL) -> None:
-        self._engine = create_async_engine(db_url, echo=True, pool_pre_ping=True)
+        self._engine = create_async_engine(db_url, **engine_options())
         self._session_factory = (
             async_sessionmaker(bind=self._engine, autocommit=False, autoflush=False, class_=AsyncSession),
         )
@@ -87,77 +165,220 @@ class Database:
 #         yield session
 
 
-def dict_to_sqlalchemy_filter_options(model_class, search_option_dict):
+def indexed_columns(model_class) -> Tuple[str, ...]:
+    return _indexed_columns(model_class.__table__)
+
+
+@lru_cache(maxsize=None)
+def _indexed_columns(table: Table) -> Tuple[str, ...]:
+    columns = {column.key for column in table.primary_key.columns}
+    columns.update(column.key for column in table.columns if column.unique or column.index)
+    columns.update(
+        index.expressions[0].key
+        for index in table.indexes
+        if isinstance(index.expressions[0], Column) and index.expressions[0].table is table
+    )
+    columns.update(
+        list(constraint.columns)[0].key
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.columns
+    )
+    return tuple(sorted(columns))
+
+
+@lru_cache(maxsize=1024)
+def _parse_filter_key(key: str) -> Tuple[str, str]:
+    column, _, command = key.partition("__")
+    return column, command or "eq"
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ("true", "1", "yes"):
+        return True
+    if str(value).lower() in ("false", "0", "no"):
+        return False
+    raise ValueError(f"invalid boolean: {value}")
+
+
+def _to_datetime(value: Any) -> datetime:
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+_FILTER_VALUE_PARSERS = {bool: _to_bool, datetime: _to_datetime, UUID: UUID, int: int, float: float}
+
+
+def _coerce_filter_value(attr, key: str, value: Any) -> Any:
+    parser = _FILTER_VALUE_PARSERS.get(attr.type.python_type)
+    if parser is None or not isinstance(value, str):
+        return value
+    try:
+        return parser(value)
+    except ValueError:
+        raise ValidationError(detail=f"Invalid value for {key}: {value}")
+
+
+def dict_to_sqlalchemy_filter_options(model_class, search_option_dict, allowed_columns: Optional[Sequence[str]] = None):
+    if allowed_columns is None:
+        allowed_columns = indexed_columns(model_class)
+
     sql_alchemy_filter_options = []
-    copied_dict = search_option_dict.copy()
-    for key in search_option_dict:
-        attr = getattr(model_class, key, None)
-        if attr is None:
-            continue
-        option_from_dict = copied_dict.pop(key)
-        if type(option_from_dict) in [int, float]:
-            sql_alchemy_filter_options.append(attr == option_from_dict)
-        elif type(option_from_dict) in [str]:
-            sql_alchemy_filter_options.append(attr.like("%" + option_from_dict + "%"))
-        elif type(option_from_dict) in [bool]:
-            sql_alchemy_filter_options.append(attr.is_(option_from_dict))
-
-    for custom_option in copied_dict:
-        if "__" not in custom_option:
-            continue
-        key, command = custom_option.split("__")
-        attr = getattr(model_class, key, None)
-        if attr is None:
-            continue
-        option_from_dict = copied_dict[custom_option]
+    for key, option_from_dict in search_option_dict.items():
+        column, command = _parse_filter_key(key)
+        if column not in allowed_columns:
+            raise BadRequestError(detail=f"Filtering by {column} is not allowed")
+        attr = getattr(model_class, column)
+
         if command == "in":
-            sql_alchemy_filter_options.append(attr.in_([option.strip() for option in option_from_dict.split(",")]))
-        elif command in SQLALCHEMY_QUERY_MAPPER.keys():
-            sql_alchemy_filter_options.append(getattr(attr, SQLALCHEMY_QUERY_MAPPER[command])(option_from_dict))
+            options = option_from_dict.split(",") if isinstance(option_from_dict, str) else option_from_dict
+            values = [_coerce_filter_value(attr, key, option.strip()) for option in options]
+            sql_alchemy_filter_options.append(attr.in_(values))
         elif command == "isnull":
-            bool_command = "__eq__" if option_from_dict else "__ne__"
-            sql_alchemy_filter_options.append(getattr(attr, bool_command)(None))
+            try:
+                is_null = _to_bool(option_from_dict)
+            except ValueError:
+                raise ValidationError(detail=f"Invalid value for {key}: {option_from_dict}")
+            sql_alchemy_filter_options.append(attr.is_(None) if is_null else attr.is_not(None))
+        elif command in SQLALCHEMY_QUERY_MAPPER:
+            value = _coerce_filter_value(attr, key, option_from_dict)
+            sql_alchemy_filter_options.append(getattr(attr, SQLALCHEMY_QUERY_MAPPER[command])(value))
+        else:
+            raise BadRequestError(detail=f"Invalid filter operator: {command}")
 
     return and_(True, *sql_alchemy_filter_options)
 
 
-# from typing import Any
-# from sqlalchemy.ext.declarative import declared_attr
-# from sqlalchemy.orm import as_declarative
+def ordering_to_sqlalchemy_order_by(model_class, ordering: str, allowed_columns: Optional[Sequence[str]] = None):
+    if allowed_columns is None:
+        allowed_columns = indexed_columns(model_class)
 
-SQLALCHEMY_QUERY_MAPPER = {
-    "eq": "__eq__",
-    "ne": "__ne__",
-    "lt": "__lt__",
-    "lte": "__le__",
-    "gt": "__gt__",
-    "gte": "__ge__",
-}
+    order_by = []
+    for field in filter(None, (field.strip() for field in ordering.split(","))):
+        column = field.lstrip("-")
+        if column not in allowed_columns:
+            raise BadRequestError(detail=f"Ordering by {column} is not allowed")
+        attr = getattr(model_class, column)
+        order_by.append(attr.desc() if field.startswith("-") else attr.asc())
+    return order_by
 
 
 # Base = declarative_base()
 
 
+class RoutingSession(Session):
+    """Sends statements flagged with REPLICA_READ to a healthy replica, everything else to the primary.
+
+    Once the session (or the principal bound with `bind_route_key`) has written, its reads stay on the
+    primary so callers always see their own writes.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw):
+        router: Optional[DatabaseSessionManager] = self.info.get("router")
+        if router is None:
+            return super().get_bind(mapper, clause=clause, **kw)
+
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["wrote"] = True
+            router.mark_written()
+        elif replica and not self.info.get("wrote") and not router.is_sticky():
+            engine = router.replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
 class DatabaseSessionManager:
     def __init__(self):
         self._engine: AsyncEngine | None = None
         self._sessionmaker: async_sessionmaker | None = None
-
-    def init(self, database_url: str = settings.DATABASE_URL):
-        self._engine = create_async_engine(database_url)
+        self._replicas: List[AsyncEngine] = []
+        self._replica_health: List[bool] = []
+        self._round_robin = itertools.count()
+        self._sticky = TTLCache(maxsize=settings.DB_STICKY_PRIMARY_SIZE, ttl=settings.DB_STICKY_PRIMARY_SECONDS)
+        self._health_task: asyncio.Task | None = None
+
+    def init(self, database_url: str = settings.DATABASE_URL, replica_urls: Sequence[str] = ()):
+        self._engine = create_async_engine(database_url, **engine_options())
+        self._replicas = [create_async_engine(url, **engine_options()) for url in replica_urls]
+        self._replica_health = [True] * len(self._replicas)
+        if settings.SQL_INSTRUMENTATION_ENABLED:
+            for engine in (self._engine, *self._replicas):
+                instrument_engine(engine)
+        if settings.TRACING_ENABLED:
+            for engine in (self._engine, *self._replicas):
+                trace_engine(engine)
         self._sessionmaker = async_scoped_session(
-            async_sessionmaker(autocommit=False, bind=self._engine), scopefunc=asyncio.current_task
+            async_sessionmaker(
+                autocommit=False, bind=self._engine, sync_session_class=RoutingSession, info={"router": self}
+            ),
+            scopefunc=asyncio.current_task,
         )
 
+    def replica_engine(self) -> Optional[Engine]:
+        healthy = [engine for engine, ok in zip(self._replicas, self._replica_health) if ok]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)].sync_engine
+
+    def mark_written(self) -> None:
+        key = _route_key.get()
+        if key is not None:
+            self._sticky.set(key, True)
+
+    def is_sticky(self) -> bool:
+        key = _route_key.get()
+        return key is not None and key in self._sticky
+
+    async def check_replicas(self) -> List[bool]:
+        for index, engine in enumerate(self._replicas):
+            try:
+                await asyncio.wait_for(self._ping(engine), timeout=settings.DB_REPLICA_HEALTH_TIMEOUT)
+                healthy = True
+            except (SQLAlchemyError, OSError, asyncio.TimeoutError):
+                healthy = False
+            if healthy != self._replica_health[index]:
+                logger.warning("replica %s is now %s", engine.url.host, "healthy" if healthy else "unhealthy")
+            self._replica_health[index] = healthy
+        return list(self._replica_health)
+
+    async def _ping(self, engine: AsyncEngine) -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_replicas()
+            except Exception:
+                # an unexpected error must not stop the loop and leave the replicas frozen in their last state
+                logger.exception("replica health check failed")
+            await asyncio.sleep(settings.DB_REPLICA_HEALTH_INTERVAL)
+
+    def start_health_checks(self) -> None:
+        if self._replicas and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
     def session_factory(self):
         return self._sessionmaker
 
+    def pool_status(self) -> Dict[str, int]:
+        return pool_status(self._engine)
+
     def sync_create_all(self, engine):
         Base.metadata.create_all(engine)
 
     async def close(self):
         if self._engine is None:
             raise Exception("DatabaseSessionManager is not initialized")
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for replica in self._replicas:
+            await replica.dispose()
+        self._replicas = []
+        self._replica_health = []
         await self._engine.dispose()
         self._engine = None
         self._sessionmaker = None
@@ -1,19 +1,23 @@
 from typing import Annotated
+from uuid import UUID
 
 from fastapi import Depends
-from jose import jwt
-from pydantic import ValidationError
+from fastapi import Request
 from sqlalchemy.orm import Session
 
+from app.core.cache import principal_cache
+from app.core.database import bind_route_key
 from app.core.database import get_db
 from app.core.database import get_session_factory
 from app.core.exceptions import AuthError
+from app.core.metrics import auth_failures
+from app.core.metrics import cache_requests
 from app.core.security import JWTBearer
-from app.core.settings import settings
-from app.models import User
+from app.repository.resume_repository import ResumeRepository
 from app.repository.user_repository import UserRepository
-from app.schemas.auth_schema import Payload
+from app.schemas.user_schema import User
 from app.services.auth_service import AuthService
+from app.services.resume_service import ResumeService
 from app.services.user_service import UserService
 
 
@@ -22,15 +26,31 @@ async def get_user_service(session: Session = Depends(get_session_factory)):
     return UserService(user_repository)
 
 
-async def get_current_user(token: str = Depends(JWTBearer()), service: UserService = Depends(get_user_service)) -> User:
+async def get_current_user(
+    request: Request, token: str = Depends(JWTBearer()), service: UserService = Depends(get_user_service)
+) -> User:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=settings.ALGORITHM)
-        token_data = Payload(**payload)
-    except (jwt.JWTError, ValidationError):
+        user_id = UUID(request.state.token_payload["id"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        auth_failures.inc("invalid_payload")
         raise AuthError(detail="Could not validate credentials")
-    current_user: User = await service.get_by_id(token_data.id)
-    if not current_user:
-        raise AuthError(detail="User not found")
+
+    bind_route_key(user_id)
+    current_user: User = principal_cache.get(user_id)
+    cache_requests.inc("principal", "miss" if current_user is None else "hit")
+    if current_user is None:
+        found_user = await service.get_by_id(user_id)
+        if not found_user:
+            auth_failures.inc("unknown_user")
+            raise AuthError(detail="User not found")
+        current_user = User.model_validate(found_user)
+        principal_cache.set(user_id, current_user)
+    return current_user
+
+
+async def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    if not current_user.is_superuser:
+        raise AuthError(detail="Not enough permissions")
     return current_user
 
 
@@ -39,7 +59,14 @@ async def get_auth_service(session: Session = Depends(get_session_factory)):
     return AuthService(user_repository=user_repository)
 
 
+async def get_resume_service(session: Session = Depends(get_session_factory)):
+    resume_repository = ResumeRepository(session_factory=session)
+    return ResumeService(resume_repository)
+
+
 SessionDependency = Annotated[Session, Depends(get_db)]
 UserServiceDependency = Annotated[UserService, Depends(get_user_service)]
 CurrentUserDependency = Annotated[User, Depends(get_current_user)]
+SuperUserDependency = Annotated[User, Depends(get_current_superuser)]
 AuthServiceDependency = Annotated[AuthService, Depends(get_auth_service)]
+ResumeServiceDependency = Annotated[ResumeService, Depends(get_resume_service)]
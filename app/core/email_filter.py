@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import math
+from hashlib import blake2b
+from typing import AsyncIterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import redis_client
+from app.core.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmailFilter:
+    """Bloom filter of registered emails, so sign-ins for unknown ones are rejected without a database lookup.
+
+    Repositories add emails before writing them and nothing is ever removed: deleted users and false positives only
+    cost the lookup the filter would have saved, while a missing email would lock its user out. Every email may
+    exist until `build` has loaded the users table. With Redis the bits are shared by all workers. Bits kept in
+    process memory miss the emails other workers added, so without Redis the filter lets every email through
+    unless `single_process` says there are no other workers.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        redis: Optional[Redis] = None,
+        enabled: bool = True,
+        single_process: bool = False,
+    ) -> None:
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.redis = redis
+        self.enabled = enabled and (redis is not None or single_process)
+        # sized into the key, so changing the capacity starts a new filter instead of reading a mismatched one
+        self.key = f"auth:emails:{self.size}:{self.hashes}"
+        self.ready_key = f"{self.key}:ready"
+        self._bits = bytearray((self.size + 7) // 8) if redis is None else None
+        self._ready = False
+        self._builder: Optional[asyncio.Task] = None
+
+    def positions(self, email: str) -> List[int]:
+        digest = blake2b(email.lower().encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    async def might_exist(self, email: str) -> bool:
+        if not self.enabled:
+            return True
+        positions = self.positions(email)
+        if self.redis is None:
+            return not self._ready or all(self._bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.exists(self.ready_key)
+                for position in positions:
+                    pipe.getbit(self.key, position)
+                ready, *bits = await pipe.execute()
+        except RedisError as e:
+            logger.warning("email filter lookup failed: %s", e)
+            return True
+        return not ready or all(bits)
+
+    async def add(self, *emails: str) -> None:
+        if not self.enabled or not emails:
+            return
+        positions = [position for email in emails for position in self.positions(email)]
+        if self.redis is None:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for position in positions:
+                    pipe.setbit(self.key, position, 1)
+                await pipe.execute()
+        except RedisError as e:
+            logger.error("could not add %d emails to the email filter, disabling it until rebuilt: %s", len(emails), e)
+            await self._invalidate()
+
+    async def _invalidate(self) -> None:
+        try:
+            await self.redis.delete(self.ready_key)
+        except RedisError as e:
+            logger.error("could not disable the email filter, sign-ins for the added emails may fail: %s", e)
+
+    async def build(self, partitions: AsyncIterator[Sequence[Sequence[str]]]) -> None:
+        """Adds the first column of every row in `partitions` and marks the filter ready."""
+        if not self.enabled:
+            return
+        if self.redis is not None and await self.redis.exists(self.ready_key):
+            return
+        count = 0
+        async for partition in partitions:
+            await self.add(*(row[0] for row in partition))
+            count += len(partition)
+        if self.redis is None:
+            self._ready = True
+        else:
+            await self.redis.set(self.ready_key, 1)
+        logger.info("email filter built with %d emails", count)
+
+    def start(self, partitions: AsyncIterator[Sequence[Sequence[str]]]) -> None:
+        if self.enabled and self._builder is None:
+            self._builder = asyncio.create_task(self.build(partitions))
+            self._builder.add_done_callback(self._built)
+
+    def _built(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("could not build the email filter, every email is looked up: %s", task.exception())
+
+    def stop(self) -> None:
+        if self._builder is not None:
+            self._builder.cancel()
+            self._builder = None
+
+    def clear(self) -> None:
+        if self._bits is not None:
+            self._bits = bytearray(len(self._bits))
+        self._ready = False
+
+
+email_filter = EmailFilter(
+    settings.EMAIL_FILTER_CAPACITY,
+    settings.EMAIL_FILTER_ERROR_RATE,
+    redis=redis_client,
+    enabled=settings.EMAIL_FILTER_ENABLED,
+    single_process=settings.EMAIL_FILTER_SINGLE_PROCESS,
+)
@@ -35,3 +35,13 @@ class DuplicatedError(HTTPException):
 class InvalidCredentials(HTTPException):
     def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
         super().__init__(status.HTTP_401_UNAUTHORIZED, detail, headers)
+
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_503_SERVICE_UNAVAILABLE, detail, headers)
+
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: Any = None, headers: Optional[Dict[str, Any]] = None) -> None:
+        super().__init__(status.HTTP_429_TOO_MANY_REQUESTS, detail, headers)
@@ -0,0 +1,172 @@
+import asyncio
+import secrets
+import time
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+from app.core.exceptions import ServiceUnavailableError
+from app.core.metrics import password_hash_duration
+from app.core.security import get_password_hash
+from app.core.security import password_hashes
+from app.core.security import password_needs_rehash
+from app.core.security import verify_password
+from app.core.settings import settings
+
+
+EXECUTOR_TYPES = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+BULK_RETRY_INTERVAL = 0.05
+
+
+class PasswordHasher:
+    """Runs password hashing off the event loop on a bounded worker pool.
+
+    At most `max_workers` hashes run at once; calls beyond that wait in the executor queue,
+    and once `max_pending` calls are in flight new ones are rejected with a 503.
+    """
+
+    def __init__(self, executor_type: str = "thread", max_workers: int = 4, max_pending: int = 64) -> None:
+        if executor_type not in EXECUTOR_TYPES:
+            raise ValueError(f"executor_type must be one of {list(EXECUTOR_TYPES)}")
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be greater than or equal to max_workers")
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rejected = 0
+        self._in_flight = 0
+        self._executor: Executor | None = None
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self._in_flight - self.max_workers, 0)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = EXECUTOR_TYPES[self.executor_type](max_workers=self.max_workers)
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        if self._in_flight >= self.max_pending:
+            self.rejected += 1
+            raise ServiceUnavailableError(
+                detail="Too many authentication requests, try again later", headers={"Retry-After": "1"}
+            )
+
+        self._in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._in_flight -= 1
+            password_hash_duration.observe(time.perf_counter() - started_at, operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """Hashes in bulk, waiting for capacity instead of failing with a 503 once `max_pending` is reached.
+
+        Bulk callers take at most one slot per worker so interactive sign-ins still find room.
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def hash_one(password: str) -> str:
+            async with semaphore:
+                while self._in_flight >= self.max_pending:
+                    await asyncio.sleep(BULK_RETRY_INTERVAL)
+                return await self.hash(password)
+
+        return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return password_needs_rehash(hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class SignInTimer:
+    """Makes failed sign-ins for unknown emails take as long as sign-ins for existing users, mostly without bcrypt.
+
+    Keeps a moving average of how long sign-ins that reached the password check took, and unknown emails sleep up
+    to it. A real verification of a throwaway hash only runs while there is no average yet, or once every
+    `refresh_interval` seconds without real sign-ins, so a flood of junk logins costs sleeps rather than CPU.
+    Padding never fails: if the hasher is too busy to give a first average, unknown emails sleep up to `floor`.
+    """
+
+    def __init__(
+        self, hasher: PasswordHasher, refresh_interval: float = 60.0, smoothing: float = 0.1, floor: float = 0.25
+    ) -> None:
+        self.hasher = hasher
+        self.refresh_interval = refresh_interval
+        self.smoothing = smoothing
+        self.floor = floor
+        self.estimate: Optional[float] = None
+        self._observed_at = 0.0
+        self._dummy_hash: Optional[str] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    def observe(self, duration: float) -> None:
+        if self.estimate is None:
+            self.estimate = duration
+        else:
+            self.estimate += self.smoothing * (duration - self.estimate)
+        self._observed_at = time.monotonic()
+
+    async def _dummy_verify(self) -> None:
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hasher.hash(secrets.token_urlsafe())
+        started_at = time.perf_counter()
+        await self.hasher.verify(secrets.token_urlsafe(), self._dummy_hash)
+        self.observe(time.perf_counter() - started_at)
+
+    def _refreshed(self, task: asyncio.Task) -> None:
+        self._refresh = None
+        if not task.cancelled():
+            task.exception()
+
+    async def pad(self, started_at: float) -> None:
+        """Sleeps until `started_at`, a `time.perf_counter()` reading, is as far back as a typical sign-in."""
+        stale = time.monotonic() - self._observed_at >= self.refresh_interval
+        if (self.estimate is None or stale) and self._refresh is None:
+            self._refresh = asyncio.create_task(self._dummy_verify())
+            self._refresh.add_done_callback(self._refreshed)
+        if self.estimate is None:
+            try:
+                await asyncio.shield(self._refresh)
+            except ServiceUnavailableError:
+                # a 503 here would tell unknown emails apart from known ones, which get a 401
+                pass
+        estimate = self.floor if self.estimate is None else self.estimate
+        await asyncio.sleep(max(estimate - (time.perf_counter() - started_at), 0.0))
+
+    def clear(self) -> None:
+        self.estimate = None
+        self._observed_at = 0.0
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=password_hashes.concurrency(
+        settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MEMORY_BUDGET_MB * 1024
+    ),
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+sign_in_timer = SignInTimer(password_hasher, refresh_interval=settings.AUTH_DUMMY_VERIFY_INTERVAL)
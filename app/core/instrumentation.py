@@ -0,0 +1,122 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statements issued while handling one request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def n_plus_one_suspects(self, threshold: int) -> List[str]:
+        # statements are parametrized, so the same text repeated usually means a query issued inside a loop
+        return [statement for statement, count in self.statements.items() if count >= threshold]
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+# the start time lives on the execution context, which is discarded with the statement whether it fails or not
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    duration = time.perf_counter() - context._query_started_at
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if duration * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning(
+            "slow query duration_ms=%.2f statement=%r",
+            duration * 1000,
+            statement,
+            extra={"duration_ms": round(duration * 1000, 2), "statement": statement},
+        )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryInstrumentationMiddleware:
+    """Pure ASGI middleware collecting the SQL issued per request.
+
+    Adds a `Server-Timing` header with the database time and statement count, logs one structured line per
+    request, and warns about statements repeated often enough to look like N+1 queries.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = (time.perf_counter() - started_at) * 1000
+                timing = f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", app;dur={elapsed:.2f}'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _query_stats.reset(token)
+            self._log(scope, status_code, stats, time.perf_counter() - started_at)
+
+    def _log(self, scope, status_code: int, stats: QueryStats, duration: float) -> None:
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 2),
+            "duration_ms": round(duration * 1000, 2),
+        }
+        logger.info(" ".join(f"{key}={value}" for key, value in fields.items()), extra=fields)
+
+        for statement in stats.n_plus_one_suspects(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            logger.warning(
+                "possible N+1 method=%s path=%s repeated=%d statement=%r",
+                scope["method"],
+                scope["path"],
+                stats.statements[statement],
+                statement,
+                extra={**fields, "repeated": stats.statements[statement], "statement": statement},
+            )
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import orjson
+
+from app.core.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, object] = {}
+
+    def samples(self) -> Dict[Labels, object]:
+        return self._values
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    """A gauge either set directly or computed at collection time by `set_function`."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], Dict[Labels, float]]] = None
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def set_function(self, function: Callable[[], Dict[Labels, float]]) -> None:
+        self._function = function
+
+    def samples(self) -> Dict[Labels, object]:
+        if self._function is None:
+            return self._values
+        return {**self._values, **self._function()}
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = (*sorted(buckets), float("inf"))
+
+    def observe(self, value: float, *labels: str) -> None:
+        # per-bucket counts followed by sum and count; buckets are only made cumulative when rendered
+        values = self._values.get(labels)
+        if values is None:
+            values = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+class MetricsRegistry:
+    """In-process metrics, optionally shared between uvicorn workers through snapshot files.
+
+    With a `directory`, every worker writes its samples to `<directory>/<pid>.json` when flushed. A scrape
+    flushes the answering worker and merges every file: counters and histograms are summed over all files,
+    live or dead, gauges only over workers that are still running.
+
+    Samples are plain dicts updated by the event loop, so they must only be read from it: `collect`, `render`
+    and `flush` are not safe to call from another thread.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = Path(directory) if directory else None
+        self._metrics: Dict[str, Metric] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def snapshot(self) -> Dict[str, List]:
+        return {
+            name: [[list(labels), value] for labels, value in metric.samples().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def flush(self) -> None:
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        payload = orjson.dumps(self.snapshot())
+        # a temporary file of its own per flush, so two flushes never replace each other's half written file
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=f"{os.getpid()}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(payload)
+            os.replace(temporary, self.directory / f"{os.getpid()}.json")
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("could not flush metrics to %s", self.directory)
+
+    def start_flushing(self, interval: float) -> None:
+        if self.directory is not None and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop(interval))
+
+    def stop_flushing(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self.flush()
+
+    def collect(self) -> Dict[str, Dict[Labels, object]]:
+        if self.directory is None:
+            return {name: dict(metric.samples()) for name, metric in self._metrics.items()}
+
+        self.flush()
+        merged: Dict[str, Dict[Labels, object]] = {name: {} for name in self._metrics}
+        for path in self.directory.glob("*.json"):
+            alive = _is_alive(int(path.stem)) if path.stem.isdigit() else False
+            try:
+                snapshot = orjson.loads(path.read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            for name, samples in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None or (metric.type == "gauge" and not alive):
+                    continue
+                for labels, value in samples:
+                    _merge(merged[name], tuple(labels), value)
+        return merged
+
+    def render(self) -> str:
+        lines = []
+        for name, samples in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for labels, value in sorted(samples.items()):
+                if metric.type == "histogram":
+                    lines.extend(_render_histogram(metric, labels, value))
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(samples: Dict[Labels, object], labels: Labels, value) -> None:
+    current = samples.get(labels)
+    if current is None:
+        samples[labels] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        samples[labels] = [left + right for left, right in zip(current, value)]
+    else:
+        samples[labels] = current + value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _render_histogram(metric: Histogram, labels: Labels, values: List[float]) -> List[str]:
+    lines, cumulative = [], 0.0
+    for bound, count in zip(metric.buckets, values):
+        cumulative += count
+        bucket_labels = _format_labels((*metric.labelnames, "le"), (*labels, _format_value(bound)))
+        lines.append(f"{metric.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+    label_text = _format_labels(metric.labelnames, labels)
+    lines.append(f"{metric.name}_sum{label_text} {_format_value(values[-2])}")
+    lines.append(f"{metric.name}_count{label_text} {_format_value(values[-1])}")
+    return lines
+
+
+registry = MetricsRegistry(settings.METRICS_DIR)
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+auth_failures = registry.counter("auth_failures_total", "Rejected authentication attempts", ("reason",))
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying passwords, queueing included",
+    ("operation",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+rate_limited = registry.counter("rate_limited_total", "Requests rejected by a rate limit", ("action",))
+cache_requests = registry.counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+db_pool_connections = registry.gauge("db_pool_connections", "Connections of the primary pool by state", ("state",))
+db_pool_size = registry.gauge("db_pool_size", "Configured size of the primary pool")
+db_pool_max_overflow = registry.gauge("db_pool_max_overflow", "Configured overflow limit of the primary pool")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing every HTTP request by its route template, so /user/{user_id} is one series."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - started_at,
+                scope["method"],
+                getattr(route, "path", "<unmatched>"),
+                str(status_code),
+            )
@@ -0,0 +1,56 @@
+import base64
+import hashlib
+import hmac
+from enum import Enum
+from typing import Any
+from typing import List
+from typing import Sequence
+
+import orjson
+
+from app.core.exceptions import BadRequestError
+from app.core.settings import settings
+
+
+_cursor_key = hashlib.sha256(f"cursor:{settings.SECRET_KEY}".encode()).digest()
+
+
+class PaginationMode(str, Enum):
+    offset = "offset"
+    cursor = "cursor"
+
+
+class CountMode(str, Enum):
+    none = "none"
+    exact = "exact"
+    estimated = "estimated"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_cursor_key, payload, hashlib.sha256).digest()[:16]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = orjson.dumps(list(values), default=str)
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        encoded_payload, encoded_signature = cursor.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError:
+        raise BadRequestError(detail="Invalid cursor")
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise BadRequestError(detail="Invalid cursor")
+    return orjson.loads(payload)
@@ -0,0 +1,190 @@
+"""Password hash algorithms and their registry; run as a module to pick costs for the current host.
+
+    python -m app.core.passwords --algorithm argon2id --target-ms 250
+"""
+import argparse
+import secrets
+import statistics
+import time
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import bcrypt
+
+try:
+    from argon2 import extract_parameters
+    from argon2 import PasswordHasher as Argon2Hasher
+    from argon2 import Type
+    from argon2.exceptions import InvalidHashError
+    from argon2.exceptions import VerificationError
+except ImportError:  # only needed for argon2id hashes
+    Argon2Hasher = None
+
+
+class HashAlgorithm:
+    name = ""
+    prefixes: Tuple[str, ...] = ()
+    # what a single hash takes from the host, to fit concurrent hashes in the cpu and memory budget
+    threads = 1
+    memory_kib = 0
+
+    def identify(self, hashed: str) -> bool:
+        return hashed.startswith(self.prefixes)
+
+    def hash(self, password: str) -> str:
+        raise NotImplementedError
+
+    def verify(self, password: str, hashed: str) -> bool:
+        raise NotImplementedError
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether `hashed`, produced by this algorithm, is weaker than the configured cost."""
+        raise NotImplementedError
+
+
+class Bcrypt(HashAlgorithm):
+    name = "bcrypt"
+    prefixes = ("$2a$", "$2b$", "$2y$")
+    memory_kib = 4
+
+    def __init__(self, rounds: int = 12) -> None:
+        if not 4 <= rounds <= 31:
+            raise ValueError("bcrypt rounds must be between 4 and 31")
+        self.rounds = rounds
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(self.rounds)).decode("utf-8")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return int(hashed.split("$")[2]) < self.rounds
+
+
+class Argon2id(HashAlgorithm):
+    name = "argon2id"
+    prefixes = ("$argon2id$",)
+
+    def __init__(self, time_cost: int = 2, memory_cost: int = 19_456, parallelism: int = 1) -> None:
+        if Argon2Hasher is None:
+            raise RuntimeError("argon2id password hashes need the argon2-cffi package installed")
+        self._hasher = Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism, type=Type.ID)
+        self.time_cost = time_cost
+        self.threads = parallelism
+        self.memory_kib = memory_cost
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return self._hasher.verify(hashed, password)
+        except (InvalidHashError, VerificationError):
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        parameters = extract_parameters(hashed)
+        return parameters.time_cost < self.time_cost or parameters.memory_cost < self.memory_kib
+
+
+class PasswordHashes:
+    """Hashes with the configured algorithm and verifies with whichever one produced the stored hash."""
+
+    def __init__(self, default: HashAlgorithm, others: Sequence[HashAlgorithm] = ()) -> None:
+        self.default = default
+        self.algorithms = [default, *others]
+
+    def algorithm(self, hashed: str) -> Optional[HashAlgorithm]:
+        return next((algorithm for algorithm in self.algorithms if algorithm.identify(hashed)), None)
+
+    def hash(self, password: str) -> str:
+        return self.default.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        algorithm = self.algorithm(hashed)
+        return algorithm is not None and algorithm.verify(password, hashed)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        algorithm = self.algorithm(hashed)
+        return algorithm is not self.default or algorithm.needs_rehash(hashed)
+
+    def concurrency(self, cpus: int, memory_budget_kib: int) -> int:
+        """How many hashes of the default algorithm fit in `cpus` threads and `memory_budget_kib` at once."""
+        return max(1, min(cpus // self.default.threads, memory_budget_kib // max(self.default.memory_kib, 1)))
+
+
+def build_hashes(
+    algorithm: str,
+    bcrypt_rounds: int = 12,
+    argon2_time_cost: int = 2,
+    argon2_memory_cost: int = 19_456,
+    argon2_parallelism: int = 1,
+) -> PasswordHashes:
+    algorithms: Dict[str, HashAlgorithm] = {"bcrypt": Bcrypt(bcrypt_rounds)}
+    if algorithm == "argon2id" or Argon2Hasher is not None:
+        algorithms["argon2id"] = Argon2id(argon2_time_cost, argon2_memory_cost, argon2_parallelism)
+    if algorithm not in algorithms:
+        raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+    default = algorithms.pop(algorithm)
+    return PasswordHashes(default, list(algorithms.values()))
+
+
+def verify_time(algorithm: HashAlgorithm, repeat: int = 3) -> float:
+    password = secrets.token_urlsafe()
+    hashed = algorithm.hash(password)
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        algorithm.verify(password, hashed)
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples)
+
+
+def calibrate(algorithm: str, target: float, memory_cost: int = 19_456, parallelism: int = 1) -> Dict[str, float]:
+    """Raises the cost until one verification takes `target` seconds on this host, returning the last one under it.
+
+    bcrypt raises its rounds; argon2id keeps `memory_cost` and `parallelism` and raises the time cost.
+    """
+    if algorithm == "bcrypt":
+        cost, name = 4, "PASSWORD_BCRYPT_ROUNDS"
+
+        def make(cost: int) -> HashAlgorithm:
+            return Bcrypt(cost)
+
+    elif algorithm == "argon2id":
+        cost, name = 1, "PASSWORD_ARGON2_TIME_COST"
+
+        def make(cost: int) -> HashAlgorithm:
+            return Argon2id(cost, memory_cost, parallelism)
+
+    else:
+        raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+    chosen = {name: cost, "verify_ms": round(verify_time(make(cost)) * 1000, 1)}
+    while True:
+        elapsed = verify_time(make(cost + 1))
+        if elapsed > target:
+            return chosen
+        cost += 1
+        chosen = {name: cost, "verify_ms": round(elapsed * 1000, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--algorithm", choices=("bcrypt", "argon2id"), default="argon2id")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--memory-cost", type=int, default=19_456, help="argon2id memory in KiB")
+    parser.add_argument("--parallelism", type=int, default=1)
+    args = parser.parse_args()
+
+    result = calibrate(args.algorithm, args.target_ms / 1000, args.memory_cost, args.parallelism)
+    print(f"PASSWORD_HASH_ALGORITHM={args.algorithm}")
+    if args.algorithm == "argon2id":
+        print(f"PASSWORD_ARGON2_MEMORY_COST={args.memory_cost}")
+        print(f"PASSWORD_ARGON2_PARALLELISM={args.parallelism}")
+    for name, value in result.items():
+        print(f"# verify takes {value} ms" if name == "verify_ms" else f"{name}={value}")
@@ -0,0 +1,173 @@
+import hmac
+import logging
+import signal
+import threading
+import time
+from collections import Counter
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque
+from typing import Dict
+from typing import Optional
+
+from app.core.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+CLOCKS = {"wall": (signal.ITIMER_REAL, signal.SIGALRM), "cpu": (signal.ITIMER_PROF, signal.SIGPROF)}
+
+
+class Profile:
+    """Collapsed stacks sampled while one request was running."""
+
+    __slots__ = ("route", "method", "status", "started_at", "duration", "samples")
+
+    def __init__(self, method: str) -> None:
+        self.route = "<unmatched>"
+        self.method = method
+        self.status = 500
+        self.started_at = time.perf_counter()
+        self.duration = 0.0
+        self.samples: Counter = Counter()
+
+
+_active_profile: ContextVar[Optional[Profile]] = ContextVar("active_profile", default=None)
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+class SamplingProfiler:
+    """Statistical profiler driven by an interval timer signal.
+
+    The handler runs on the main thread between bytecodes of whatever task holds the event loop, so it reads that
+    task's context: samples land in the profile of the request being executed, and ticks spent idle or on other
+    requests are ignored. The timer only runs while at least one profiled request is in flight.
+    """
+
+    def __init__(self, interval: float, clock: str = "wall", keep: int = 50, max_depth: int = 64) -> None:
+        if clock not in CLOCKS:
+            raise ValueError(f"clock must be one of {list(CLOCKS)}")
+        self.interval = interval
+        self.timer, self.signal = CLOCKS[clock]
+        self.max_depth = max_depth
+        self.keep = keep
+        self.profiles: Dict[str, Deque[Profile]] = {}
+        self._running = 0
+        self._previous_handler = None
+
+    def _sample(self, signum, frame) -> None:
+        profile = _active_profile.get()
+        if profile is None:
+            return
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+        profile.samples[";".join(reversed(stack))] += 1
+
+    def _start_timer(self) -> bool:
+        if self._running == 0:
+            if threading.current_thread() is not threading.main_thread():
+                return False
+            self._previous_handler = signal.signal(self.signal, self._sample)
+            signal.setitimer(self.timer, self.interval, self.interval)
+        self._running += 1
+        return True
+
+    def _stop_timer(self) -> None:
+        self._running -= 1
+        if self._running == 0:
+            signal.setitimer(self.timer, 0)
+            signal.signal(self.signal, self._previous_handler or signal.SIG_DFL)
+
+    def start(self, method: str) -> Optional[Profile]:
+        if not self._start_timer():
+            logger.warning("profiling needs the event loop on the main thread, request not profiled")
+            return None
+        profile = Profile(method)
+        _active_profile.set(profile)
+        return profile
+
+    def stop(self, profile: Profile, route: str, status: int) -> None:
+        _active_profile.set(None)
+        self._stop_timer()
+        profile.duration = time.perf_counter() - profile.started_at
+        profile.route, profile.status = route, status
+        self.profiles.setdefault(route, deque(maxlen=self.keep)).append(profile)
+
+    def aggregate(self, route: Optional[str] = None, last: Optional[int] = None) -> Counter:
+        """Sums the samples of the `last` profiles kept for `route`, or for every route."""
+        routes = [route] if route is not None else list(self.profiles)
+        total: Counter = Counter()
+        for name in routes:
+            profiles = list(self.profiles.get(name, ()))
+            for profile in profiles[-last:] if last else profiles:
+                total.update(profile.samples)
+        return total
+
+    def clear(self) -> None:
+        self.profiles.clear()
+
+
+def render_collapsed(samples: Counter) -> str:
+    """Brendan Gregg's folded format, one `frame;frame;frame count` line per stack, ready for flamegraph.pl."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling one request in `every` and any request carrying the profiling token.
+
+    The token is compared in constant time against PROFILING_TOKEN; without a configured token the header is
+    ignored, so only sampling applies.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler, every: int = 0, header: str = "", token: str = "") -> None:
+        self.app = app
+        self.profiler = profiler
+        self.every = every
+        self.header = header.lower().encode("latin-1")
+        self.token = token.encode("latin-1")
+        self._requests = 0
+
+    def _should_profile(self, scope) -> bool:
+        self._requests += 1
+        if self.every and self._requests % self.every == 0:
+            return True
+        if self.token:
+            for key, value in scope["headers"]:
+                if key == self.header:
+                    return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = self.profiler.start(scope["method"])
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.profiler.stop(profile, getattr(scope.get("route"), "path", "<unmatched>"), status_code)
+
+
+profiler = SamplingProfiler(
+    interval=settings.PROFILING_INTERVAL_MS / 1000,
+    clock=settings.PROFILING_CLOCK,
+    keep=settings.PROFILING_KEEP,
+)
@@ -0,0 +1,189 @@
+import logging
+import math
+import time
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.requests import Request
+
+from app.core.cache import redis_client
+from app.core.exceptions import TooManyRequestsError
+from app.core.metrics import rate_limited
+from app.core.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class Rate(NamedTuple):
+    """`requests` per `window` seconds, refilled continuously and allowing bursts of up to `requests`."""
+
+    requests: int
+    window: float
+
+    @property
+    def per_second(self) -> float:
+        return self.requests / self.window
+
+
+class RateLimiter:
+    async def acquire(self, buckets: Sequence[Tuple[str, Rate]]) -> float:
+        """Takes one token from every bucket, or none if any is empty.
+
+        Returns 0 when the tokens were taken, otherwise the seconds until every bucket has one again.
+        """
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+
+class LocalRateLimiter(RateLimiter):
+    """Token buckets in process memory, only consistent with a single worker."""
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.maxsize = maxsize
+        # key -> (tokens, updated_at, time at which the bucket is full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+
+    async def acquire(self, buckets: Sequence[Tuple[str, Rate]]) -> float:
+        now = time.monotonic()
+        refilled: List[Tuple[str, Rate, float]] = []
+        wait = 0.0
+        for key, rate in buckets:
+            tokens, updated_at, _ = self._buckets.get(key, (rate.requests, now, now))
+            tokens = min(rate.requests, tokens + (now - updated_at) * rate.per_second)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / rate.per_second)
+            refilled.append((key, rate, tokens))
+
+        for key, rate, tokens in refilled:
+            if not wait:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (rate.requests - tokens) / rate.per_second)
+        if len(self._buckets) > self.maxsize:
+            self._prune(now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        # a full bucket behaves exactly like a missing one
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        while len(self._buckets) > self.maxsize:
+            del self._buckets[next(iter(self._buckets))]
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+
+# KEYS are the buckets, ARGV holds "requests window" for each; the server clock keeps every worker on one timeline
+ACQUIRE_SCRIPT = """
+local now = redis.call("TIME")
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local refilled, wait = {}, 0
+for i, key in ipairs(KEYS) do
+    local requests, window = tonumber(ARGV[2 * i - 1]), tonumber(ARGV[2 * i])
+    local bucket = redis.call("HMGET", key, "tokens", "updated_at")
+    local tokens = tonumber(bucket[1]) or requests
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(requests, tokens + math.max(0, now - updated_at) * requests / window)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) * window / requests)
+    end
+    refilled[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local tokens = refilled[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call("HSET", key, "tokens", tostring(tokens), "updated_at", tostring(now))
+    redis.call("PEXPIRE", key, math.ceil(tonumber(ARGV[2 * i]) * 1000))
+end
+return tostring(wait)
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Token buckets in Redis, updated atomically by one Lua script so every worker shares the same limits."""
+
+    def __init__(self, client: Redis, prefix: str = "ratelimit:") -> None:
+        self.client = client
+        self.prefix = prefix
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+
+    async def acquire(self, buckets: Sequence[Tuple[str, Rate]]) -> float:
+        keys = [self.prefix + key for key, _ in buckets]
+        args = [value for _, rate in buckets for value in rate]
+        try:
+            return float(await self._acquire(keys=keys, args=args))
+        except RedisError as e:
+            # failing open keeps sign-in available; the hasher's max_pending still bounds the CPU spent
+            logger.warning("redis rate limit failed, letting the request through: %s", e)
+            return 0.0
+
+    async def clear(self) -> None:
+        try:
+            async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+                await self.client.delete(key)
+        except RedisError as e:
+            logger.warning("redis rate limit clear failed: %s", e)
+
+
+class AuthRateLimit:
+    """Limits an auth action by client ip and by the email it targets, before any database or hashing work."""
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        per_ip: Rate,
+        per_email: Rate,
+        enabled: bool = True,
+        trusted_proxies: int = 0,
+    ) -> None:
+        self.limiter = limiter
+        self.per_ip = per_ip
+        self.per_email = per_email
+        self.enabled = enabled
+        self.trusted_proxies = trusted_proxies
+
+    def client_ip(self, request: Request) -> str:
+        if self.trusted_proxies:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                # each proxy appends the address it got the request from, so only the last `trusted_proxies`
+                # entries were written by them; anything to the left of those came from the client
+                hops = forwarded.split(",")
+                return hops[-min(self.trusted_proxies, len(hops))].strip()
+        return request.client.host if request.client else "unknown"
+
+    async def check(self, request: Request, action: str, email: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        buckets = [(f"{action}:ip:{self.client_ip(request)}", self.per_ip)]
+        if email:
+            buckets.append((f"{action}:email:{email.lower()}", self.per_email))
+
+        wait = await self.limiter.acquire(buckets)
+        if wait:
+            rate_limited.inc(action)
+            raise TooManyRequestsError(
+                detail="Too many attempts, try again later", headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    async def clear(self) -> None:
+        await self.limiter.clear()
+
+
+auth_rate_limit = AuthRateLimit(
+    RedisRateLimiter(redis_client) if redis_client is not None else LocalRateLimiter(settings.RATE_LIMIT_LOCAL_SIZE),
+    per_ip=Rate(settings.RATE_LIMIT_AUTH_PER_IP, settings.RATE_LIMIT_WINDOW),
+    per_email=Rate(settings.RATE_LIMIT_AUTH_PER_EMAIL, settings.RATE_LIMIT_WINDOW),
+    enabled=settings.RATE_LIMIT_ENABLED,
+    trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES,
+)
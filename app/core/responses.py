@@ -0,0 +1,61 @@
+import asyncio
+import functools
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+
+from fastapi import Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+from app.core.tracing import traced
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def response_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+class SerializedRoute(APIRoute):
+    """Serializes the endpoint's return value with a cached TypeAdapter for its `response_model`.
+
+    FastAPI would dump a returned model to a dict, validate that dict again and walk the result with
+    jsonable_encoder. Here the value is validated once, from attributes so ORM rows work too, and pydantic-core
+    writes the JSON bytes directly.
+    """
+
+    def get_route_handler(self) -> Callable:
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "__traced__", False):
+            endpoint = self.dependant.call = traced(f"{endpoint.__module__.rsplit('.', 1)[-1]}.{self.name}", "route")(
+                endpoint
+            )
+        if self.response_model is not None and asyncio.iscoroutinefunction(endpoint):
+            self.dependant.call = self._serialized(endpoint)
+        return super().get_route_handler()
+
+    def _serialized(self, endpoint: Callable) -> Callable:
+        adapter = response_adapter(self.response_model)
+        status_code = self.status_code or 200
+        dump_options = {
+            "include": self.response_model_include,
+            "exclude": self.response_model_exclude,
+            "by_alias": self.response_model_by_alias,
+            "exclude_unset": self.response_model_exclude_unset,
+            "exclude_defaults": self.response_model_exclude_defaults,
+            "exclude_none": self.response_model_exclude_none,
+        }
+
+        @functools.wraps(endpoint)
+        async def serialize(*args: Any, **kwargs: Any) -> Response:
+            content = await endpoint(*args, **kwargs)
+            if isinstance(content, Response):
+                return content
+            value = adapter.validate_python(content, from_attributes=True)
+            return JSONBytesResponse(adapter.dump_json(value, **dump_options), status_code=status_code)
+
+        return serialize
@@ -1,22 +1,43 @@
 from datetime import datetime
 from datetime import timedelta
 from typing import Dict
+from typing import Optional
 from typing import Tuple
 
-import bcrypt
+from fastapi import HTTPException
 from fastapi import Request
-from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.security import HTTPBearer
-from jose import jwt
+from fastapi.security.utils import get_authorization_scheme_param
+from starlette.status import HTTP_403_FORBIDDEN
 
 from app.core.exceptions import AuthError
+from app.core.metrics import auth_failures
+from app.core.passwords import build_hashes
+from app.core.sessions import session_registry
 from app.core.settings import Settings
+from app.core.tokens import build_verifier
+from app.core.tokens import InvalidToken
 
 
 settings = Settings()
 
-secret_key = settings.SECRET_KEY
-algorithm = settings.ALGORITHM
+token_verifier = build_verifier(
+    settings.ALGORITHM,
+    settings.JWT_KID,
+    secret=settings.SECRET_KEY,
+    verification_keys=settings.JWT_VERIFICATION_KEYS,
+    private_key_path=settings.JWT_PRIVATE_KEY_PATH,
+    public_key_paths=settings.JWT_PUBLIC_KEY_PATHS,
+    cache_size=settings.JWT_CLAIMS_CACHE_SIZE,
+)
+
+password_hashes = build_hashes(
+    settings.PASSWORD_HASH_ALGORITHM,
+    bcrypt_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+)
 
 
 def create_access_token(subject: Dict[str, str], expires_delta: timedelta = timedelta(minutes=30)) -> Tuple[str, str]:
@@ -27,30 +48,27 @@ def create_access_token(subject: Dict[str, str], expires_delta: timedelta = time
     )
 
     payload = {"exp": int(round(expire.timestamp())), **subject}
-    encoded_jwt = jwt.encode(payload, secret_key, algorithm)
+    encoded_jwt = token_verifier.encode(payload)
     expiration_datetime = expire.strftime(settings.DATETIME_FORMAT)
     return encoded_jwt, expiration_datetime
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    password_byte_enc = plain_password.encode("utf-8")
-    hashed_byte_password = hashed_password.encode("utf-8")
-
-    return bcrypt.checkpw(password=password_byte_enc, hashed_password=hashed_byte_password)
+    return password_hashes.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    pwd_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password=pwd_bytes, salt=salt)
-    return hashed_password.decode("utf-8")
+    return password_hashes.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return password_hashes.needs_rehash(hashed_password)
 
 
-def decote_jwt(token: str) -> str:
+def decote_jwt(token: str) -> Optional[Dict]:
     try:
-        decoded_token = jwt.decode(token, secret_key, algorithms=algorithm, options={"verify_exp": False})
-        return decoded_token if decoded_token["exp"] >= int(round(datetime.now().timestamp())) else None
-    except Exception as _:
+        return token_verifier.decode(token)
+    except InvalidToken:
         return None
 
 
@@ -58,16 +76,39 @@ class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
 
-    async def __call__(self, request: Request) -> HTTPAuthorizationCredentials | None:
-        credentials: HTTPAuthorizationCredentials = await super().__call__(request)
+    def _credentials(self, request: Request) -> Tuple[str, str] | None:
+        # HTTPBearer.__call__ without building its pydantic model, which cost more than a cached token check
+        authorization = request.headers.get("Authorization")
+        scheme, credentials = get_authorization_scheme_param(authorization)
+        if not (authorization and scheme and credentials):
+            if self.auto_error:
+                raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Not authenticated")
+            return None
+        if scheme.lower() != "bearer":
+            if self.auto_error:
+                raise HTTPException(status_code=HTTP_403_FORBIDDEN, detail="Invalid authentication credentials")
+            return None
+        return scheme, credentials
+
+    async def __call__(self, request: Request) -> str:
+        credentials = self._credentials(request)
 
         if credentials:
-            if not credentials.scheme == "Bearer":
+            scheme, token = credentials
+            if not scheme == "Bearer":
+                auth_failures.inc("invalid_scheme")
                 raise AuthError(detail="Invalid authentication scheme")
-            if not self.verify_jwt(credentials.credentials):
+            payload = decote_jwt(token)
+            if not payload:
+                auth_failures.inc("invalid_token")
                 raise AuthError(detail="Invalid token or expired token")
-            return credentials.credentials
+            if session_registry.is_revoked(payload.get("jti")):
+                auth_failures.inc("revoked_token")
+                raise AuthError(detail="Token has been revoked")
+            request.state.token_payload = payload
+            return token
         else:
+            auth_failures.inc("missing_credentials")
             raise AuthError(detail="Invaldid authorization code")
 
     def verify_jwt(self, jwt_token: str) -> bool:
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import uuid4
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import redis_client
+
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY = "auth:revoked"
+SESSIONS_PREFIX = "auth:sessions:"
+REVOCATION_CHANNEL = "auth:revocations"
+
+Revocation = Tuple[str, float]
+
+
+class SessionRegistry:
+    """Records the `jti` of every issued token by user and keeps a denylist of revoked ones until they expire.
+
+    The denylist is a plain dict of unexpired revoked ids, so `is_revoked` is one hash lookup. With Redis, sessions
+    are stored there so any worker can revoke a user's tokens, and revocations are published on a channel every
+    worker subscribes to; a worker (re)subscribing first loads the stored denylist. Without Redis everything
+    stays in process, so `start` refuses to run more than one worker that way.
+    """
+
+    def __init__(self, redis: Optional[Redis] = None, poll_timeout: float = 1.0) -> None:
+        self.redis = redis
+        self.poll_timeout = poll_timeout
+        self._revoked: Dict[str, float] = {}
+        self._sessions: Dict[str, Dict[str, float]] = {}
+        self._prune_at = 1024
+        self._listener: Optional[asyncio.Task] = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti in self._revoked
+
+    async def open(self, user_id: Hashable, ttl: float) -> str:
+        """Registers a new session for `user_id` and returns the `jti` to put in its token."""
+        jti, now = uuid4().hex, time.time()
+        if self.redis is None:
+            sessions = self._sessions.setdefault(str(user_id), {})
+            for expired in [session for session, exp in sessions.items() if exp <= now]:
+                del sessions[expired]
+            sessions[jti] = now + ttl
+            return jti
+
+        key = f"{SESSIONS_PREFIX}{user_id}"
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(key, "-inf", now)
+                pipe.zadd(key, {jti: now + ttl})
+                pipe.expire(key, int(ttl) + 1)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("could not record session of user %s: %s", user_id, e)
+        return jti
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        await self._publish([(jti, exp)])
+
+    async def revoke_user(self, user_id: Hashable) -> int:
+        """Revokes every unexpired session of `user_id`, returning how many there were."""
+        if self.redis is None:
+            sessions = list(self._sessions.pop(str(user_id), {}).items())
+        else:
+            key = f"{SESSIONS_PREFIX}{user_id}"
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.zrangebyscore(key, time.time(), "+inf", withscores=True)
+                    pipe.delete(key)
+                    members, _ = await pipe.execute()
+            except RedisError as e:
+                logger.error("could not read sessions of user %s, they stay valid: %s", user_id, e)
+                return 0
+            sessions = [(member.decode("utf-8"), exp) for member, exp in members]
+        await self._publish(sessions)
+        return len(sessions)
+
+    async def _publish(self, revocations: List[Revocation]) -> None:
+        if not revocations:
+            return
+        self._deny(revocations)
+        if self.redis is None:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(REVOKED_KEY, dict(revocations))
+                pipe.publish(REVOCATION_CHANNEL, orjson.dumps(revocations))
+                await pipe.execute()
+        except RedisError as e:
+            logger.error("could not propagate %d token revocations to other workers: %s", len(revocations), e)
+
+    def _deny(self, revocations: Iterable[Revocation]) -> None:
+        now = time.time()
+        for jti, exp in revocations:
+            if exp > now:
+                self._revoked[jti] = exp
+        if len(self._revoked) >= self._prune_at:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._prune_at = max(1024, 2 * len(self._revoked))
+
+    async def _load(self) -> None:
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(REVOKED_KEY, "-inf", now)
+            pipe.zrangebyscore(REVOKED_KEY, now, "+inf", withscores=True)
+            _, members = await pipe.execute()
+        self._deny((member.decode("utf-8"), exp) for member, exp in members)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(REVOCATION_CHANNEL)
+                    # loaded after subscribing, so nothing revoked in between is missed
+                    await self._load()
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=self.poll_timeout)
+                        if message is not None:
+                            self._receive(message["data"])
+            except RedisError as e:
+                logger.warning("token revocation subscription lost, retrying: %s", e)
+                await asyncio.sleep(self.poll_timeout)
+
+    def _receive(self, data: bytes) -> None:
+        # a bad message is dropped on its own, letting it end the listener would stop every later revocation
+        try:
+            self._deny(orjson.loads(data))
+        except (TypeError, ValueError) as e:
+            logger.error("ignoring malformed token revocation message %r: %s", data[:200], e)
+
+    def start(self, workers: int = 1) -> None:
+        if self.redis is None:
+            if workers > 1:
+                raise RuntimeError(
+                    f"token revocation needs REDIS_URL to reach all {workers} workers, "
+                    "without it revoked tokens stay valid on every worker but the one revoking them"
+                )
+            return
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    def clear(self) -> None:
+        self._revoked.clear()
+        self._sessions.clear()
+
+
+session_registry = SessionRegistry(redis_client)
@@ -0,0 +1,234 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+import orjson
+
+from app.core.cache import TTLCache
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.asymmetric import rsa
+except ImportError:  # only needed for EdDSA and RS256 tokens
+    serialization = None
+
+
+HMAC_ALGORITHMS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "RS256")
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64url_decode(data: bytes) -> bytes:
+    try:
+        return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidToken("Malformed segment") from e
+
+
+class HMACKey:
+    """A shared secret with its HMAC state precomputed, so signing only hashes the message."""
+
+    def __init__(self, kid: str, secret: str, algorithm: str) -> None:
+        if algorithm not in HMAC_ALGORITHMS:
+            raise ValueError(f"Unsupported algorithm {algorithm!r}, expected one of {list(HMAC_ALGORITHMS)}")
+        self.kid = kid
+        self.algorithm = algorithm
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=HMAC_ALGORITHMS[algorithm])
+
+    def sign(self, message: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(message)
+        return mac.digest()
+
+    def verify(self, message: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self.sign(message), signature)
+
+
+class AsymmetricKey:
+    """An Ed25519 or RSA key pair, or only its public half for keys that verify but no longer sign."""
+
+    def __init__(self, kid: str, algorithm: str, public_key, private_key=None) -> None:
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported algorithm {algorithm!r}, expected one of {ASYMMETRIC_ALGORITHMS}")
+        self.kid = kid
+        self.algorithm = algorithm
+        self._public_key = public_key
+        self._private_key = private_key
+        # Ed25519 takes no parameters, RSA signs PKCS#1 v1.5 over SHA-256 as RS256 requires
+        self._parameters = () if algorithm == "EdDSA" else (padding.PKCS1v15(), hashes.SHA256())
+
+    @classmethod
+    def from_pem(cls, kid: str, pem: bytes) -> "AsymmetricKey":
+        if serialization is None:
+            raise RuntimeError("EdDSA and RS256 tokens need the cryptography package installed")
+
+        if b"PRIVATE KEY" in pem:
+            private_key = serialization.load_pem_private_key(pem, password=None)
+            public_key = private_key.public_key()
+        else:
+            private_key, public_key = None, serialization.load_pem_public_key(pem)
+
+        if isinstance(public_key, ed25519.Ed25519PublicKey):
+            return cls(kid, "EdDSA", public_key, private_key)
+        if isinstance(public_key, rsa.RSAPublicKey):
+            return cls(kid, "RS256", public_key, private_key)
+        raise ValueError(f"Key {kid!r} is neither Ed25519 nor RSA")
+
+    def sign(self, message: bytes) -> bytes:
+        if self._private_key is None:
+            raise ValueError(f"Key {self.kid!r} only holds a public key")
+        return self._private_key.sign(message, *self._parameters)
+
+    def verify(self, message: bytes, signature: bytes) -> bool:
+        try:
+            self._public_key.verify(signature, message, *self._parameters)
+        except InvalidSignature:
+            return False
+        return True
+
+    def jwk(self) -> Dict[str, str]:
+        common = {"kid": self.kid, "alg": self.algorithm, "use": "sig"}
+        if self.algorithm == "EdDSA":
+            raw = self._public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            return {"kty": "OKP", "crv": "Ed25519", "x": b64url_encode(raw).decode("ascii"), **common}
+
+        numbers = self._public_key.public_numbers()
+        return {"kty": "RSA", "n": _b64url_uint(numbers.n), "e": _b64url_uint(numbers.e), **common}
+
+
+def _b64url_uint(value: int) -> str:
+    return b64url_encode(value.to_bytes((value.bit_length() + 7) // 8, "big")).decode("ascii")
+
+
+Key = Union[HMACKey, AsymmetricKey]
+
+
+class TokenVerifier:
+    """Issues and verifies compact JWTs against a set of keys identified by `kid`.
+
+    Tokens are signed with `signing_kid`; every key in `keys` still verifies, so a rotated out key keeps
+    accepting the tokens it issued until they expire. Tokens without a `kid` header predate rotation and are
+    checked against the signing key. Verified claims are cached by token digest until `exp`, so a client
+    reusing its token pays for one signature check.
+
+    The public halves of the asymmetric keys make up `jwks`, serialized once along with its ETag.
+    """
+
+    def __init__(self, keys: Dict[str, Key], signing_kid: str, cache_size: int = 10_000) -> None:
+        if signing_kid not in keys:
+            raise ValueError(f"Signing key {signing_kid!r} is not one of the configured keys")
+        self.keys = keys
+        self.signing_key = keys[signing_kid]
+        self._header = b64url_encode(
+            orjson.dumps({"alg": self.signing_key.algorithm, "typ": "JWT", "kid": signing_kid})
+        )
+        self._claims = TTLCache(maxsize=cache_size, ttl=0)
+        public_keys = sorted(
+            (key.jwk() for key in keys.values() if isinstance(key, AsymmetricKey)), key=lambda jwk: jwk["kid"]
+        )
+        self.jwks = orjson.dumps({"keys": public_keys})
+        self.jwks_etag = f'"{hashlib.sha256(self.jwks).hexdigest()[:32]}"'
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        signing_input = self._header + b"." + b64url_encode(orjson.dumps(claims))
+        return (signing_input + b"." + b64url_encode(self.signing_key.sign(signing_input))).decode("ascii")
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Returns the claims of a valid, unexpired token or raises InvalidToken."""
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self._claims.get(digest)
+        if claims is not None:
+            return claims
+
+        try:
+            signing_input, signature = token.encode("ascii").rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".")
+        except (UnicodeEncodeError, ValueError) as e:
+            raise InvalidToken("Malformed token") from e
+
+        header = self._load(header_segment)
+        kid, alg = header.get("kid"), header.get("alg")
+        # a forged header can carry any JSON value, and an unhashable kid would break the key lookup
+        if not isinstance(alg, str) or ("kid" in header and not isinstance(kid, str)):
+            raise InvalidToken("Unknown key or algorithm")
+        key = self.keys.get(kid) if "kid" in header else self.signing_key
+        if key is None or alg != key.algorithm:
+            raise InvalidToken("Unknown key or algorithm")
+        if not key.verify(signing_input, b64url_decode(signature)):
+            raise InvalidToken("Signature verification failed")
+
+        claims = self._load(payload_segment)
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            raise InvalidToken("Missing expiration")
+        ttl = exp - time.time()
+        if ttl < 0:
+            raise InvalidToken("Token expired")
+        self._claims.set(digest, claims, ttl)
+        return claims
+
+    @staticmethod
+    def _load(segment: bytes) -> Dict[str, Any]:
+        try:
+            value = orjson.loads(b64url_decode(segment))
+        except orjson.JSONDecodeError as e:
+            raise InvalidToken("Malformed segment") from e
+        if not isinstance(value, dict):
+            raise InvalidToken("Malformed segment")
+        return value
+
+    def clear(self) -> None:
+        self._claims.clear()
+
+
+def build_verifier(
+    algorithm: str,
+    kid: str,
+    secret: str = "",
+    verification_keys: Optional[Dict[str, str]] = None,
+    private_key_path: Optional[str] = None,
+    public_key_paths: Optional[Dict[str, str]] = None,
+    cache_size: int = 10_000,
+) -> TokenVerifier:
+    """Loads every key once, at startup.
+
+    `verification_keys` (HMAC secrets) and `public_key_paths` (PEM files) hold keys, by kid, that no longer
+    sign but still verify. HMAC secrets use `algorithm` when it is an HMAC one and HS256 otherwise, so tokens
+    issued before switching to EdDSA or RS256 stay valid until they expire.
+    """
+    hmac_algorithm = algorithm if algorithm in HMAC_ALGORITHMS else "HS256"
+    keys: Dict[str, Key] = {
+        other: HMACKey(other, other_secret, hmac_algorithm) for other, other_secret in (verification_keys or {}).items()
+    }
+    for other, path in (public_key_paths or {}).items():
+        keys[other] = AsymmetricKey.from_pem(other, Path(path).read_bytes())
+
+    if algorithm in HMAC_ALGORITHMS:
+        keys[kid] = HMACKey(kid, secret, algorithm)
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        if not private_key_path:
+            raise ValueError(f"{algorithm} tokens need JWT_PRIVATE_KEY_PATH")
+        keys[kid] = AsymmetricKey.from_pem(kid, Path(private_key_path).read_bytes())
+        if keys[kid].algorithm != algorithm:
+            raise ValueError(f"The private key is a {keys[kid].algorithm} key, not {algorithm}")
+    else:
+        raise ValueError(f"Unsupported algorithm {algorithm!r}")
+    return TokenVerifier(keys, kid, cache_size)
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import List
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from opentelemetry.sdk.trace.sampling import ParentBased
+from opentelemetry.sdk.trace.sampling import TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+
+class FileSpanExporter(ConsoleSpanExporter):
+    """Appends one JSON span per line, for running without a collector."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "a", encoding="utf-8")
+        super().__init__(out=self._file, formatter=lambda span: span.to_json(indent=None) + "\n")
+
+    def shutdown(self) -> None:
+        self._file.close()
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Decides per trace once its local root span ends: keeps `ratio` of the traces plus every trace with an error.
+
+    Spans of unfinished traces are buffered in memory; past `max_traces` open traces the oldest are dropped.
+    """
+
+    def __init__(self, delegate: SpanProcessor, ratio: float, max_traces: int = 10_000) -> None:
+        self.delegate = delegate
+        self.bound = TraceIdRatioBased.get_bound_for_rate(ratio)
+        self.max_traces = max_traces
+        self._pending: OrderedDict[int, List[ReadableSpan]] = OrderedDict()
+
+    def on_start(self, span, parent_context=None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        spans = self._pending.get(trace_id)
+        if spans is None:
+            spans = self._pending[trace_id] = []
+            if len(self._pending) > self.max_traces:
+                self._pending.popitem(last=False)
+        spans.append(span)
+
+        if span.parent is None or span.parent.is_remote:
+            del self._pending[trace_id]
+            if self.should_export(trace_id, spans):
+                for finished in spans:
+                    self.delegate.on_end(finished)
+
+    def should_export(self, trace_id: int, spans: List[ReadableSpan]) -> bool:
+        if trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self.bound:
+            return True
+        return any(span.status.status_code is StatusCode.ERROR for span in spans)
+
+    def shutdown(self) -> None:
+        self._pending.clear()
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+def build_exporter(kind: str, otlp_endpoint: str, file_path: str) -> SpanExporter:
+    if kind == "file":
+        return FileSpanExporter(file_path)
+    if kind == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError as e:
+            raise RuntimeError("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http installed") from e
+        return OTLPSpanExporter(endpoint=otlp_endpoint)
+    raise ValueError(f"Unknown span exporter {kind!r}, expected 'otlp' or 'file'")
+
+
+def build_provider(
+    exporter: SpanExporter,
+    service_name: str,
+    ratio: float,
+    sample_errors: bool,
+    batch: bool = True,
+) -> TracerProvider:
+    export = BatchSpanProcessor(exporter) if batch else SimpleSpanProcessor(exporter)
+    resource = Resource.create({"service.name": service_name})
+    if not sample_errors:
+        # head sampling: unsampled traces never record, which is the cheapest setting
+        provider = TracerProvider(resource=resource, sampler=ParentBased(TraceIdRatioBased(ratio)))
+        provider.add_span_processor(export)
+        return provider
+
+    provider = TracerProvider(resource=resource, sampler=ALWAYS_ON)
+    provider.add_span_processor(TailSamplingProcessor(export, ratio))
+    return provider
@@ -0,0 +1,181 @@
+import functools
+import inspect
+from typing import Optional
+
+from fastapi import HTTPException
+from opentelemetry import propagate
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+from opentelemetry.trace import StatusCode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.settings import settings
+
+
+_tracer: Optional[trace.Tracer] = None
+_provider = None
+
+
+def configure_tracing(exporter=None, batch: bool = True) -> None:
+    """Installs a tracer for this app without touching the global OpenTelemetry provider.
+
+    The SDK is only imported here, so with tracing disabled the app runs on the API package alone.
+    """
+    global _tracer, _provider
+    from app.core.trace_export import build_exporter
+    from app.core.trace_export import build_provider
+
+    if exporter is None:
+        exporter = build_exporter(settings.TRACING_EXPORTER, settings.TRACING_OTLP_ENDPOINT, settings.TRACING_FILE_PATH)
+    shutdown_tracing()
+    _provider = build_provider(
+        exporter,
+        settings.TRACING_SERVICE_NAME,
+        settings.TRACING_SAMPLE_RATIO,
+        settings.TRACING_ALWAYS_SAMPLE_ERRORS,
+        batch=batch,
+    )
+    _tracer = _provider.get_tracer("app")
+
+
+def shutdown_tracing() -> None:
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer, _provider = None, None
+
+
+def _is_error(exc: Exception) -> bool:
+    # 4xx responses are the API working as intended, they should not force a trace to be sampled
+    return not isinstance(exc, HTTPException) or exc.status_code >= 500
+
+
+def _unsampled() -> bool:
+    # under head sampling a child of an unsampled span is dropped anyway, so skip creating it
+    parent = trace.get_current_span()
+    return parent.get_span_context().is_valid and not parent.is_recording()
+
+
+def traced(name: str, layer: str):
+    """Wraps a coroutine function in an internal span; a no-op call when tracing is not configured."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _tracer is None or _unsampled():
+                return await func(*args, **kwargs)
+            with _tracer.start_as_current_span(
+                name, attributes={"code.layer": layer}, record_exception=False, set_status_on_exception=False
+            ) as span:
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    span.record_exception(e)
+                    if _is_error(e):
+                        span.set_status(StatusCode.ERROR, str(e))
+                    raise
+
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorator
+
+
+class Traced:
+    """Base for classes whose public coroutine methods, inherited or overridden, each get a span.
+
+    Spans are named after the class defining the method, e.g. `UserRepository.read_by_email`.
+    """
+
+    trace_layer = "app"
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for name, attribute in list(vars(cls).items()):
+            if name.startswith("_") or getattr(attribute, "__traced__", False):
+                continue
+            if inspect.iscoroutinefunction(attribute):
+                setattr(cls, name, traced(f"{cls.__name__}.{name}", cls.trace_layer)(attribute))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    span = None
+    if _tracer is not None and not _unsampled():
+        span = _tracer.start_span(
+            statement.split(None, 1)[0] if statement else "SQL",
+            kind=SpanKind.CLIENT,
+            attributes={"db.system": "postgresql", "db.statement": statement},
+        )
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+def _pop_span(conn):
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    return spans.pop() if spans else None
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    span = _pop_span(conn)
+    if span is not None:
+        span.end()
+
+
+def _handle_error(exception_context) -> None:
+    span = _pop_span(exception_context.connection)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.set_status(StatusCode.ERROR, str(exception_context.original_exception))
+        span.end()
+
+
+def trace_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the server span of every request, continuing an incoming `traceparent`."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with _tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+            record_exception=False,
+            set_status_on_exception=False,
+        ) as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            except Exception as e:
+                span.record_exception(e)
+                span.set_status(StatusCode.ERROR, str(e))
+                raise
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    span.update_name(f"{scope['method']} {route}")
+                    span.set_attribute("http.route", route)
+                span.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    span.set_status(StatusCode.ERROR)
@@ -1,22 +1,54 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from app.core.database import sessionmanager
+from app.core.email_filter import email_filter
+from app.core.hashing import password_hasher
+from app.core.instrumentation import QueryInstrumentationMiddleware
+from app.core.metrics import db_pool_connections
+from app.core.metrics import db_pool_max_overflow
+from app.core.metrics import db_pool_size
+from app.core.metrics import MetricsMiddleware
+from app.core.metrics import registry
+from app.core.profiling import profiler
+from app.core.profiling import ProfilingMiddleware
+from app.core.sessions import session_registry
 from app.core.settings import settings
+from app.core.tracing import configure_tracing
+from app.core.tracing import shutdown_tracing
+from app.core.tracing import TracingMiddleware
+from app.repository.user_repository import UserRepository
+from app.routes.jwks_route import router as jwks_router
+from app.routes.metrics_route import router as metrics_router
 from app.routes.v1 import routers
 
 
+def pool_connection_samples():
+    status = sessionmanager.pool_status()
+    return {(state,): status[state] for state in ("checked_in", "checked_out", "overflow")}
+
+
 def init_app(init_db=True):
     lifespan = None
 
     if init_app:
-        sessionmanager.init(settings.DATABASE_URL)
+        sessionmanager.init(settings.DATABASE_URL, settings.DATABASE_REPLICA_URLS)
         # print(settings.DATABASE_URL, "\n", settings.TEST_DATABASE_URL)
 
         @asynccontextmanager
         async def lifespan(app: FastAPI):
+            sessionmanager.start_health_checks()
+            registry.start_flushing(settings.METRICS_FLUSH_INTERVAL)
+            session_registry.start(settings.WEB_CONCURRENCY)
+            email_filter.start(UserRepository(sessionmanager.session_factory()).emails())
             yield
+            email_filter.stop()
+            session_registry.stop()
+            registry.stop_flushing()
+            shutdown_tracing()
+            password_hasher.shutdown()
             if sessionmanager._engine is not None:
                 await sessionmanager.close()
 
@@ -30,8 +62,30 @@ def init_app(init_db=True):
         },
         summary="WebApi build on best market practices such as TDD, Clean Arch, Data Validation with Pydantic V2",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
     app.include_router(routers)
+    app.include_router(jwks_router)
+    if settings.SQL_INSTRUMENTATION_ENABLED:
+        app.add_middleware(QueryInstrumentationMiddleware)
+    if settings.METRICS_ENABLED:
+        db_pool_connections.set_function(pool_connection_samples)
+        db_pool_size.set_function(lambda: {(): sessionmanager.pool_status()["size"]})
+        db_pool_max_overflow.set_function(lambda: {(): sessionmanager.pool_status()["max_overflow"]})
+        app.include_router(metrics_router)
+        app.add_middleware(MetricsMiddleware)
+    if settings.TRACING_ENABLED:
+        configure_tracing()
+    # passes requests straight through until a tracer is configured
+    app.add_middleware(TracingMiddleware)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilingMiddleware,
+            profiler=profiler,
+            every=settings.PROFILING_EVERY,
+            header=settings.PROFILING_HEADER,
+            token=settings.PROFILING_TOKEN or "",
+        )
 
     return app
 
@@ -1,4 +1,8 @@
+from .api_models import Education
+from .api_models import Experience
+from .api_models import Resume
+from .api_models import Skill
 from .api_models import User
 from .base_model import Base
 
-__all__ = ["User", "Base"]
+__all__ = ["User", "Resume", "Experience", "Education", "Skill", "Base"]
@@ -1,14 +1,24 @@
+from datetime import date
+from typing import List
 from typing import Optional
+from uuid import UUID
 
 from pydantic import EmailStr
+from sqlalchemy import ForeignKey
+from sqlalchemy import func
+from sqlalchemy import Index
+from sqlalchemy import literal_column
+from sqlalchemy.dialects import postgresql  # noqa: F401 registers the full text search functions used below
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
+from sqlalchemy.orm import relationship
 
 from app.models.base_model import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
     __allow_unmapped__ = True
 
     email: Mapped[str] = mapped_column(unique=True)
@@ -29,8 +39,88 @@ class User(Base):
         self.password = password
         self.email = email
         self.is_active = is_active
-        self.is_superuser
+        self.is_superuser = is_superuser
 
-    # resumes: Mapped[list["Resume"]] = relationship(
-    #     back_populates="user", cascade="all, delete-orphan"
-    # )
+    # relationships never lazy load: repositories pick the loader, and rows go away with ON DELETE CASCADE
+    resumes: Mapped[List["Resume"]] = relationship(
+        back_populates="user", lazy="raise", passive_deletes=True, init=False, repr=False
+    )
+
+
+class Resume(Base):
+    __tablename__ = "resumes"
+    __table_args__ = (Index("ix_resumes_user_id_created_at_id", "user_id", "created_at", "id"),)
+
+    user_id: Mapped[UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    title: Mapped[str]
+    summary: Mapped[Optional[str]]
+
+    user: Mapped[User] = relationship(back_populates="resumes", lazy="raise", init=False, repr=False)
+    experiences: Mapped[List["Experience"]] = relationship(
+        order_by="Experience.position", lazy="raise", passive_deletes=True, init=False, repr=False
+    )
+    education: Mapped[List["Education"]] = relationship(
+        order_by="Education.position", lazy="raise", passive_deletes=True, init=False, repr=False
+    )
+    skills: Mapped[List["Skill"]] = relationship(
+        order_by="Skill.position", lazy="raise", passive_deletes=True, init=False, repr=False
+    )
+
+
+class Experience(Base):
+    __tablename__ = "experiences"
+    __table_args__ = (Index("ix_experiences_resume_id_position", "resume_id", "position"),)
+
+    resume_id: Mapped[UUID] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"))
+    # entries keep the order they were sent in
+    position: Mapped[int]
+
+    company: Mapped[str]
+    role: Mapped[str]
+    start_date: Mapped[date]
+    end_date: Mapped[Optional[date]]
+    description: Mapped[Optional[str]]
+
+
+class Education(Base):
+    __tablename__ = "education"
+    __table_args__ = (Index("ix_education_resume_id_position", "resume_id", "position"),)
+
+    resume_id: Mapped[UUID] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"))
+    # entries keep the order they were sent in
+    position: Mapped[int]
+
+    institution: Mapped[str]
+    degree: Mapped[str]
+    field_of_study: Mapped[Optional[str]]
+    start_date: Mapped[date]
+    end_date: Mapped[Optional[date]]
+
+
+class Skill(Base):
+    __tablename__ = "skills"
+    __table_args__ = (Index("ix_skills_resume_id_position", "resume_id", "position"),)
+
+    resume_id: Mapped[UUID] = mapped_column(ForeignKey("resumes.id", ondelete="CASCADE"))
+    # entries keep the order they were sent in
+    position: Mapped[int]
+
+    name: Mapped[str]
+    level: Mapped[Optional[str]]
+
+
+def user_search_document(username, email):
+    # constants are literal columns so queries render the exact expression of ix_users_search_document
+    return func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        username + literal_column("' '") + func.translate(email, literal_column("'@.'"), literal_column("'  '")),
+    )
+
+
+User.__table__.append_constraint(
+    Index(
+        "ix_users_search_document",
+        user_search_document(User.__table__.c.username, User.__table__.c.email),
+        postgresql_using="gin",
+    )
+)
@@ -1,48 +1,191 @@
 from contextlib import AbstractContextManager
+from datetime import datetime
 from typing import Any
+from typing import AsyncIterator
 from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from uuid import UUID
 
 from pydantic import EmailStr
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import true
+from sqlalchemy import tuple_
 from sqlalchemy import update
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.cache import CacheBackend
+from app.core.cache import repository_cache
+from app.core.database import dict_to_sqlalchemy_filter_options
+from app.core.database import ordering_to_sqlalchemy_order_by
+from app.core.database import REPLICA_READ
 from app.core.exceptions import BadRequestError
 from app.core.exceptions import DuplicatedError
 from app.core.exceptions import NotFoundError
+from app.core.metrics import cache_requests
 from app.core.settings import Settings
+from app.core.tracing import Traced
+from app.repository.codec import detached_instance
+from app.repository.codec import dump_instance
+from app.repository.codec import load_instance
 from app.schemas.base_schema import FindBase
 
 settings = Settings()
 
 
-class BaseRepository:
-    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]], model) -> None:
+class BaseRepository(Traced):
+    trace_layer = "repository"
+    cache_lookup_columns: tuple = ()
+    # columns never written to the shared cache, cached reads return them as None
+    cache_excluded_columns: tuple = ()
+    filterable_columns: Optional[tuple] = None
+
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractContextManager[Session]],
+        model,
+        cache: Optional[CacheBackend] = None,
+    ) -> None:
         self.session_factory = session_factory
         self.model = model
+        if cache is None and settings.REPOSITORY_CACHE_ENABLED:
+            cache = repository_cache
+        self.cache = cache
+
+    def _cache_key(self, column: str, value: Any) -> str:
+        return f"{self.model.__tablename__}:{column}:{value}"
+
+    @property
+    def _cached_columns(self) -> Tuple[str, ...]:
+        return ("id", *self.cache_lookup_columns)
+
+    def cache_keys(self, instance) -> List[str]:
+        return [self._cache_key(column, getattr(instance, column)) for column in self._cached_columns]
+
+    async def _read_cache(self, column: str, value: Any):
+        if self.cache is None:
+            return None
+        payload = await self.cache.get(self._cache_key(column, value))
+        cache_requests.inc(self.model.__tablename__, "miss" if payload is None else "hit")
+        return None if payload is None else load_instance(self.model, payload)
+
+    async def _write_cache(self, instance) -> None:
+        if self.cache is None:
+            return
+        payload = dump_instance(instance, self.cache_excluded_columns)
+        for key in self.cache_keys(instance):
+            await self.cache.set(key, payload, settings.REPOSITORY_CACHE_TTL)
 
-    async def read_by_options(self, schema: FindBase):
+    @property
+    def _lookup_bind(self) -> Dict[str, Any]:
+        # a row written to the shared cache outlives both the replica lag and the sticky primary window,
+        # so lookups that populate it read from the primary
+        return REPLICA_READ if self.cache is None else {}
+
+    async def invalidate_cache(self, id: UUID, keys: List[str]) -> None:
+        if self.cache is not None:
+            await self.cache.delete(*keys)
+
+    def _filter_options(self, filters: Optional[Dict[str, Any]]):
+        return dict_to_sqlalchemy_filter_options(self.model, filters or {}, self.filterable_columns)
+
+    def _select(self, columns: Optional[Sequence[str]] = None):
+        if columns is None:
+            return select(self.model)
+        return select(*(getattr(self.model, column) for column in columns))
+
+    async def _fetch(self, stmt, columns: Optional[Sequence[str]] = None):
+        # projected reads return Row tuples as they come off the driver, skipping ORM identity and state tracking
         async with self.session_factory() as session:
-            query = await session.execute(select(self.model).offset(schema.offset).limit(schema.limit))
-            result = query.scalars().all()
-            return result
+            query = await session.execute(stmt, bind_arguments=REPLICA_READ)
+            return query.all() if columns is not None else query.scalars().all()
+
+    async def read_by_options(
+        self,
+        schema: FindBase,
+        filters: Optional[Dict[str, Any]] = None,
+        ordering: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ):
+        stmt = self._select(columns).where(self._filter_options(filters)).offset(schema.offset).limit(schema.limit)
+        if ordering:
+            stmt = stmt.order_by(*ordering_to_sqlalchemy_order_by(self.model, ordering, self.filterable_columns))
+        return await self._fetch(stmt, columns)
+
+    async def read_by_cursor(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, UUID]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ):
+        keyset = (self.model.created_at, self.model.id)
+        stmt = self._select(columns).where(self._filter_options(filters)).order_by(*keyset).limit(limit + 1)
+        if after is not None:
+            stmt = stmt.where(tuple_(*keyset) > tuple_(*after))
+
+        result = await self._fetch(stmt, columns)
+        return result[:limit], len(result) > limit
+
+    def projection_statement(self, columns: Sequence[str], filters: Optional[Dict[str, Any]] = None):
+        return self._select(columns).where(self._filter_options(filters))
+
+    async def stream(self, stmt, chunk_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+        """Yields the rows of `stmt` in partitions read from a server-side cursor, never the whole result."""
+        async with self.session_factory() as session:
+            result = await session.stream(stmt.execution_options(yield_per=chunk_size), bind_arguments=REPLICA_READ)
+            async for partition in result.partitions():
+                yield partition
+
+    async def count(self, estimated: bool = False, filters: Optional[Dict[str, Any]] = None) -> int:
+        async with self.session_factory() as session:
+            if estimated and not filters:
+                stmt = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)")
+                reltuples = await session.scalar(
+                    stmt, {"table_name": self.model.__tablename__}, bind_arguments=REPLICA_READ
+                )
+                if reltuples is not None and reltuples >= 0:
+                    return reltuples
+            stmt = select(func.count()).select_from(self.model).where(self._filter_options(filters))
+            return await session.scalar(stmt, bind_arguments=REPLICA_READ)
 
     async def read_by_id(self, id: UUID):
+        cached = await self._read_cache("id", id)
+        if cached is not None:
+            return cached
+
         async with self.session_factory() as session:
-            result = await session.get(self.model, id)
+            stmt = select(self.model).where(self.model.id == id)
+            result = await session.scalar(stmt, bind_arguments=self._lookup_bind)
 
             if not result:
                 raise NotFoundError(detail=f"id not found: {id}")
+            await self._write_cache(result)
             return result
 
-    async def read_by_email(self, email: EmailStr):
+    async def read_by_email(self, email: EmailStr, cached: bool = True):
+        """With `cached` off the row is always read from the database, including `cache_excluded_columns`."""
+        if cached:
+            cached_user = await self._read_cache("email", email)
+            if cached_user is not None:
+                return [cached_user]
+
         async with self.session_factory() as session:
             stmt = select(self.model).where(self.model.email == email)
-            result = await session.execute(stmt)
+            result = await session.execute(stmt, bind_arguments=self._lookup_bind)
             user = result.scalars().all()
 
+            if user:
+                await self._write_cache(user[0])
             return user
 
     # probally a bug will happpen here, correct later due to diferente models
@@ -61,57 +204,61 @@ class BaseRepository:
                 raise DuplicatedError(detail=str(e.orig))
             return query
 
-    async def update(self, id: UUID, schema):
-        async with self.session_factory() as session:
-            schema = schema.model_dump()
-            result = await session.get(self.model, id)
+    def update_statement(self, id: UUID, values: Dict[str, Any], detect_changes: bool = True):
+        """Builds a single round trip update returning the updated row next to the cached columns it had before.
 
-            if schema == {attr: getattr(result, attr) for attr in schema.keys()}:
-                raise BadRequestError(detail="No changes detected")
+        The row is locked and read in a CTE, so a missing id gives no row at all, while an update that
+        changes nothing (detected with IS DISTINCT FROM) gives the old columns with a NULL updated row.
+        """
+        table = self.model.__table__
+        old = select(*(table.c[column] for column in self._cached_columns)).where(table.c.id == id)
+        old = old.with_for_update().cte("old")
 
-            if not result:
-                raise NotFoundError(detail=f"id not found: {id}")
+        stmt = update(table).where(table.c.id == old.c.id).values(**values).returning(*table.c)
+        if detect_changes:
+            stmt = stmt.where(or_(*(table.c[column].is_distinct_from(value) for column, value in values.items())))
+        updated = stmt.cte("updated")
+
+        old_columns = (old.c[column].label(f"old_{column}") for column in self._cached_columns)
+        return select(*updated.c, *old_columns).select_from(old.outerjoin(updated, true()))
 
-            stmt = update(self.model).where(self.model.id == id).values(**schema)
+    async def _update(self, id: UUID, values: Dict[str, Any], detect_changes: bool = True):
+        async with self.session_factory() as session:
             try:
-                await session.execute(stmt)
+                result = await session.execute(self.update_statement(id, values, detect_changes))
+                row = result.one_or_none()
                 await session.commit()
-                await session.refresh(result)
-                return result
             except IntegrityError as e:
                 error_message = ":".join(str(e.orig).replace("\n", " ").split(":")[1:])
                 raise DuplicatedError(detail=error_message)
 
-    async def update_attr(self, id: UUID, column: str, value: Any):
-        async with self.session_factory() as session:
-            result = await session.get(self.model, id)
+        if row is None:
+            raise NotFoundError(detail=f"id not found: {id}")
+        if row.id is None:
+            raise BadRequestError(detail="No changes detected")
 
-            if not result:
-                raise NotFoundError(detail=f"id not found: {id}")
+        row = row._mapping
+        cache_keys = [self._cache_key(column, row[f"old_{column}"]) for column in self._cached_columns]
+        await self.invalidate_cache(id, cache_keys)
+        return detached_instance(self.model, row)
 
-            if value == getattr(result, column):
-                raise BadRequestError(detail="No changes detected")
+    async def update(self, id: UUID, schema):
+        return await self._update(id, schema.model_dump())
 
-            stmt = update(self.model).where(self.model.id == id).values({column: value})
-            try:
-                await session.execute(stmt)
-                await session.commit()
-                await session.refresh(result)
-                return result
-            except IntegrityError as e:
-                error_message = ":".join(str(e.orig).replace("\n", " ").split(":")[1:])
-                raise DuplicatedError(detail=error_message)
+    async def update_attr(self, id: UUID, column: str, value: Any):
+        return await self._update(id, {column: value})
 
     async def whole_update(self, id: UUID, schema):
-        async with self.session_factory() as session:
-            await session.query(self.model).filter(self.model.id == id).update(schema.model_dump())
-            await session.commit()
-            return self.read_by_id(id)
+        return await self._update(id, schema.model_dump(), detect_changes=False)
 
     async def delete_by_id(self, id: UUID):
+        table = self.model.__table__
+        stmt = delete(table).where(table.c.id == id).returning(*(table.c[column] for column in self._cached_columns))
         async with self.session_factory() as session:
-            user = await session.get(self.model, id)
-            if not user:
-                raise NotFoundError(detail=f"not found id : {id}")
-            await session.delete(user)
+            result = await session.execute(stmt)
+            row = result.one_or_none()
             await session.commit()
+
+        if row is None:
+            raise NotFoundError(detail=f"not found id : {id}")
+        await self.invalidate_cache(id, self.cache_keys(row))
@@ -0,0 +1,43 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+from typing import Collection
+from typing import Mapping
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+
+import orjson
+from sqlalchemy.orm.attributes import set_committed_value
+
+_DECODERS = {UUID: UUID, datetime: datetime.fromisoformat}
+
+
+@lru_cache(maxsize=None)
+def column_decoders(model) -> Tuple[Tuple[str, Optional[Callable[[Any], Any]]], ...]:
+    decoders = []
+    for attr in model.__mapper__.column_attrs:
+        python_type = attr.columns[0].type.python_type
+        decoders.append((attr.key, _DECODERS.get(python_type)))
+    return tuple(decoders)
+
+
+def detached_instance(model, values: Mapping[str, Any]):
+    instance = model.__mapper__.class_manager.new_instance()
+    for key, _ in column_decoders(model):
+        set_committed_value(instance, key, values[key])
+    return instance
+
+
+def dump_instance(instance, excluded: Collection[str] = ()) -> bytes:
+    """Excluded columns are written as null, so they never leave the process and the payload keeps its layout."""
+    values = [None if key in excluded else getattr(instance, key) for key, _ in column_decoders(type(instance))]
+    return orjson.dumps(values, default=str)
+
+
+def load_instance(model, payload: bytes):
+    instance = model.__mapper__.class_manager.new_instance()
+    for (key, decoder), value in zip(column_decoders(model), orjson.loads(payload)):
+        set_committed_value(instance, key, decoder(value) if decoder is not None and value is not None else value)
+    return instance
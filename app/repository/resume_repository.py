@@ -0,0 +1,111 @@
+from contextlib import AbstractContextManager
+from operator import attrgetter
+from typing import Callable
+from typing import Dict
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.exceptions import BadRequestError
+from app.core.exceptions import NotFoundError
+from app.models import Education
+from app.models import Experience
+from app.models import Resume
+from app.models import Skill
+from app.repository.base_repository import BaseRepository
+from app.repository.codec import detached_instance
+from app.schemas.resume_schema import CreateResume
+from app.schemas.resume_schema import UpsertResume
+
+
+SECTIONS = {"experiences": Experience, "education": Education, "skills": Skill}
+
+
+class ResumeRepository(BaseRepository):
+    """Resumes and their sections, read and written in a number of queries that does not grow with the sections.
+
+    A full read is the resume plus one selectinload per section, a write is one statement per table touched,
+    and list views project the resume columns without loading any section.
+    """
+
+    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]]):
+        self.session_factory = session_factory
+        super().__init__(session_factory, Resume)
+        # nested rows do not fit the flat row codec, so resumes are never served from the repository cache
+        self.cache = None
+
+    def with_sections(self, stmt):
+        return stmt.options(*(selectinload(getattr(self.model, name)) for name in SECTIONS))
+
+    async def read_by_id(self, id: UUID):
+        # selectinload runs its selects without bind arguments, so they always reach the primary;
+        # reading the resume there too keeps the resume and its sections in one snapshot
+        async with self.session_factory() as session:
+            result = await session.scalar(self.with_sections(select(self.model).where(self.model.id == id)))
+
+        if not result:
+            raise NotFoundError(detail=f"id not found: {id}")
+        return result
+
+    async def read_owner_id(self, id: UUID) -> UUID:
+        async with self.session_factory() as session:
+            user_id = await session.scalar(select(self.model.user_id).where(self.model.id == id))
+
+        if user_id is None:
+            raise NotFoundError(detail=f"id not found: {id}")
+        return user_id
+
+    async def _insert_sections(self, session, resume_id: UUID, sections: Dict[str, List]) -> Dict[str, List]:
+        inserted = {}
+        for name, items in sections.items():
+            table = SECTIONS[name].__table__
+            rows = []
+            if items:
+                values = [{**item.model_dump(), "resume_id": resume_id, "position": i} for i, item in enumerate(items)]
+                # one INSERT ... VALUES per batch of rows, not per entry
+                rows = (await session.execute(insert(table).returning(*table.c), values)).all()
+            entries = (detached_instance(SECTIONS[name], row._mapping) for row in rows)
+            inserted[name] = sorted(entries, key=attrgetter("position"))
+        return inserted
+
+    async def create_with_sections(self, user_id: UUID, schema: CreateResume):
+        table = self.model.__table__
+        stmt = insert(table).values(user_id=user_id, title=schema.title, summary=schema.summary).returning(*table.c)
+        async with self.session_factory() as session:
+            resume = detached_instance(self.model, (await session.execute(stmt)).one()._mapping)
+            sections = {name: getattr(schema, name) for name in SECTIONS}
+            inserted = await self._insert_sections(session, resume.id, sections)
+            await session.commit()
+
+        for name, entries in inserted.items():
+            set_committed_value(resume, name, entries)
+        return resume
+
+    async def update_with_sections(self, id: UUID, schema: UpsertResume):
+        values = schema.model_dump(include={"title", "summary"}, exclude_unset=True)
+        if values.get("title", "") is None:
+            del values["title"]
+        sections = {name: getattr(schema, name) for name in SECTIONS if getattr(schema, name) is not None}
+        if not values and not sections:
+            raise BadRequestError(detail="No changes detected")
+
+        table = self.model.__table__
+        stmt = update(table).where(table.c.id == id).values(**values, updated_at=func.now()).returning(table.c.id)
+        async with self.session_factory() as session:
+            if await session.scalar(stmt) is None:
+                raise NotFoundError(detail=f"id not found: {id}")
+            for name in sections:
+                section = SECTIONS[name].__table__
+                await session.execute(delete(section).where(section.c.resume_id == id))
+            await self._insert_sections(session, id, sections)
+            await session.commit()
+
+        return await self.read_by_id(id)
@@ -1,13 +1,146 @@
 from contextlib import AbstractContextManager
+from typing import Any
 from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
 
+from sqlalchemy import and_
+from sqlalchemy import func
+from sqlalchemy import literal_column
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
+from app.core.cache import CacheBackend
+from app.core.cache import principal_cache
+from app.core.database import REPLICA_READ
+from app.core.email_filter import email_filter
 from app.models import User
+from app.models.api_models import user_search_document
 from app.repository.base_repository import BaseRepository
 
 
+IMPORT_COLUMNS = ("row_number", "email", "username", "password")
+
+# created and dropped in the transaction that uses it, so it also works behind PgBouncer in transaction mode
+CREATE_IMPORT_TABLE = text(
+    "CREATE TEMP TABLE users_import (row_number int, email text, username text, password text) ON COMMIT DROP"
+)
+DROP_IMPORT_TABLE = text("DROP TABLE users_import")
+
+# batches are deduplicated before COPY, so a staged row missing from `inserted` collided with an existing user
+MERGE_IMPORT_TABLE = text(
+    """
+    WITH inserted AS (
+        INSERT INTO users (email, username, password)
+        SELECT email, username, password FROM users_import ORDER BY row_number
+        ON CONFLICT DO NOTHING
+        RETURNING email
+    )
+    SELECT staged.row_number, EXISTS (SELECT 1 FROM users WHERE users.email = staged.email) AS email_taken
+    FROM users_import AS staged
+    LEFT JOIN inserted ON inserted.email = staged.email
+    WHERE inserted.email IS NULL
+    ORDER BY staged.row_number
+    """
+)
+
+
 class UserRepository(BaseRepository):
-    def __init__(self, session_factory: Callable[..., AbstractContextManager[Session]]):
+    cache_lookup_columns = ("email",)
+    cache_excluded_columns = ("password",)
+
+    def __init__(
+        self, session_factory: Callable[..., AbstractContextManager[Session]], cache: Optional[CacheBackend] = None
+    ):
         self.session_factory = session_factory
-        super().__init__(session_factory, User)
+        super().__init__(session_factory, User, cache=cache)
+
+    async def invalidate_cache(self, id: UUID, keys: List[str]) -> None:
+        principal_cache.pop(id)
+        await super().invalidate_cache(id, keys)
+
+    # emails reach the sign-in filter before the database, so a failed write leaves a false positive at worst
+    async def create(self, schema):
+        await email_filter.add(schema.email)
+        return await super().create(schema)
+
+    async def _update(self, id: UUID, values: Dict[str, Any], detect_changes: bool = True):
+        if values.get("email"):
+            await email_filter.add(values["email"])
+        return await super()._update(id, values, detect_changes)
+
+    async def replace_password(self, id: UUID, old_password: str, new_password: str) -> bool:
+        """Swaps the password hash only while it is still `old_password`, returning whether it did.
+
+        A rehash on sign-in races with password changes, and must never write back over the newer hash.
+        """
+        table = self.model.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == id, table.c.password == old_password)
+            .values(password=new_password)
+            .returning(*(table.c[column] for column in self._cached_columns))
+        )
+        async with self.session_factory() as session:
+            row = (await session.execute(stmt)).one_or_none()
+            await session.commit()
+
+        if row is None:
+            return False
+        await self.invalidate_cache(id, self.cache_keys(row))
+        return True
+
+    def emails(self, chunk_size: int = 10_000):
+        return self.stream(select(self.model.email), chunk_size)
+
+    def search_statement(self, terms: List[str], limit: int, after: Optional[Tuple[float, UUID]] = None):
+        document = user_search_document(self.model.username, self.model.email)
+        query = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+        rank = func.ts_rank(document, query)
+
+        stmt = (
+            select(self.model, rank.label("rank"))
+            .where(document.op("@@")(query))
+            .order_by(rank.desc(), self.model.id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            after_rank, after_id = after
+            stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, self.model.id > after_id)))
+        return stmt
+
+    async def search(self, terms: List[str], limit: int, after: Optional[Tuple[float, UUID]] = None):
+        stmt = self.search_statement(terms, limit, after)
+        async with self.session_factory() as session:
+            query_result = await session.execute(stmt, bind_arguments=REPLICA_READ)
+            result = query_result.all()
+            return result[:limit], len(result) > limit
+
+    async def copy_users(self, records: List[Tuple[int, str, str, str]]) -> List[Tuple[int, str]]:
+        """COPYs (row_number, email, username, password_hash) records through a staging table.
+
+        Returns the row number and reason of every record skipped because of an existing email or username.
+        """
+        await email_filter.add(*(email for _, email, _, _ in records))
+        async with self.session_factory() as session:
+            await session.execute(CREATE_IMPORT_TABLE)
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                "users_import", records=records, columns=IMPORT_COLUMNS
+            )
+            skipped = (await session.execute(MERGE_IMPORT_TABLE)).all()
+            # the commit only releases a savepoint when called inside an outer transaction, which keeps the table
+            await session.execute(DROP_IMPORT_TABLE)
+            await session.commit()
+
+        return [
+            (row_number, "Email already registered" if email_taken else "Username already registered")
+            for row_number, email_taken in skipped
+        ]
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi import Request
+from fastapi import Response
+
+from app.core.security import token_verifier
+from app.core.settings import settings
+
+router = APIRouter(tags=["Auth"])
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return any(candidate in ("*", etag) for candidate in candidates)
+
+
+@router.get("/.well-known/jwks.json")
+async def jwks(request: Request):
+    """Public keys verifying our access tokens, so other services check them locally instead of calling us."""
+    headers = {"ETag": token_verifier.jwks_etag, "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match", ""), token_verifier.jwks_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(token_verifier.jwks, media_type="application/jwk-set+json", headers=headers)
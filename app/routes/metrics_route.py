@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    # on the event loop on purpose: it is the only thread updating the samples, so a scrape never sees them mid-update
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,11 +1,14 @@
 from fastapi import APIRouter
 
 from app.routes.v1.auth_routes import router as auth_router
+from app.routes.v1.health_route import router as health_router
 from app.routes.v1.ping_route import router as ping_router
+from app.routes.v1.profiling_route import router as profiling_router
+from app.routes.v1.resume_routes import router as resume_router
 from app.routes.v1.users_routes import router as user_router
 
 routers = APIRouter(prefix="/v1")
-router_list = [auth_router, user_router, ping_router]
+router_list = [auth_router, user_router, ping_router, health_router, profiling_router, resume_router]
 
 for router in router_list:
     # router.tags = routers.tags.append("v1")
@@ -1,29 +1,40 @@
 from fastapi import APIRouter
+from fastapi import Request
 
 from app.core.dependencies import AuthServiceDependency
 from app.core.dependencies import CurrentUserDependency
+from app.core.rate_limit import auth_rate_limit
+from app.core.responses import SerializedRoute
 from app.schemas.auth_schema import SignIn
 from app.schemas.auth_schema import SignInResponse
 from app.schemas.auth_schema import SignUp
+from app.schemas.base_schema import Message
 from app.schemas.user_schema import User as UserSchema
-# from app.schemas.base_schema import Message
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=SerializedRoute)
 
 
 @router.post("/sign-in", response_model=SignInResponse)
-async def sign_in(user_info: SignIn, service: AuthServiceDependency):
+async def sign_in(request: Request, user_info: SignIn, service: AuthServiceDependency):
+    await auth_rate_limit.check(request, "sign-in", user_info.email__eq)
     return await service.sign_in(user_info)
 
 
 @router.post("/sign-up", status_code=201, response_model=UserSchema)
-async def sign_up(user_info: SignUp, service: AuthServiceDependency):
+async def sign_up(request: Request, user_info: SignUp, service: AuthServiceDependency):
+    await auth_rate_limit.check(request, "sign-up", user_info.email)
     return await service.sign_up(user_info)
 
 
 @router.post("/refresh_token")
-async def refresh_token(current_user: CurrentUserDependency, service: AuthServiceDependency):
-    return await service.refresh_token(current_user)
+async def refresh_token(request: Request, current_user: CurrentUserDependency, service: AuthServiceDependency):
+    return await service.refresh_token(current_user, request.state.token_payload)
+
+
+@router.post("/sign-out", response_model=Message)
+async def sign_out(request: Request, current_user: CurrentUserDependency, service: AuthServiceDependency):
+    await service.sign_out(request.state.token_payload)
+    return Message(detail="Signed out successfully")
 
 
 @router.get("/me", response_model=UserSchema)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+
+from app.core.database import sessionmanager
+from app.core.dependencies import SuperUserDependency
+from app.core.hashing import password_hasher
+from app.core.responses import SerializedRoute
+from app.schemas.health_schema import DatabasePoolStatus
+from app.schemas.health_schema import PasswordHasherStatus
+
+router = APIRouter(prefix="/health", tags=["Health"], route_class=SerializedRoute)
+
+
+@router.get("/password-hasher", response_model=PasswordHasherStatus)
+async def password_hasher_status(current_user: SuperUserDependency):
+    return PasswordHasherStatus(
+        executor=password_hasher.executor_type,
+        workers=password_hasher.max_workers,
+        max_pending=password_hasher.max_pending,
+        in_flight=password_hasher.in_flight,
+        queue_depth=password_hasher.queue_depth,
+        rejected=password_hasher.rejected,
+    )
+
+
+@router.get("/db-pool", response_model=DatabasePoolStatus)
+async def database_pool_status(current_user: SuperUserDependency):
+    return DatabasePoolStatus(**sessionmanager.pool_status())
@@ -1,8 +1,9 @@
 from fastapi import APIRouter
 
+from app.core.responses import SerializedRoute
 from app.schemas.base_schema import Message
 
-router = APIRouter(prefix="/ping", tags=["Ping"])
+router = APIRouter(prefix="/ping", tags=["Ping"], route_class=SerializedRoute)
 
 
 @router.get("", response_model=Message)
@@ -0,0 +1,36 @@
+from typing import List
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.dependencies import SuperUserDependency
+from app.core.profiling import profiler
+from app.core.profiling import render_collapsed
+from app.core.responses import SerializedRoute
+from app.schemas.profiling_schema import ProfiledRoute
+
+router = APIRouter(prefix="/profiling", tags=["Profiling"], route_class=SerializedRoute)
+
+
+@router.get("/", response_model=List[ProfiledRoute])
+async def profiled_routes(current_user: SuperUserDependency):
+    return [
+        ProfiledRoute(
+            route=route,
+            profiles=len(profiles),
+            samples=sum(sum(profile.samples.values()) for profile in profiles),
+            mean_duration_ms=round(sum(profile.duration for profile in profiles) / len(profiles) * 1000, 3),
+        )
+        for route, profiles in profiler.profiles.items()
+    ]
+
+
+@router.get("/collapsed", response_class=PlainTextResponse)
+async def collapsed_stacks(
+    current_user: SuperUserDependency,
+    route: Optional[str] = Query(None, description="Route template, e.g. /v1/auth/sign-in; every route if omitted"),
+    last: int = Query(20, ge=1, description="How many of the most recent profiles per route to aggregate"),
+):
+    return PlainTextResponse(render_collapsed(profiler.aggregate(route, last)))
@@ -0,0 +1,88 @@
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi import Request
+
+from app.core.dependencies import CurrentUserDependency
+from app.core.dependencies import ResumeServiceDependency
+from app.core.exceptions import BadRequestError
+from app.core.pagination import CountMode
+from app.core.pagination import PaginationMode
+from app.core.responses import SerializedRoute
+from app.schemas.base_schema import CursorSearchOptions
+from app.schemas.base_schema import FindBase
+from app.schemas.base_schema import Message
+from app.schemas.base_schema import SearchOptions
+from app.schemas.resume_schema import CreateResume
+from app.schemas.resume_schema import FindResumeResult
+from app.schemas.resume_schema import Resume
+from app.schemas.resume_schema import RESUME_SUMMARY_COLUMNS
+from app.schemas.resume_schema import UpsertResume
+from app.schemas.resume_schema import validate_resume_rows
+
+
+router = APIRouter(prefix="/resume", tags=["resume"], route_class=SerializedRoute)
+
+LIST_QUERY_PARAMS = {"offset", "limit", "pagination", "cursor", "count", "ordering"}
+
+
+@router.get("/", response_model=FindResumeResult)
+async def get_resume_list(
+    request: Request,
+    service: ResumeServiceDependency,
+    offset: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    pagination: PaginationMode = PaginationMode.offset,
+    cursor: Optional[str] = None,
+    count: CountMode = Query(
+        CountMode.none, description="total_count is left out unless asked for: exact runs a count(*) of the filter"
+    ),
+    ordering: Optional[str] = Query(None, description="Comma separated columns, prefixed with - for descending"),
+):
+    filters = {key: value for key, value in request.query_params.items() if key not in LIST_QUERY_PARAMS}
+
+    if cursor or pagination == PaginationMode.cursor:
+        if ordering:
+            raise BadRequestError(detail="Ordering is not supported with cursor pagination")
+        rows, next_cursor = await service.get_page(limit, cursor, filters=filters, columns=RESUME_SUMMARY_COLUMNS)
+        total_count = await service.count(count, filters=filters)
+        return FindResumeResult(
+            founds=validate_resume_rows(rows),
+            search_options=CursorSearchOptions(
+                limit=limit, cursor=cursor, next_cursor=next_cursor, total_count=total_count
+            ),
+        )
+
+    rows = await service.get_list(
+        FindBase(offset=offset, limit=limit), filters=filters, ordering=ordering, columns=RESUME_SUMMARY_COLUMNS
+    )
+    total_count = await service.count(count, filters=filters)
+    return FindResumeResult(
+        founds=validate_resume_rows(rows),
+        search_options=SearchOptions(offset=offset, limit=limit, total_count=total_count),
+    )
+
+
+@router.get("/{resume_id}", response_model=Resume)
+async def get_resume_by_id(resume_id: UUID, service: ResumeServiceDependency):
+    return await service.get_by_id(resume_id)
+
+
+@router.post("/", status_code=201, response_model=Resume)
+async def create_resume(resume: CreateResume, service: ResumeServiceDependency, current_user: CurrentUserDependency):
+    return await service.create(resume, current_user)
+
+
+@router.put("/{resume_id}", response_model=Resume)
+async def update_resume(
+    resume_id: UUID, resume: UpsertResume, service: ResumeServiceDependency, current_user: CurrentUserDependency
+):
+    return await service.patch(id=resume_id, schema=resume, current_user=current_user)
+
+
+@router.delete("/{resume_id}", response_model=Message)
+async def delete_resume(resume_id: UUID, service: ResumeServiceDependency, current_user: CurrentUserDependency):
+    await service.remove_by_id(resume_id, current_user=current_user)
+    return Message(detail="Resume has been deleted successfully")
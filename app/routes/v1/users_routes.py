@@ -1,9 +1,22 @@
+from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter
-
+from fastapi import Query
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.core.bulk import accepts_gzip
+from app.core.bulk import EXPORT_MEDIA_TYPES
+from app.core.bulk import ExportFormat
+from app.core.bulk import iter_records
 from app.core.dependencies import CurrentUserDependency
 from app.core.dependencies import UserServiceDependency
+from app.core.exceptions import BadRequestError
+from app.core.pagination import CountMode
+from app.core.pagination import PaginationMode
+from app.core.responses import SerializedRoute
+from app.schemas.base_schema import CursorSearchOptions
 from app.schemas.base_schema import FindBase
 from app.schemas.base_schema import Message
 from app.schemas.base_schema import SearchOptions
@@ -11,19 +24,96 @@ from app.schemas.user_schema import BaseUserWithPassword
 from app.schemas.user_schema import FindUserResult
 from app.schemas.user_schema import UpsertUser
 from app.schemas.user_schema import User
+from app.schemas.user_schema import USER_COLUMNS
+from app.schemas.user_schema import UserImportResult
+from app.schemas.user_schema import validate_user_rows
+
 
+router = APIRouter(prefix="/user", tags=["user"], route_class=SerializedRoute)
 
-router = APIRouter(prefix="/user", tags=["user"])
+LIST_QUERY_PARAMS = {"offset", "limit", "pagination", "cursor", "count", "ordering"}
+EXPORT_QUERY_PARAMS = {"format", "fields"}
 
 
 @router.get("/", response_model=FindUserResult)
-async def get_user_list(service: UserServiceDependency, offset: int = 0, limit: int = 100):
-    users = await service.get_list(FindBase(offset=offset, limit=limit))
+async def get_user_list(
+    request: Request,
+    service: UserServiceDependency,
+    offset: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    pagination: PaginationMode = PaginationMode.offset,
+    cursor: Optional[str] = None,
+    count: CountMode = Query(
+        CountMode.none, description="total_count is left out unless asked for: exact runs a count(*) of the filter"
+    ),
+    ordering: Optional[str] = Query(None, description="Comma separated columns, prefixed with - for descending"),
+):
+    filters = {key: value for key, value in request.query_params.items() if key not in LIST_QUERY_PARAMS}
+
+    if cursor or pagination == PaginationMode.cursor:
+        if ordering:
+            raise BadRequestError(detail="Ordering is not supported with cursor pagination")
+        rows, next_cursor = await service.get_page(limit, cursor, filters=filters, columns=USER_COLUMNS)
+        total_count = await service.count(count, filters=filters)
+        return FindUserResult(
+            founds=validate_user_rows(rows),
+            search_options=CursorSearchOptions(
+                limit=limit, cursor=cursor, next_cursor=next_cursor, total_count=total_count
+            ),
+        )
+
+    rows = await service.get_list(
+        FindBase(offset=offset, limit=limit), filters=filters, ordering=ordering, columns=USER_COLUMNS
+    )
+    total_count = await service.count(count, filters=filters)
     return FindUserResult(
-        founds=users, search_options=SearchOptions(offset=offset, limit=limit, total_count=len(users))
+        founds=validate_user_rows(rows),
+        search_options=SearchOptions(offset=offset, limit=limit, total_count=total_count),
     )
 
 
+@router.get("/search", response_model=FindUserResult)
+async def search_users(
+    service: UserServiceDependency,
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    users, next_cursor = await service.search(q, limit, cursor)
+    return FindUserResult(
+        founds=users,
+        search_options=CursorSearchOptions(limit=limit, cursor=cursor, next_cursor=next_cursor, total_count=None),
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    request: Request,
+    service: UserServiceDependency,
+    current_user: CurrentUserDependency,
+    format: ExportFormat = ExportFormat.ndjson,
+    fields: Optional[str] = Query(None, description="Comma separated columns, defaults to every public column"),
+):
+    await service.validate_superuser(current_user)
+    filters = {key: value for key, value in request.query_params.items() if key not in EXPORT_QUERY_PARAMS}
+    compress = accepts_gzip(request.headers.get("accept-encoding", ""))
+    chunks = service.export(fields, format, filters=filters, compress=compress)
+
+    # the body depends on Accept-Encoding either way, so shared caches must key on it
+    headers = {"Content-Disposition": f'attachment; filename="users.{format.value}"', "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+
+@router.post("/import", response_model=UserImportResult)
+async def import_users(request: Request, service: UserServiceDependency, current_user: CurrentUserDependency):
+    # before the content type is parsed, so only superusers learn which ones are supported
+    await service.validate_superuser(current_user)
+    records = iter_records(request.stream(), request.headers.get("content-type", ""))
+    return await service.bulk_import(records, current_user)
+
+
 @router.get("/{user_id}", response_model=User)
 async def get_user_by_id(user_id: UUID, service: UserServiceDependency):
     return await service.get_by_id(user_id)
@@ -50,7 +140,7 @@ async def enabled_user(user_id: UUID, service: UserServiceDependency, current_us
 
 @router.delete("/disable/{user_id}", response_model=Message)
 async def disable_user(user_id: UUID, service: UserServiceDependency, current_user: CurrentUserDependency):
-    await service.patch_attr(id=user_id, attr="is_active", value=False, current_user=current_user)
+    await service.disable(id=user_id, current_user=current_user)
     return Message(detail="User has been desabled successfully")
 
 
@@ -40,6 +40,13 @@ class SearchOptions(FindBase):
     total_count: Optional[int]
 
 
+class CursorSearchOptions(BaseModel):
+    limit: int
+    cursor: Optional[str]
+    next_cursor: Optional[str]
+    total_count: Optional[int]
+
+
 class FindResult(BaseModel):
     founds: Optional[List]
     search_options: Optional[SearchOptions]
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+
+class PasswordHasherStatus(BaseModel):
+    executor: str
+    workers: int
+    max_pending: int
+    in_flight: int
+    queue_depth: int
+    rejected: int
+
+
+class DatabasePoolStatus(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class ProfiledRoute(BaseModel):
+    route: str
+    profiles: int
+    samples: int
+    mean_duration_ms: float
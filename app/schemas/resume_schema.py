@@ -0,0 +1,95 @@
+from datetime import date
+from typing import List
+from typing import Optional
+from typing import Union
+from uuid import UUID
+
+from pydantic import BaseModel
+from pydantic import ConfigDict
+from pydantic import TypeAdapter
+
+from app.schemas.base_schema import CursorSearchOptions
+from app.schemas.base_schema import ModelBaseInfo
+from app.schemas.base_schema import SearchOptions
+
+
+class BaseExperience(BaseModel):
+    company: str
+    role: str
+    start_date: date
+    end_date: Optional[date] = None
+    description: Optional[str] = None
+
+
+class BaseEducation(BaseModel):
+    institution: str
+    degree: str
+    field_of_study: Optional[str] = None
+    start_date: date
+    end_date: Optional[date] = None
+
+
+class BaseSkill(BaseModel):
+    name: str
+    level: Optional[str] = None
+
+
+class Experience(BaseExperience, ModelBaseInfo):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Education(BaseEducation, ModelBaseInfo):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Skill(BaseSkill, ModelBaseInfo):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BaseResume(BaseModel):
+    title: str
+    summary: Optional[str] = None
+
+
+class CreateResume(BaseResume):
+    experiences: List[BaseExperience] = []
+    education: List[BaseEducation] = []
+    skills: List[BaseSkill] = []
+
+
+class UpsertResume(BaseModel):
+    """Top level fields are updated when set; a section sent, even empty, replaces the stored one."""
+
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    experiences: Optional[List[BaseExperience]] = None
+    education: Optional[List[BaseEducation]] = None
+    skills: Optional[List[BaseSkill]] = None
+
+
+class Resume(BaseResume, ModelBaseInfo):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: UUID
+    experiences: List[Experience]
+    education: List[Education]
+    skills: List[Skill]
+
+
+class ResumeSummary(ModelBaseInfo):
+    user_id: UUID
+    title: str
+
+
+# list endpoints select exactly these columns and never touch the sections
+RESUME_SUMMARY_COLUMNS = tuple(ResumeSummary.model_fields)
+resume_summaries_adapter = TypeAdapter(List[ResumeSummary])
+
+
+def validate_resume_rows(rows) -> List[ResumeSummary]:
+    return resume_summaries_adapter.validate_python([dict(zip(RESUME_SUMMARY_COLUMNS, row)) for row in rows])
+
+
+class FindResumeResult(BaseModel):
+    founds: List[ResumeSummary]
+    search_options: Union[SearchOptions, CursorSearchOptions]
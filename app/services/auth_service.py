@@ -1,10 +1,21 @@
+import logging
+import time
 from datetime import timedelta
+from typing import Any
+from typing import Dict
 from typing import List
+from typing import Tuple
 
+from fastapi import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.email_filter import email_filter
 from app.core.exceptions import InvalidCredentials
+from app.core.hashing import password_hasher
+from app.core.hashing import sign_in_timer
+from app.core.metrics import auth_failures
 from app.core.security import create_access_token
-from app.core.security import get_password_hash
-from app.core.security import verify_password
+from app.core.sessions import session_registry
 from app.core.settings import settings
 from app.models import User
 from app.repository.user_repository import UserRepository
@@ -13,47 +24,82 @@ from app.schemas.auth_schema import SignIn
 from app.schemas.auth_schema import SignInResponse
 from app.schemas.auth_schema import SignUp
 from app.schemas.user_schema import BaseUserWithPassword
+from app.schemas.user_schema import User as UserSchema
 from app.services.base_service import BaseService
 
 
+logger = logging.getLogger(__name__)
+
+# unknown emails and wrong passwords answer alike, so the response does not tell which accounts exist
+SIGN_IN_FAILED = "Incorrect email or password"
+
+
 class AuthService(BaseService):
     def __init__(self, user_repository: UserRepository) -> SignInResponse:
         self.user_repository = user_repository
         super().__init__(user_repository)
 
     async def sign_in(self, sign_in_info: SignIn):
-        user: List[User] = await self.user_repository.read_by_email(email=sign_in_info.email__eq)
+        started_at = time.perf_counter()
+        user: List[User] = []
+        if await email_filter.might_exist(sign_in_info.email__eq):
+            user = await self.user_repository.read_by_email(email=sign_in_info.email__eq, cached=False)
         if len(user) < 1:
-            raise InvalidCredentials(detail="Incorrect email or user not exist")
+            auth_failures.inc("unknown_email")
+            await sign_in_timer.pad(started_at)
+            raise InvalidCredentials(detail=SIGN_IN_FAILED)
         found_user = user[0]
 
-        if not verify_password(sign_in_info.password, found_user.password):
-            raise InvalidCredentials(detail="Incorrect password")
+        verified = await password_hasher.verify(sign_in_info.password, found_user.password)
+        sign_in_timer.observe(time.perf_counter() - started_at)
+        if not verified:
+            auth_failures.inc("wrong_password")
+            raise InvalidCredentials(detail=SIGN_IN_FAILED)
+        if password_hasher.needs_rehash(found_user.password):
+            await self._upgrade_password(found_user, sign_in_info.password)
 
         delattr(found_user, "password")
 
-        payload = Payload(id=str(found_user.id), email=found_user.email, username=found_user.username)
-        token_lifespan = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token, expiration_datetime = create_access_token(payload.model_dump(), token_lifespan)
+        access_token, expiration_datetime = await self._issue_token(found_user)
         sign_in_result = SignInResponse(access_token=access_token, expiration=expiration_datetime, user_info=found_user)
         return sign_in_result
 
+    async def _upgrade_password(self, user: User, password: str) -> None:
+        # the plain password is only known here, so weak or outdated hashes are replaced on a successful sign-in
+        try:
+            hashed_password = await password_hasher.hash(password)
+            await self.user_repository.replace_password(user.id, user.password, hashed_password)
+        except HTTPException as e:
+            logger.warning("could not upgrade the password hash of user %s: %s", user.id, e.detail)
+        except SQLAlchemyError as e:
+            logger.warning("could not upgrade the password hash of user %s: %s", user.id, e)
+
+    async def _issue_token(self, user) -> Tuple[str, str]:
+        payload = Payload(id=str(user.id), email=user.email, username=user.username)
+        token_lifespan = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        jti = await session_registry.open(user.id, token_lifespan.total_seconds())
+        return create_access_token({**payload.model_dump(), "jti": jti}, token_lifespan)
+
     async def sign_up(self, user_info: SignUp) -> User:
         user = BaseUserWithPassword(**user_info.model_dump(exclude_none=True))
-        user.password = get_password_hash(user_info.password)
+        user.password = await password_hasher.hash(user_info.password)
         created_user = await self.user_repository.create(user)
         delattr(created_user, "password")
         return created_user
 
-    async def refresh_token(self, current_user: User):
-        payload = Payload(id=str(current_user.id), email=current_user.email, username=current_user.username)
-        token_lifespan = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token, expiration_datetime = create_access_token(payload.model_dump(), token_lifespan)
+    async def refresh_token(self, current_user: UserSchema, claims: Dict[str, Any]):
+        # rotation: the refreshed token stops working as soon as its replacement exists
+        access_token, expiration_datetime = await self._issue_token(current_user)
+        await self.sign_out(claims)
         sign_in_result = SignInResponse(
             access_token=access_token, expiration=expiration_datetime, user_info=current_user
         )
         return sign_in_result
 
+    async def sign_out(self, claims: Dict[str, Any]) -> None:
+        if claims.get("jti"):
+            await session_registry.revoke(claims["jti"], claims["exp"])
+
 
 #  payload = Payload(id=str(found_user.id), email=found_user.email, username=found_user.username)
 #         token_lifespan = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
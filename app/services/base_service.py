@@ -1,21 +1,67 @@
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Sequence
 from uuid import UUID
 
 from app.core.exceptions import AuthError
-from app.models import User as UserModel
+from app.core.exceptions import BadRequestError
+from app.core.pagination import CountMode
+from app.core.pagination import decode_cursor
+from app.core.pagination import encode_cursor
+from app.core.tracing import Traced
 from app.repository.base_repository import BaseRepository
 from app.schemas.base_schema import FindBase
+from app.schemas.user_schema import User as UserSchema
 
 
-class BaseService:
+class BaseService(Traced):
+    trace_layer = "service"
+
     def __init__(self, repository: BaseRepository) -> None:
         self._repository = repository
 
-    async def validate_permission(self, id: UUID, current_user: UserModel):
+    async def validate_permission(self, id: UUID, current_user: UserSchema):
         if id != current_user.id:
             raise AuthError(detail="Not enough permissions")
 
-    async def get_list(self, schema: FindBase):
-        return await self._repository.read_by_options(schema)
+    async def validate_superuser(self, current_user: UserSchema):
+        if not current_user.is_superuser:
+            raise AuthError(detail="Not enough permissions")
+
+    async def get_list(
+        self,
+        schema: FindBase,
+        filters: Optional[Dict[str, Any]] = None,
+        ordering: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ):
+        return await self._repository.read_by_options(schema, filters=filters, ordering=ordering, columns=columns)
+
+    async def get_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[Sequence[str]] = None,
+    ):
+        after = None
+        if cursor:
+            try:
+                created_at, id = decode_cursor(cursor)
+                after = (datetime.fromisoformat(created_at), UUID(id))
+            except (TypeError, ValueError):
+                raise BadRequestError(detail="Invalid cursor")
+
+        founds, has_more = await self._repository.read_by_cursor(limit, after, filters=filters, columns=columns)
+        next_cursor = encode_cursor((founds[-1].created_at, founds[-1].id)) if has_more else None
+        return founds, next_cursor
+
+    async def count(self, mode: CountMode, filters: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        if mode == CountMode.none:
+            return None
+        return await self._repository.count(estimated=mode == CountMode.estimated, filters=filters)
 
     async def get_by_id(self, id: UUID):
         return await self._repository.read_by_id(id)
@@ -23,17 +69,17 @@ class BaseService:
     async def add(self, schema):
         return await self._repository.create(schema)
 
-    async def patch(self, id: UUID, schema, current_user: UserModel):
+    async def patch(self, id: UUID, schema, current_user: UserSchema):
         await self.validate_permission(id=id, current_user=current_user)
         return await self._repository.update(id, schema)
 
-    async def patch_attr(self, id: UUID, attr: str, value, current_user: UserModel):
+    async def patch_attr(self, id: UUID, attr: str, value, current_user: UserSchema):
         await self.validate_permission(id=id, current_user=current_user)
         return await self._repository.update_attr(id, attr, value)
 
     async def put_update(self, id: UUID, schema):
         return await self._repository.whole_update(id, schema)
 
-    async def remove_by_id(self, id: UUID, current_user: UserModel):
+    async def remove_by_id(self, id: UUID, current_user: UserSchema):
         await self.validate_permission(id=id, current_user=current_user)
         return await self._repository.delete_by_id(id)
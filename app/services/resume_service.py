@@ -0,0 +1,27 @@
+from uuid import UUID
+
+from app.repository.resume_repository import ResumeRepository
+from app.schemas.resume_schema import CreateResume
+from app.schemas.resume_schema import UpsertResume
+from app.schemas.user_schema import User as UserSchema
+from app.services.base_service import BaseService
+
+
+class ResumeService(BaseService):
+    def __init__(self, resume_repository: ResumeRepository):
+        self.resume_repository = resume_repository
+        super().__init__(resume_repository)
+
+    async def validate_owner(self, id: UUID, current_user: UserSchema):
+        await self.validate_permission(await self.resume_repository.read_owner_id(id), current_user)
+
+    async def create(self, schema: CreateResume, current_user: UserSchema):
+        return await self.resume_repository.create_with_sections(current_user.id, schema)
+
+    async def patch(self, id: UUID, schema: UpsertResume, current_user: UserSchema):
+        await self.validate_owner(id, current_user)
+        return await self.resume_repository.update_with_sections(id, schema)
+
+    async def remove_by_id(self, id: UUID, current_user: UserSchema):
+        await self.validate_owner(id, current_user)
+        return await self.resume_repository.delete_by_id(id)
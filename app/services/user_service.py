@@ -1,16 +1,150 @@
-from app.core.security import get_password_hash
+import re
+from typing import Any
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+
+from app.core.bulk import encode_rows
+from app.core.bulk import ExportFormat
+from app.core.bulk import gzip_chunks
+from app.core.bulk import Record
+from app.core.exceptions import BadRequestError
+from app.core.hashing import password_hasher
+from app.core.pagination import decode_cursor
+from app.core.pagination import encode_cursor
+from app.core.sessions import session_registry
+from app.core.settings import settings
 from app.repository.user_repository import UserRepository
 from app.schemas.user_schema import BaseUserWithPassword
+from app.schemas.user_schema import User as UserSchema
+from app.schemas.user_schema import UserImportError
+from app.schemas.user_schema import UserImportResult
+from app.schemas.user_schema import UserImportRow
 from app.services.base_service import BaseService
 
 
+EXPORT_COLUMNS = tuple(UserSchema.model_fields)
+
+
 class UserService(BaseService):
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
         super().__init__(user_repository)
 
+    async def disable(self, id: UUID, current_user: UserSchema):
+        disabled_user = await self.patch_attr(id, "is_active", False, current_user)
+        await session_registry.revoke_user(id)
+        return disabled_user
+
+    async def remove_by_id(self, id: UUID, current_user: UserSchema):
+        deleted_user = await super().remove_by_id(id, current_user)
+        await session_registry.revoke_user(id)
+        return deleted_user
+
     async def add(self, user_schema: BaseUserWithPassword):
-        user_schema.password = get_password_hash(user_schema.password)
+        user_schema.password = await password_hasher.hash(user_schema.password)
         created_user = await self._repository.create(user_schema)
         delattr(created_user, "password")
         return created_user
+
+    async def search(self, query: str, limit: int, cursor: Optional[str] = None):
+        terms = re.findall(r"[^\W_]+", query.lower())
+        if not terms:
+            raise BadRequestError(detail="Search query must contain letters or digits")
+
+        after = None
+        if cursor:
+            try:
+                rank, id = decode_cursor(cursor)
+                after = (float(rank), UUID(id))
+            except (TypeError, ValueError):
+                raise BadRequestError(detail="Invalid cursor")
+
+        rows, has_more = await self.user_repository.search(terms, limit, after)
+        founds = [user for user, _ in rows]
+        next_cursor = encode_cursor((rows[-1].rank, rows[-1][0].id)) if has_more else None
+        return founds, next_cursor
+
+    def export(
+        self,
+        fields: Optional[str],
+        export_format: ExportFormat,
+        filters: Optional[Dict[str, Any]] = None,
+        compress: bool = False,
+    ) -> AsyncIterator[bytes]:
+        # everything that can fail with a 4xx runs here, before the response starts streaming
+        columns = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(EXPORT_COLUMNS)
+        unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+        if unknown:
+            raise BadRequestError(detail=f"Unknown export fields: {', '.join(unknown)}")
+
+        stmt = self.user_repository.projection_statement(columns, filters)
+        stmt = stmt.order_by(self.user_repository.model.created_at, self.user_repository.model.id)
+        chunks = encode_rows(columns, self.user_repository.stream(stmt, settings.USER_EXPORT_CHUNK_SIZE), export_format)
+        return gzip_chunks(chunks) if compress else chunks
+
+    async def bulk_import(self, records: AsyncIterator[Record], current_user: UserSchema) -> UserImportResult:
+        await self.validate_superuser(current_user)
+
+        result = UserImportResult()
+        seen_emails, seen_usernames = set(), set()
+        batch: List[Tuple[int, UserImportRow]] = []
+
+        async for row_number, record in records:
+            if isinstance(record, str):
+                self._import_error(result, row_number, record)
+                continue
+            try:
+                row = UserImportRow.model_validate(record)
+            except ValidationError as e:
+                error = e.errors()[0]
+                location = ".".join(str(part) for part in error["loc"])
+                self._import_error(result, row_number, f"{location}: {error['msg']}" if location else error["msg"])
+                continue
+
+            if row.email in seen_emails:
+                self._import_error(result, row_number, "Duplicated email in import")
+                continue
+            if row.username in seen_usernames:
+                self._import_error(result, row_number, "Duplicated username in import")
+                continue
+            seen_emails.add(row.email)
+            seen_usernames.add(row.username)
+
+            batch.append((row_number, row))
+            if len(batch) >= settings.USER_IMPORT_BATCH_SIZE:
+                await self._import_batch(batch, result)
+                batch = []
+
+        if batch:
+            await self._import_batch(batch, result)
+        self._cap_errors(result)
+        return result
+
+    async def _import_batch(self, batch: List[Tuple[int, UserImportRow]], result: UserImportResult) -> None:
+        plain_rows = [row for _, row in batch if row.password_hash is None]
+        hashes = iter(await password_hasher.hash_many([row.password for row in plain_rows]))
+        records = [
+            (row_number, row.email, row.username, row.password_hash or next(hashes)) for row_number, row in batch
+        ]
+
+        skipped = await self.user_repository.copy_users(records)
+        for row_number, detail in skipped:
+            self._import_error(result, row_number, detail)
+        result.imported += len(records) - len(skipped)
+
+    def _import_error(self, result: UserImportResult, row_number: int, detail: str) -> None:
+        result.failed += 1
+        result.errors.append(UserImportError(row=row_number, detail=detail))
+        if len(result.errors) >= 2 * settings.USER_IMPORT_MAX_ERRORS:
+            self._cap_errors(result)
+
+    def _cap_errors(self, result: UserImportResult) -> None:
+        # errors of a batch arrive after the validation errors of later rows, so they are sorted before capping
+        result.errors.sort(key=lambda error: error.row)
+        del result.errors[settings.USER_IMPORT_MAX_ERRORS :]
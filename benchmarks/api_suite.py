@@ -0,0 +1,214 @@
+"""Throughput, latency percentiles and queries per request for the main v1 flows, with JSON baselines.
+
+    python -m benchmarks.api_suite --database-url postgresql+asyncpg://... --concurrency 1 8 32 --duration 5 \\
+        --save benchmarks/baselines/main.json
+    python -m benchmarks.api_suite --compare benchmarks/baselines/main.json
+
+The app is built with app.main.init_app and driven in-process through httpx's ASGI transport, so results
+measure the worker and the database, not the network. Users are seeded through tests/factories.py, one per
+concurrent worker, and removed afterwards. --compare prints the change against a saved baseline and exits
+non-zero when a p95 or queries-per-request figure regressed past --threshold.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+
+from httpx import ASGITransport
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from app.core.cache import principal_cache
+from app.core.cache import repository_cache
+from app.core.database import sessionmanager
+from app.core.settings import settings
+from app.main import init_app
+from app.models import User
+from benchmarks.common import print_table
+from benchmarks.common import QueryCounter
+from benchmarks.common import summarize
+from tests.factories import batch_users_by_options
+
+
+async def sign_in(client: AsyncClient, user: dict) -> None:
+    response = await client.post("/v1/auth/sign-in", json=user["credentials"])
+    response.raise_for_status()
+
+
+async def me(client: AsyncClient, user: dict) -> None:
+    (await client.get("/v1/auth/me", headers=user["headers"])).raise_for_status()
+
+
+async def user_list(client: AsyncClient, user: dict) -> None:
+    (await client.get("/v1/user/?limit=100&count=none")).raise_for_status()
+
+
+async def get_by_id(client: AsyncClient, user: dict) -> None:
+    (await client.get(f"/v1/user/{user['id']}")).raise_for_status()
+
+
+async def update(client: AsyncClient, user: dict) -> None:
+    # alternate between two usernames so every PUT is a real change
+    user["flip"] = not user.get("flip", False)
+    username = f"{user['username']}_b" if user["flip"] else user["username"]
+    body = {"email": user["email"], "username": username, "is_active": True, "is_superuser": False}
+    (await client.put(f"/v1/user/{user['id']}", headers=user["headers"], json=body)).raise_for_status()
+
+
+MIX = [(get_by_id, 50), (user_list, 25), (me, 20), (update, 5)]
+
+
+async def mixed(client: AsyncClient, user: dict) -> None:
+    request = random.choices([call for call, _ in MIX], weights=[weight for _, weight in MIX])[0]
+    await request(client, user)
+
+
+SCENARIOS = {
+    "sign_in": sign_in,
+    "me": me,
+    "list": user_list,
+    "get_by_id": get_by_id,
+    "update": update,
+    "mixed": mixed,
+}
+
+
+async def seed(client: AsyncClient, count: int) -> list:
+    users, clean_users = batch_users_by_options(normal_users=count)
+    async with sessionmanager.session() as session:
+        session.add_all(users)
+        await session.commit()
+
+    seeded = []
+    for clean_user in clean_users:
+        credentials = {"email__eq": clean_user.email, "password": clean_user.clean_password}
+        response = await client.post("/v1/auth/sign-in", json=credentials)
+        response.raise_for_status()
+        body = response.json()
+        seeded.append(
+            {
+                "id": body["user_info"]["id"],
+                "email": clean_user.email,
+                "username": clean_user.username,
+                "credentials": credentials,
+                "headers": {"Authorization": f"Bearer {body['access_token']}"},
+            }
+        )
+    return seeded
+
+
+async def drive(client: AsyncClient, call, users: list, concurrency: int, duration: float) -> dict:
+    samples = []
+    engine = sessionmanager._engine.sync_engine
+
+    async def worker(user: dict, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await call(client, user)
+            samples.append(time.perf_counter() - start)
+
+    with QueryCounter(engine) as queries:
+        deadline = time.perf_counter() + duration
+        workers = itertools.islice(itertools.cycle(users), concurrency)
+        await asyncio.gather(*(worker(user, deadline) for user in workers))
+
+    stats = summarize(samples)
+    return {
+        "rps": round(len(samples) / duration, 1),
+        "p50_ms": stats["p50_ms"],
+        "p95_ms": stats["p95_ms"],
+        "p99_ms": stats["p99_ms"],
+        "queries": round(queries.count / max(len(samples), 1), 2),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+def compare(baseline: dict, results: dict, threshold: float) -> bool:
+    rows, regressed = {}, False
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        row = {}
+        for metric in ("rps", "p95_ms", "p99_ms", "queries"):
+            before, after = previous[metric], current[metric]
+            row[metric] = f"{(after - before) / before * 100:+.1f}%" if before else f"{before}->{after}"
+        rows[name] = row
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + threshold / 100):
+            regressed = True
+        if current["queries"] > previous["queries"]:
+            regressed = True
+    print_table(f"change vs baseline {baseline['meta']['revision']} ({baseline['meta']['created_at']})", rows)
+    return regressed
+
+
+async def run(args) -> int:
+    # init_app builds the one engine from settings, so the benchmark database has to be in place before it runs;
+    # replicas are left out because they would point at the configured database, not the benchmark one
+    settings.DATABASE_URL = args.database_url
+    settings.DATABASE_REPLICA_URLS = []
+    app = init_app()
+    async with sessionmanager.connect() as connection:
+        await sessionmanager.create_all(connection)
+
+    results = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+        users = await seed(client, max(args.concurrency))
+        try:
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    principal_cache.clear()
+                    await repository_cache.clear()
+                    results[f"{scenario} c{concurrency}"] = await drive(
+                        client, SCENARIOS[scenario], users, concurrency, args.duration
+                    )
+        finally:
+            async with sessionmanager.session() as session:
+                await session.execute(delete(User).where(User.id.in_([user["id"] for user in users])))
+                await session.commit()
+            await sessionmanager.close()
+
+    print_table(f"v1 api, {args.duration}s per scenario", results)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "duration": args.duration,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nbaseline written to {path}")
+    if args.compare:
+        return 1 if compare(json.loads(Path(args.compare).read_text()), results, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--save", help="write the results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="JSON baseline to diff the results against")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed p95 regression, in percent")
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,114 @@
+import statistics
+import time
+from typing import Dict
+from typing import List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    print(f"\n{title}")
+    if not rows:
+        return
+    columns = list(next(iter(rows.values())).keys())
+    print(f"{'scenario':<28}" + "".join(f"{column:>12}" for column in columns))
+    for name, row in rows.items():
+        print(f"{name:<28}" + "".join(f"{row[column]:>12}" for column in columns))
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def user_rows(count: int, prefix: str, password_hash: str):
+    """Yields plain user rows built from UserFactory, sharing one precomputed hash instead of bcrypt per row."""
+    from tests.factories import UserFactory
+
+    for number in range(count):
+        user = UserFactory.build(username=f"{prefix}_{number}")
+        yield {"email": user.email, "username": user.username, "password": password_hash}
+
+
+async def seed_users(connection, count: int, prefix: str = "bench", chunk_size: int = 10_000) -> None:
+    from sqlalchemy import insert
+
+    from app.core.security import get_password_hash
+    from app.models import User
+
+    password_hash = get_password_hash(f"{prefix}_password")
+    chunk = []
+    for row in user_rows(count, prefix, password_hash):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            await connection.execute(insert(User), chunk)
+            chunk = []
+    if chunk:
+        await connection.execute(insert(User), chunk)
+
+
+async def delete_seeded_users(connection, prefix: str = "bench") -> None:
+    from sqlalchemy import delete
+
+    from app.models import User
+
+    await connection.execute(delete(User).where(User.username.startswith(f"{prefix}_")))
+
+
+async def seed_users_sql(connection, count: int, prefix: str = "bench") -> None:
+    """Seeds `count` users with generate_series, for sizes where building rows in Python would dominate."""
+    from sqlalchemy import text
+
+    from app.core.security import get_password_hash
+
+    await connection.execute(
+        text(
+            "INSERT INTO users (email, username, password) "
+            "SELECT :prefix || '_' || n || '@bench.com', :prefix || '_' || n, :password "
+            "FROM generate_series(1, :count) AS n"
+        ),
+        {"prefix": prefix, "password": get_password_hash(f"{prefix}_password"), "count": count},
+    )
+
+
+class QueryCounter:
+    """Counts the statements an engine sends while attached, as in tests/conftest.py's count_queries."""
+
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.count = 0
+
+    def record(self, *_) -> None:
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+
+        event.listen(self.engine, "before_cursor_execute", self.record)
+        return self
+
+    def __exit__(self, *_):
+        from sqlalchemy import event
+
+        event.remove(self.engine, "before_cursor_execute", self.record)
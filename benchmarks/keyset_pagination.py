@@ -0,0 +1,84 @@
+"""Deep-page latency of offset vs cursor pagination on GET /v1/user/ as the users table grows.
+
+    python -m benchmarks.keyset_pagination --database-url postgresql+asyncpg://... --sizes 10000 100000 1000000
+
+Rows are inserted with a `bench_` username prefix into the given database and removed afterwards.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.core.database import sessionmanager
+from app.core.settings import settings
+from app.repository.user_repository import UserRepository
+from app.schemas.base_schema import FindBase
+from benchmarks.common import delete_seeded_users
+from benchmarks.common import print_table
+from benchmarks.common import seed_users
+from benchmarks.common import summarize
+
+
+async def time_calls(call, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run(database_url: str, sizes: list, page_size: int, repeat: int) -> None:
+    sessionmanager.init(database_url)
+    async with sessionmanager.connect() as connection:
+        await sessionmanager.create_all(connection)
+        await delete_seeded_users(connection)
+
+    repository = UserRepository(session_factory=sessionmanager.session_factory(), cache=None)
+    results = {}
+    seeded = 0
+    try:
+        for size in sorted(sizes):
+            async with sessionmanager.connect() as connection:
+                await seed_users(connection, size - seeded, prefix=f"bench_{seeded}")
+                await connection.execute(text("ANALYZE users"))
+            seeded = size
+
+            deep_offset = max(size - page_size, 0)
+            async with sessionmanager.session() as session:
+                row = (
+                    await session.execute(
+                        text("SELECT created_at, id FROM users ORDER BY created_at, id OFFSET :offset LIMIT 1"),
+                        {"offset": deep_offset},
+                    )
+                ).one()
+
+            results[f"offset {size}"] = summarize(
+                await time_calls(
+                    lambda: repository.read_by_options(FindBase(offset=deep_offset, limit=page_size)), repeat
+                )
+            )
+            results[f"cursor {size}"] = summarize(
+                await time_calls(lambda: repository.read_by_cursor(page_size, (row.created_at, row.id)), repeat)
+            )
+            results[f"count exact {size}"] = summarize(await time_calls(lambda: repository.count(), repeat))
+            results[f"count estimated {size}"] = summarize(
+                await time_calls(lambda: repository.count(estimated=True), repeat)
+            )
+    finally:
+        async with sessionmanager.connect() as connection:
+            await delete_seeded_users(connection)
+        await sessionmanager.close()
+
+    print_table(f"deep page ({page_size} rows) latency by table size", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.sizes, args.page_size, args.repeat))
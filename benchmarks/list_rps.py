@@ -0,0 +1,87 @@
+"""Requests per second on GET /v1/user/?limit=100: FastAPI's default response path vs SerializedRoute.
+
+    python -m benchmarks.list_rps --database-url postgresql+asyncpg://... --concurrency 8 --duration 10
+
+Both apps run in-process behind httpx's ASGI transport, so the numbers measure the worker's own cost per
+request. The baseline rebuilds every route as a plain APIRoute with JSONResponse, as the api shipped before.
+Rows are inserted with a `bench_` username prefix and removed afterwards.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from httpx import ASGITransport
+from httpx import AsyncClient
+
+from app.core.database import sessionmanager
+from app.core.settings import settings
+from app.main import app
+from benchmarks.common import delete_seeded_users
+from benchmarks.common import print_table
+from benchmarks.common import seed_users_sql
+from benchmarks.common import summarize
+
+
+def baseline_app() -> FastAPI:
+    baseline = FastAPI()
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            baseline.router.add_api_route(
+                route.path,
+                route.endpoint,
+                response_model=route.response_model,
+                status_code=route.status_code,
+                methods=route.methods,
+            )
+    return baseline
+
+
+async def drive(target: FastAPI, path: str, concurrency: int, duration: float):
+    samples = []
+
+    async def worker(client: AsyncClient, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            samples.append(time.perf_counter() - start)
+
+    async with AsyncClient(transport=ASGITransport(app=target), base_url="http://bench") as client:
+        await client.get(path)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(client, deadline) for _ in range(concurrency)))
+
+    return {"rps": round(len(samples) / duration, 1), **summarize(samples)}
+
+
+async def run(database_url: str, users: int, limit: int, concurrency: int, duration: float) -> None:
+    sessionmanager.init(database_url)
+    async with sessionmanager.connect() as connection:
+        await sessionmanager.create_all(connection)
+        await delete_seeded_users(connection)
+        await seed_users_sql(connection, users)
+
+    path = f"/v1/user/?limit={limit}&count=none"
+    results = {}
+    try:
+        results["before (APIRoute)"] = await drive(baseline_app(), path, concurrency, duration)
+        results["after (SerializedRoute)"] = await drive(app, path, concurrency, duration)
+    finally:
+        async with sessionmanager.connect() as connection:
+            await delete_seeded_users(connection)
+        await sessionmanager.close()
+
+    print_table(f"GET {path} at concurrency {concurrency}", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.users, args.limit, args.concurrency, args.duration))
@@ -0,0 +1,101 @@
+"""Hot path cost of the metrics registry: single operations and the ASGI middleware around a trivial endpoint.
+
+    python -m benchmarks.metrics_overhead --iterations 200000
+
+The budget is 10 microseconds per request; the middleware row is the difference between the same app served with
+and without MetricsMiddleware, so it includes the closure wrapping `send` and the histogram observation.
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsMiddleware
+from app.core.metrics import MetricsRegistry
+from benchmarks.common import print_table
+
+BUDGET_US = 10.0
+
+
+def per_op(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def serve(app: FastAPI, requests: int) -> float:
+    # drives the ASGI app directly so the socket and http client stay out of the measurement
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/1",
+        "raw_path": b"/items/1",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "server": ("test", 80),
+        "client": ("test", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def run(iterations: int, requests: int, repeat: int) -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total", "Bench", ("reason",))
+    histogram = registry.histogram("bench_seconds", "Bench", ("method", "route", "status"))
+    ops = {
+        "counter.inc": lambda: counter.inc("invalid_token"),
+        "histogram.observe": lambda: histogram.observe(0.0123, "GET", "/items/{item_id}", "200"),
+        "perf_counter x2": lambda: (time.perf_counter(), time.perf_counter()),
+    }
+    results = {
+        name: {"us_per_op": round(min(per_op(op, iterations) for _ in range(repeat)), 3)} for name, op in ops.items()
+    }
+
+    plain, instrumented = build_app(False), build_app(True)
+    baseline = min([await serve(plain, requests) for _ in range(repeat)])
+    with_metrics = min([await serve(instrumented, requests) for _ in range(repeat)])
+    results["request without metrics"] = {"us_per_op": round(baseline, 3)}
+    results["request with metrics"] = {"us_per_op": round(with_metrics, 3)}
+    results["middleware overhead"] = {"us_per_op": round(with_metrics - baseline, 3)}
+
+    print_table("metrics hot path (best of repeats, microseconds)", results)
+    verdict = "within" if with_metrics - baseline < BUDGET_US else "OVER"
+    print(f"\nmiddleware overhead is {verdict} the {BUDGET_US}us budget")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.requests, args.repeat))
@@ -0,0 +1,67 @@
+"""p99 latency of /v1/ping while the worker is busy with concurrent sign-ins.
+
+Start the api first (`task run` or `uvicorn app.main:app`), then:
+
+    python -m benchmarks.ping_under_sign_in --base-url http://localhost:8000 --concurrency 16 --duration 10
+
+A throwaway user is created through /v1/auth/sign-up, so the target database must be writable.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from benchmarks.common import print_table
+from benchmarks.common import summarize
+
+
+async def sign_in_loop(client: httpx.AsyncClient, credentials: dict, deadline: float, statuses: list) -> None:
+    while time.perf_counter() < deadline:
+        response = await client.post("/v1/auth/sign-in", json=credentials)
+        statuses.append(response.status_code)
+
+
+async def ping_loop(client: httpx.AsyncClient, deadline: float, interval: float) -> list:
+    samples = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/v1/ping")
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def run(base_url: str, concurrency: int, duration: float, interval: float) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    user = {"email": f"bench_{suffix}@test.com", "username": f"bench_{suffix}", "password": "bench_password"}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await client.post("/v1/auth/sign-up", json=user)
+        credentials = {"email__eq": user["email"], "password": user["password"]}
+
+        idle_deadline = time.perf_counter() + min(duration, 3)
+        idle = await ping_loop(client, idle_deadline, interval)
+
+        statuses: list = []
+        deadline = time.perf_counter() + duration
+        loaded, *_ = await asyncio.gather(
+            ping_loop(client, deadline, interval),
+            *[sign_in_loop(client, credentials, deadline, statuses) for _ in range(concurrency)],
+        )
+
+    print_table(
+        "GET /v1/ping latency", {"idle": summarize(idle), f"{concurrency} concurrent sign-ins": summarize(loaded)}
+    )
+    print(f"\nsign-ins: {len(statuses)} total, {statuses.count(200)} ok, {statuses.count(503)} rejected with 503")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.duration, args.interval))
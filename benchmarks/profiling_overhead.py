@@ -0,0 +1,55 @@
+"""Per-request cost of the profiling middleware when installed but idle, and while profiling.
+
+    python -m benchmarks.profiling_overhead --requests 5000
+
+- off:          PROFILING_ENABLED=false, the middleware is not installed
+- idle:         installed with a token configured, the request carries no token and is not sampled
+- profiled:     every request is profiled at PROFILING_INTERVAL_MS
+"""
+import argparse
+import asyncio
+
+from fastapi import FastAPI
+
+from app.core.profiling import ProfilingMiddleware
+from app.core.profiling import SamplingProfiler
+from app.core.settings import settings
+from benchmarks.common import print_table
+from benchmarks.metrics_overhead import serve
+
+
+def build_app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    if options:
+        app.add_middleware(ProfilingMiddleware, **options)
+    return app
+
+
+async def run(requests: int, repeat: int) -> None:
+    profiler = SamplingProfiler(interval=settings.PROFILING_INTERVAL_MS / 1000, keep=settings.PROFILING_KEEP)
+    apps = {
+        "off": build_app(),
+        "idle": build_app(profiler=profiler, every=0, header="X-Profile-Token", token="secret"),
+        "profiled": build_app(profiler=profiler, every=1),
+    }
+    results = {}
+    for name, app in apps.items():
+        results[name] = {"us_per_request": round(min([await serve(app, requests) for _ in range(repeat)]), 3)}
+
+    baseline = results["off"]["us_per_request"]
+    for row in results.values():
+        row["overhead_us"] = round(row["us_per_request"] - baseline, 3)
+    print_table("profiling cost per request (best of repeats, microseconds)", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.repeat))
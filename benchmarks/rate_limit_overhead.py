@@ -0,0 +1,82 @@
+"""Per-request cost of the sign-in rate limit.
+
+    python -m benchmarks.rate_limit_overhead --iterations 20000
+    python -m benchmarks.rate_limit_overhead --redis-url redis://localhost:6379/0
+
+- local, allowed:       AuthRateLimit.check with in-process buckets, ip and email both under the limit
+- local, rejected:      the same once the email bucket is empty, including building the 429
+- redis, allowed:       the Lua script against --redis-url, or fakeredis when none is given (not representative of
+                        a network round trip, it only shows the client-side cost)
+- bcrypt verify:        one PasswordHasher.verify, the work a rejected request no longer does
+"""
+import argparse
+import asyncio
+import time
+
+import bcrypt
+from fakeredis.aioredis import FakeRedis
+from redis.asyncio import Redis
+from starlette.requests import Request
+
+from app.core.exceptions import TooManyRequestsError
+from app.core.hashing import PasswordHasher
+from app.core.rate_limit import AuthRateLimit
+from app.core.rate_limit import LocalRateLimiter
+from app.core.rate_limit import Rate
+from app.core.rate_limit import RedisRateLimiter
+from benchmarks.common import print_table
+
+
+async def per_check(rate_limit: AuthRateLimit, emails, iterations: int) -> float:
+    request = Request({"type": "http", "headers": [], "client": ("10.0.0.1", 1234)})
+    start = time.perf_counter()
+    for i in range(iterations):
+        try:
+            await rate_limit.check(request, "sign-in", emails[i % len(emails)])
+        except TooManyRequestsError:
+            pass
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def per_verify(iterations: int) -> float:
+    hasher = PasswordHasher(max_workers=1)
+    hashed = bcrypt.hashpw(b"password", bcrypt.gensalt()).decode("utf-8")
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await hasher.verify("password", hashed)
+    hasher.shutdown()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(iterations: int, repeat: int, redis_url: str) -> None:
+    unlimited = Rate(10**9, 1)
+    allowed = [f"user{i}@test.com" for i in range(1000)]
+    client = Redis.from_url(redis_url) if redis_url else FakeRedis()
+
+    def local() -> AuthRateLimit:
+        return AuthRateLimit(LocalRateLimiter(), per_ip=unlimited, per_email=unlimited)
+
+    limited = AuthRateLimit(LocalRateLimiter(), per_ip=unlimited, per_email=Rate(1, 3600))
+    await limited.check(Request({"type": "http", "headers": [], "client": ("10.0.0.1", 1)}), "sign-in", "x@test.com")
+    redis = AuthRateLimit(RedisRateLimiter(client, prefix="bench:ratelimit:"), per_ip=unlimited, per_email=unlimited)
+
+    results = {
+        "local, allowed": min([await per_check(local(), allowed, iterations) for _ in range(repeat)]),
+        "local, rejected": min([await per_check(limited, ["x@test.com"], iterations) for _ in range(repeat)]),
+        "redis, allowed": min([await per_check(redis, allowed, iterations // 10) for _ in range(repeat)]),
+        "bcrypt verify": await per_verify(5),
+    }
+    await redis.clear()
+    print_table(
+        "sign-in rate limit (best of repeats, microseconds)",
+        {name: {"us_per_call": round(value, 3)} for name, value in results.items()},
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--redis-url", default="")
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.repeat, args.redis_url))
@@ -0,0 +1,92 @@
+"""Per-row cost of list reads: ORM hydration + per-object validation vs column projection + one TypeAdapter pass.
+
+    python -m benchmarks.row_mapping --database-url postgresql+asyncpg://... --sizes 100 1000 10000
+
+Each scenario reads a page of users and serializes a FindUserResult to JSON; timings are microseconds per row.
+Rows are inserted with a `bench_` username prefix and removed afterwards.
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.database import sessionmanager
+from app.core.settings import settings
+from app.repository.user_repository import UserRepository
+from app.schemas.base_schema import FindBase
+from app.schemas.base_schema import SearchOptions
+from app.schemas.user_schema import FindUserResult
+from app.schemas.user_schema import USER_COLUMNS
+from app.schemas.user_schema import validate_user_rows
+from benchmarks.common import delete_seeded_users
+from benchmarks.common import print_table
+from benchmarks.common import seed_users_sql
+
+
+async def orm_page(repository: UserRepository, size: int):
+    users = await repository.read_by_options(FindBase(offset=0, limit=size))
+    return users, lambda: FindUserResult(
+        founds=users, search_options=SearchOptions(offset=0, limit=size, total_count=None)
+    )
+
+
+async def projected_page(repository: UserRepository, size: int):
+    rows = await repository.read_by_options(FindBase(offset=0, limit=size), columns=USER_COLUMNS)
+    return rows, lambda: FindUserResult(
+        founds=validate_user_rows(rows),
+        search_options=SearchOptions(offset=0, limit=size, total_count=None),
+    )
+
+
+async def measure(read_page, repository: UserRepository, size: int, repeat: int):
+    fetch, validate, serialize = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, build = await read_page(repository, size)
+        fetched = time.perf_counter()
+        result = build()
+        validated = time.perf_counter()
+        result.model_dump_json()
+        serialized = time.perf_counter()
+        fetch.append(fetched - start)
+        validate.append(validated - fetched)
+        serialize.append(serialized - validated)
+
+    def per_row(samples):
+        return round(min(samples) / size * 1e6, 2)
+
+    return {
+        "fetch_us": per_row(fetch),
+        "validate_us": per_row(validate),
+        "dump_us": per_row(serialize),
+        "total_us": round(per_row(fetch) + per_row(validate) + per_row(serialize), 2),
+    }
+
+
+async def run(database_url: str, sizes: list, repeat: int) -> None:
+    sessionmanager.init(database_url)
+    async with sessionmanager.connect() as connection:
+        await sessionmanager.create_all(connection)
+        await delete_seeded_users(connection)
+        await seed_users_sql(connection, max(sizes))
+
+    repository = UserRepository(session_factory=sessionmanager.session_factory(), cache=None)
+    results = {}
+    try:
+        for size in sorted(sizes):
+            results[f"orm {size}"] = await measure(orm_page, repository, size, repeat)
+            results[f"projection {size}"] = await measure(projected_page, repository, size, repeat)
+    finally:
+        async with sessionmanager.connect() as connection:
+            await delete_seeded_users(connection)
+        await sessionmanager.close()
+
+    print_table("list read cost per row (best of repeats, microseconds)", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.sizes, args.repeat))
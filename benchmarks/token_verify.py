@@ -0,0 +1,124 @@
+"""Per-request cost of authenticating a bearer token.
+
+    python -m benchmarks.token_verify --iterations 20000
+
+- python-jose decode:     the previous decote_jwt, jose.jwt.decode plus the manual exp check
+- verifier, cold:         TokenVerifier.decode with the claims cache cleared before every call
+- verifier, cached:       the same token again, served from the claims cache
+- EdDSA / RS256:          signing and cold verification with asymmetric keys, as JWKS consumers verify
+- dependency chain:       JWTBearer + get_current_user as FastAPI runs them, principal cache warm
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from datetime import datetime
+from datetime import timedelta
+from uuid import uuid4
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+from starlette.requests import Request
+
+from app.core.cache import principal_cache
+from app.core.dependencies import get_current_user
+from app.core.security import create_access_token
+from app.core.security import JWTBearer
+from app.core.security import token_verifier
+from app.core.settings import settings
+from app.core.tokens import build_verifier
+from app.core.tokens import TokenVerifier
+from app.schemas.user_schema import User
+from benchmarks.common import print_table
+
+
+def jose_decode(token: str):
+    decoded = jwt.decode(token, settings.SECRET_KEY, algorithms=settings.ALGORITHM, options={"verify_exp": False})
+    return decoded if decoded["exp"] >= int(round(datetime.now().timestamp())) else None
+
+
+def cold_decode(verifier: TokenVerifier, token: str):
+    verifier.clear()
+    return verifier.decode(token)
+
+
+def asymmetric_verifier(algorithm: str, private_key, directory: str) -> TokenVerifier:
+    path = f"{directory}/{algorithm}.pem"
+    with open(path, "wb") as file:
+        file.write(
+            private_key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+        )
+    return build_verifier(algorithm, algorithm.lower(), private_key_path=path)
+
+
+def per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def per_request(token: str, iterations: int) -> float:
+    bearer = JWTBearer()
+    headers = [(b"authorization", f"Bearer {token}".encode("latin-1"))]
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        request = Request({"type": "http", "headers": headers})
+        credentials = await bearer(request)
+        await get_current_user(request, credentials, service=None)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def run(iterations: int, repeat: int) -> None:
+    user_id = uuid4()
+    token, _ = create_access_token(
+        {"id": str(user_id), "email": "bench@test.com", "username": "bench"}, timedelta(minutes=30)
+    )
+    principal_cache.set(
+        user_id,
+        User(
+            id=user_id,
+            email="bench@test.com",
+            username="bench",
+            is_active=True,
+            is_superuser=False,
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+        ),
+    )
+    calls = {
+        "python-jose decode": lambda: jose_decode(token),
+        "verifier, cold": lambda: cold_decode(token_verifier, token),
+        "verifier, cached": lambda: token_verifier.decode(token),
+    }
+    claims = {"exp": int(time.time()) + 1800, "id": str(user_id), "email": "bench@test.com", "username": "bench"}
+    with tempfile.TemporaryDirectory() as directory:
+        for algorithm, private_key in (
+            ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+            ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        ):
+            verifier = asymmetric_verifier(algorithm, private_key, directory)
+            signed = verifier.encode(claims)
+            calls[f"{algorithm}, sign"] = lambda verifier=verifier: verifier.encode(claims)
+            calls[f"{algorithm}, cold"] = lambda verifier=verifier, signed=signed: cold_decode(verifier, signed)
+    results = {
+        name: {"us_per_call": round(min(per_call(func, iterations) for _ in range(repeat)), 3)}
+        for name, func in calls.items()
+    }
+    results["dependency chain"] = {
+        "us_per_call": round(min([await per_request(token, iterations) for _ in range(repeat)]), 3)
+    }
+    print_table("bearer token authentication (best of repeats, microseconds)", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.repeat))
@@ -0,0 +1,93 @@
+"""Per-request cost of tracing with sampling off and on, on an app shaped like ours: route -> service -> repository.
+
+    python -m benchmarks.tracing_overhead --requests 5000
+
+No database is involved, so the numbers are the tracing overhead alone. Spans go through the same batch processor
+as in production into an exporter that discards them.
+
+- off:                 no tracer configured, every traced call is a pass-through
+- head ratio=0:        TRACING_ALWAYS_SAMPLE_ERRORS=false, unsampled spans are never recorded
+- tail ratio=0:        every span is recorded and buffered until the trace ends, then dropped unless it failed
+- ratio=1:             every trace is exported
+"""
+import argparse
+import asyncio
+
+from fastapi import FastAPI
+from opentelemetry.sdk.trace.export import SpanExporter
+from opentelemetry.sdk.trace.export import SpanExportResult
+
+from app.core.responses import SerializedRoute
+from app.core.settings import settings
+from app.core.tracing import configure_tracing
+from app.core.tracing import shutdown_tracing
+from app.core.tracing import Traced
+from app.core.tracing import TracingMiddleware
+from benchmarks.common import print_table
+from benchmarks.metrics_overhead import serve
+
+
+class DiscardExporter(SpanExporter):
+    def export(self, spans):
+        return SpanExportResult.SUCCESS
+
+
+class ItemRepository(Traced):
+    trace_layer = "repository"
+
+    async def read_by_id(self, id: int):
+        return {"id": id}
+
+
+class ItemService(Traced):
+    trace_layer = "service"
+
+    def __init__(self) -> None:
+        self.repository = ItemRepository()
+
+    async def get_by_id(self, id: int):
+        return await self.repository.read_by_id(id)
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.router.route_class = SerializedRoute
+    service = ItemService()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return await service.get_by_id(item_id)
+
+    app.add_middleware(TracingMiddleware)
+    return app
+
+
+async def run(requests: int, repeat: int) -> None:
+    app = build_app()
+    scenarios = {
+        "off": None,
+        "head ratio=0": (0.0, False),
+        "tail ratio=0": (0.0, True),
+        "ratio=1": (1.0, True),
+    }
+    results = {}
+    for name, sampling in scenarios.items():
+        shutdown_tracing()
+        if sampling is not None:
+            settings.TRACING_SAMPLE_RATIO, settings.TRACING_ALWAYS_SAMPLE_ERRORS = sampling
+            configure_tracing(DiscardExporter())
+        results[name] = {"us_per_request": round(min([await serve(app, requests) for _ in range(repeat)]), 3)}
+    shutdown_tracing()
+
+    baseline = results["off"]["us_per_request"]
+    for row in results.values():
+        row["overhead_us"] = round(row["us_per_request"] - baseline, 3)
+    print_table("tracing cost per request (best of repeats, microseconds)", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.repeat))
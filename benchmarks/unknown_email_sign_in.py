@@ -0,0 +1,91 @@
+"""Latency and CPU of failed sign-ins, for an existing user and for unknown emails.
+
+    python -m benchmarks.unknown_email_sign_in --requests 40 --concurrency 4
+
+Runs AuthService.sign_in in process against an in-memory user table, so the database is out of the picture:
+
+- known email:            wrong password for an existing user, one bcrypt verify
+- unknown, dummy verify:  an unknown email verified against a dummy hash every time, the usual fix
+- unknown, padded:        the email filter rejects it and SignInTimer sleeps to the sign-in average
+
+The latency columns should match across the three rows while cpu_ms drops to near zero on the padded path.
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.core.email_filter import EmailFilter
+from app.core.hashing import password_hasher
+from app.core.hashing import sign_in_timer
+from app.core.security import get_password_hash
+from app.schemas.auth_schema import SignIn
+from app.services import auth_service
+from app.services.auth_service import AuthService
+from benchmarks.common import print_table
+from benchmarks.common import summarize
+
+
+class MemoryUsers:
+    def __init__(self, users) -> None:
+        self.users = {user.email: user for user in users}
+
+    async def read_by_email(self, email: str):
+        user = self.users.get(email)
+        return [SimpleNamespace(**vars(user))] if user is not None else []
+
+
+async def dummy_verify_sign_in(service: AuthService, hashed: str, sign_in_info: SignIn) -> None:
+    if not await service.user_repository.read_by_email(sign_in_info.email__eq):
+        await password_hasher.verify(sign_in_info.password, hashed)
+
+
+async def measure(call, emails, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(email: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(SignIn(email__eq=email, password="wrong_password"))
+            except Exception:
+                pass
+            samples.append(time.perf_counter() - start)
+
+    cpu_start = time.process_time()
+    await asyncio.gather(*(one(emails[i % len(emails)]) for i in range(requests)))
+    return {**summarize(samples), "cpu_ms": round((time.process_time() - cpu_start) / requests * 1000, 3)}
+
+
+async def run(requests: int, concurrency: int) -> None:
+    hashed = get_password_hash("password")
+    user = SimpleNamespace(id="1", email="bench@test.com", username="bench", password=hashed)
+    service = AuthService.__new__(AuthService)
+    service.user_repository = MemoryUsers([user])
+
+    email_filter = EmailFilter(capacity=1000, error_rate=0.01, single_process=True)
+
+    async def partitions():
+        yield [(user.email,)]
+
+    await email_filter.build(partitions())
+    auth_service.email_filter = email_filter
+
+    unknown = [f"nobody{i}@test.com" for i in range(requests)]
+    results = {"known email": await measure(service.sign_in, [user.email], requests, concurrency)}
+    results["unknown, dummy verify"] = await measure(
+        lambda sign_in_info: dummy_verify_sign_in(service, hashed, sign_in_info), unknown, requests, concurrency
+    )
+    results["unknown, padded"] = await measure(service.sign_in, unknown, requests, concurrency)
+    print_table("failed sign-ins", results)
+    print(f"\nsign-in estimate: {sign_in_timer.estimate * 1000:.1f} ms")
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
@@ -0,0 +1,88 @@
+"""Resident memory while exporting users: streamed GET /v1/user/export vs loading every row at once.
+
+    python -m benchmarks.user_export --database-url postgresql+asyncpg://... --users 1000000
+
+RSS is sampled every --sample-every exported rows; a streamed export should stay flat as rows go by.
+Rows are inserted with a `bench_` username prefix and removed afterwards.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import select
+
+from app.core.bulk import ExportFormat
+from app.core.database import sessionmanager
+from app.core.settings import settings
+from app.models import User
+from app.repository.user_repository import UserRepository
+from app.services.user_service import UserService
+from benchmarks.common import delete_seeded_users
+from benchmarks.common import print_table
+from benchmarks.common import seed_users_sql
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return round(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+
+async def streamed(service: UserService, export_format: ExportFormat, compress: bool, sample_every: int):
+    samples, exported, size = [rss_mb()], 0, 0
+    start = time.perf_counter()
+    async for chunk in service.export(None, export_format, compress=compress):
+        size += len(chunk)
+        exported += settings.USER_EXPORT_CHUNK_SIZE
+        if exported % sample_every == 0:
+            samples.append(rss_mb())
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 2),
+        "mb_out": round(size / 2**20, 1),
+        "rss_start": samples[0],
+        "rss_max": max(samples),
+        "rss_end": samples[-1],
+    }
+
+
+async def materialized(repository: UserRepository):
+    start_rss = rss_mb()
+    start = time.perf_counter()
+    async with repository.session_factory() as session:
+        rows = (await session.execute(select(User))).scalars().all()
+        end_rss = rss_mb()
+    elapsed = time.perf_counter() - start
+    del rows
+    return {"seconds": round(elapsed, 2), "mb_out": 0.0, "rss_start": start_rss, "rss_max": end_rss, "rss_end": end_rss}
+
+
+async def run(database_url: str, users: int, sample_every: int) -> None:
+    sessionmanager.init(database_url)
+    async with sessionmanager.connect() as connection:
+        await sessionmanager.create_all(connection)
+        await delete_seeded_users(connection)
+        await seed_users_sql(connection, users)
+
+    repository = UserRepository(session_factory=sessionmanager.session_factory(), cache=None)
+    service = UserService(repository)
+    results = {}
+    try:
+        results["stream ndjson"] = await streamed(service, ExportFormat.ndjson, False, sample_every)
+        results["stream csv + gzip"] = await streamed(service, ExportFormat.csv, True, sample_every)
+        results["select().all()"] = await materialized(repository)
+    finally:
+        async with sessionmanager.connect() as connection:
+            await delete_seeded_users(connection)
+        await sessionmanager.close()
+
+    print_table(f"export of {users} users (RSS in MB)", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--sample-every", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.users, args.sample_every))
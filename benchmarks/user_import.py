@@ -0,0 +1,81 @@
+"""Throughput of the bulk user import (COPY into a staging table) vs one POST /v1/user/ per row.
+
+    python -m benchmarks.user_import --database-url postgresql+asyncpg://... --users 100000 --baseline 1000
+
+Rows carry a precomputed bcrypt `password_hash`; pass --plain to send plaintext passwords and include hashing.
+Rows use a `bench_` username prefix and are removed afterwards.
+"""
+import argparse
+import asyncio
+import time
+
+import orjson
+
+from app.core.bulk import iter_ndjson_records
+from app.core.database import sessionmanager
+from app.core.security import get_password_hash
+from app.core.settings import settings
+from app.repository.user_repository import UserRepository
+from app.schemas.user_schema import BaseUserWithPassword
+from app.schemas.user_schema import User
+from app.services.user_service import UserService
+from benchmarks.common import delete_seeded_users
+from benchmarks.common import print_table
+from benchmarks.common import user_rows
+
+
+async def ndjson_chunks(users: int, prefix: str, plain: bool, chunk_rows: int = 1000):
+    # rows are built inline rather than through UserFactory so generating them does not dominate the timing
+    password = {"password": "bench_password"} if plain else {"password_hash": get_password_hash("bench_password")}
+    chunk = []
+    for number in range(users):
+        row = {"email": f"{prefix}_{number}@bench.com", "username": f"{prefix}_{number}", **password}
+        chunk.append(orjson.dumps(row))
+        if len(chunk) == chunk_rows:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk)
+
+
+def throughput(rows: int, elapsed: float) -> dict:
+    return {"rows": rows, "seconds": round(elapsed, 2), "rows_per_s": round(rows / elapsed)}
+
+
+async def run(database_url: str, users: int, baseline: int, plain: bool) -> None:
+    sessionmanager.init(database_url)
+    async with sessionmanager.connect() as connection:
+        await sessionmanager.create_all(connection)
+        await delete_seeded_users(connection)
+
+    service = UserService(UserRepository(session_factory=sessionmanager.session_factory(), cache=None))
+    admin = User.model_construct(is_superuser=True)
+    results = {}
+    try:
+        start = time.perf_counter()
+        for row in user_rows(baseline, "bench_single", "unused"):
+            row["password"] = "bench_password"
+            await service.add(BaseUserWithPassword(**row))
+        elapsed = time.perf_counter() - start
+        results[f"POST per row x{baseline}"] = throughput(baseline, elapsed)
+
+        start = time.perf_counter()
+        report = await service.bulk_import(iter_ndjson_records(ndjson_chunks(users, "bench_bulk", plain)), admin)
+        elapsed = time.perf_counter() - start
+        results[f"bulk import x{users}"] = throughput(report.imported, elapsed)
+    finally:
+        async with sessionmanager.connect() as connection:
+            await delete_seeded_users(connection)
+        await sessionmanager.close()
+
+    print_table(f"user import ({'plaintext' if plain else 'pre-hashed'} passwords)", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--baseline", type=int, default=200)
+    parser.add_argument("--plain", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.users, args.baseline, args.plain))
@@ -0,0 +1,83 @@
+"""Query plans and latency of user lookups: LIKE '%term%' scans vs the full text search index.
+
+    python -m benchmarks.user_search --database-url postgresql+asyncpg://... --users 1000000 --term user_4242
+
+Rows are seeded through tests/factories.py with a `bench_` username prefix and removed afterwards.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.core.database import sessionmanager
+from app.core.settings import settings
+from app.models import User
+from app.repository.user_repository import UserRepository
+from benchmarks.common import delete_seeded_users
+from benchmarks.common import print_table
+from benchmarks.common import seed_users
+from benchmarks.common import summarize
+
+
+def render(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def measure(connection, sql: str, repeat: int):
+    plan = (await connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))).scalars().all()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await connection.execute(text(sql))
+        samples.append(time.perf_counter() - start)
+    return plan, summarize(samples)
+
+
+async def run(database_url: str, users: int, term: str, limit: int, repeat: int) -> None:
+    sessionmanager.init(database_url)
+    async with sessionmanager.connect() as connection:
+        await sessionmanager.create_all(connection)
+        await delete_seeded_users(connection)
+        await seed_users(connection, users, prefix="bench")
+        await connection.execute(text("ANALYZE users"))
+
+    repository = UserRepository(session_factory=sessionmanager.session_factory(), cache=None)
+    pattern = f"%{term}%"
+    like_sql = render(select(User).where(or_(User.username.like(pattern), User.email.like(pattern))).limit(limit))
+    search_sql = render(repository.search_statement(term.replace("_", " ").split(), limit))
+
+    results, plans = {}, {}
+    try:
+        async with sessionmanager.connect() as connection:
+            plans["like"], results["like '%term%'"] = await measure(connection, like_sql, repeat)
+
+            transaction = await connection.begin_nested()
+            await connection.execute(text("DROP INDEX ix_users_search_document"))
+            plans["fts without index"], results["fts without index"] = await measure(connection, search_sql, repeat)
+            await transaction.rollback()
+
+            plans["fts with index"], results["fts with index"] = await measure(connection, search_sql, repeat)
+    finally:
+        async with sessionmanager.connect() as connection:
+            await delete_seeded_users(connection)
+        await sessionmanager.close()
+
+    for name, plan in plans.items():
+        print(f"\n--- {name}")
+        print("\n".join(plan))
+    print_table(f"user lookup latency for {term!r} over {users} users", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.TEST_DATABASE_URL)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--term", default="bench_4242")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.users, args.term, args.limit, args.repeat))
@@ -0,0 +1,33 @@
+"""Adding users search index
+
+Revision ID: 8d5e2a61c7f3
+Revises: 3c1f0b7d9a42
+Create Date: 2026-10-18 11:02:47.915230
+
+"""
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d5e2a61c7f3"
+down_revision: Union[str, None] = "3c1f0b7d9a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_users_search_document",
+        "users",
+        [sa.text("to_tsvector('simple'::regconfig, username || ' ' || translate(email, '@.', '  '))")],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_search_document", table_name="users", postgresql_using="gin")
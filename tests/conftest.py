@@ -1,6 +1,11 @@
+import asyncio
+from contextlib import contextmanager
 from datetime import datetime
 from typing import AsyncGenerator
+from typing import Callable
 from typing import Generator
+from typing import List
+from typing import Optional
 
 import pytest
 from httpx import ASGITransport
@@ -15,7 +20,11 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import SessionTransaction
 
+from app.core.cache import principal_cache
+from app.core.cache import repository_cache
 from app.core.database import get_session_factory
+from app.core.email_filter import email_filter
+from app.core.rate_limit import auth_rate_limit
 from app.core.settings import settings
 from app.main import app
 from app.models import Base
@@ -36,6 +45,15 @@ def anyio_backend() -> str:
     return "asyncio"
 
 
+@pytest.fixture(autouse=True)
+def clear_caches() -> Generator:
+    yield
+    principal_cache.clear()
+    asyncio.run(repository_cache.clear())
+    asyncio.run(auth_rate_limit.clear())
+    email_filter.clear()
+
+
 @pytest.fixture
 async def client() -> AsyncGenerator:
     async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as client:
@@ -124,6 +142,45 @@ async def session() -> AsyncGenerator:
     await async_engine.dispose()
 
 
+@pytest.fixture
+def session_factory(session: AsyncSession) -> async_sessionmaker:
+    return async_sessionmaker(autocommit=False, autoflush=False, bind=session.bind)
+
+
+class QueryCounter:
+    ignored_prefixes = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # the savepoints only exist to isolate each test, the app never issues them
+        if not statement.lstrip().upper().startswith(self.ignored_prefixes):
+            self.statements.append(statement)
+
+
+@pytest.fixture
+def count_queries(session: AsyncSession) -> Callable:
+    engine = session.bind.engine.sync_engine
+
+    @contextmanager
+    def counter(expected: Optional[int] = None) -> Generator:
+        queries = QueryCounter()
+        event.listen(engine, "before_cursor_execute", queries.record)
+        try:
+            yield queries
+        finally:
+            event.remove(engine, "before_cursor_execute", queries.record)
+        if expected is not None:
+            assert queries.count == expected, f"expected {expected} queries, got {queries.count}: {queries.statements}"
+
+    return counter
+
+
 def validate_datetime(data_string):
     try:
         datetime.strptime(data_string, "%Y-%m-%dT%H:%M:%S.%fZ")
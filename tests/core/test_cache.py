@@ -0,0 +1,35 @@
+from freezegun import freeze_time
+
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_get_should_return_value_before_expiration():
+    cache = TTLCache(maxsize=2, ttl=10)
+    with freeze_time("2024-01-01 12:00:00"):
+        cache.set("key", "value")
+    with freeze_time("2024-01-01 12:00:09"):
+        assert cache.get("key") == "value"
+    with freeze_time("2024-01-01 12:00:11"):
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+
+def test_ttl_cache_should_evict_least_recently_used_when_full():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+    cache.set("third", 3)
+
+    assert "second" not in cache
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+
+
+def test_ttl_cache_pop_should_remove_key():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("key", "value")
+
+    assert cache.pop("key") == "value"
+    assert cache.pop("key") is None
+    assert "key" not in cache
@@ -0,0 +1,110 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import false
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import ProgrammingError
+
+from app.core.cache import LocalCache
+from app.core.database import bind_route_key
+from app.core.database import DatabaseSessionManager
+from app.core.database import REPLICA_READ
+from app.core.exceptions import NotFoundError
+from app.core.settings import settings
+from app.models import User
+from app.repository.user_repository import UserRepository
+
+
+primary_url = make_url(settings.TEST_DATABASE_URL)
+# the session fixtures create a "test" database next to the primary one, it stands in for a replica
+replica_url = primary_url.set(database="test").render_as_string(hide_password=False)
+unreachable_url = primary_url.set(port=1).render_as_string(hide_password=False)
+current_database = select(func.current_database())
+
+
+@pytest.fixture
+async def manager():
+    manager = DatabaseSessionManager()
+    yield manager
+    bind_route_key(None)
+    if manager._engine is not None:
+        await manager.close()
+
+
+@pytest.mark.anyio
+async def test_replica_reads_should_use_replica_and_other_statements_the_primary(manager):
+    manager.init(settings.TEST_DATABASE_URL, [replica_url])
+
+    async with manager.session() as session:
+        assert await session.scalar(current_database, bind_arguments=REPLICA_READ) == "test"
+        assert await session.scalar(current_database) == primary_url.database
+
+
+@pytest.mark.anyio
+async def test_replica_engine_should_round_robin_over_healthy_replicas(manager):
+    manager.init(settings.TEST_DATABASE_URL, [replica_url, replica_url])
+    first, second = (engine.sync_engine for engine in manager._replicas)
+
+    assert [manager.replica_engine() for _ in range(4)] == [first, second, first, second]
+
+
+@pytest.mark.anyio
+async def test_unhealthy_replica_should_fall_back_to_primary(manager):
+    manager.init(settings.TEST_DATABASE_URL, [unreachable_url])
+
+    assert await manager.check_replicas() == [False]
+    async with manager.session() as session:
+        assert await session.scalar(current_database, bind_arguments=REPLICA_READ) == primary_url.database
+
+
+@pytest.mark.anyio
+async def test_reads_after_a_write_should_stick_to_primary(manager):
+    manager.init(settings.TEST_DATABASE_URL, [replica_url])
+    bind_route_key("writer")
+
+    async with manager.session() as session:
+        assert await session.scalar(current_database, bind_arguments=REPLICA_READ) == "test"
+        await session.execute(update(User).where(false()).values(username="noop"))
+        await session.commit()
+        assert await session.scalar(current_database, bind_arguments=REPLICA_READ) == primary_url.database
+
+    assert manager.is_sticky()
+    bind_route_key("someone-else")
+    assert not manager.is_sticky()
+
+
+@pytest.mark.anyio
+async def test_lookups_populating_the_shared_cache_should_read_the_primary(manager):
+    # the stand-in replica has no tables, so a lookup routed there fails instead of finding nothing
+    manager.init(settings.TEST_DATABASE_URL, [replica_url])
+    cached = UserRepository(manager.session_factory(), cache=LocalCache(maxsize=10, ttl=5))
+    uncached = UserRepository(manager.session_factory())
+    uncached.cache = None
+
+    with pytest.raises(NotFoundError):
+        await cached.read_by_id(uuid4())
+    assert await cached.read_by_email("nobody@test.com") == []
+    with pytest.raises(ProgrammingError):
+        await uncached.read_by_id(uuid4())
+
+
+@pytest.mark.anyio
+async def test_health_loop_should_survive_unexpected_errors(manager, monkeypatch):
+    manager.init(settings.TEST_DATABASE_URL, [replica_url])
+    monkeypatch.setattr(settings, "DB_REPLICA_HEALTH_INTERVAL", 0)
+    calls = []
+
+    async def check_replicas():
+        calls.append(None)
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(manager, "check_replicas", check_replicas)
+    manager.start_health_checks()
+    while len(calls) < 3:
+        await asyncio.sleep(0)
+
+    assert not manager._health_task.done()
@@ -0,0 +1,75 @@
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.core.email_filter import EmailFilter
+
+
+async def partitions(*emails):
+    yield [(email,) for email in emails]
+
+
+@pytest.mark.anyio
+async def test_email_filter_should_let_every_email_through_until_built():
+    email_filter = EmailFilter(capacity=1000, error_rate=0.01, single_process=True)
+
+    assert await email_filter.might_exist("unknown@test.com")
+
+    await email_filter.build(partitions("known@test.com"))
+
+    assert await email_filter.might_exist("known@test.com")
+    assert await email_filter.might_exist("KNOWN@test.com")
+    assert not await email_filter.might_exist("unknown@test.com")
+
+
+@pytest.mark.anyio
+async def test_email_filter_should_stay_near_its_error_rate():
+    email_filter = EmailFilter(capacity=1000, error_rate=0.01, single_process=True)
+    await email_filter.build(partitions(*(f"user{i}@test.com" for i in range(1000))))
+
+    assert all([await email_filter.might_exist(f"user{i}@test.com") for i in range(1000)])
+    false_positives = sum([await email_filter.might_exist(f"other{i}@test.com") for i in range(10_000)])
+    assert false_positives < 200
+
+
+@pytest.mark.anyio
+async def test_email_filter_disabled_should_let_every_email_through():
+    email_filter = EmailFilter(capacity=1000, error_rate=0.01, enabled=False, single_process=True)
+    await email_filter.build(partitions())
+
+    assert await email_filter.might_exist("unknown@test.com")
+
+
+@pytest.mark.anyio
+async def test_local_email_filters_should_let_emails_added_by_other_workers_through():
+    first, second = (EmailFilter(capacity=1000, error_rate=0.01) for _ in range(2))
+    await first.build(partitions("known@test.com"))
+    await second.build(partitions("known@test.com"))
+
+    await first.add("new@test.com")
+
+    assert await second.might_exist("new@test.com")
+
+
+@pytest.mark.anyio
+async def test_redis_email_filter_should_share_emails_and_build_once():
+    server = FakeServer()
+    first, second = (EmailFilter(1000, 0.01, redis=FakeRedis(server=server)) for _ in range(2))
+    await first.build(partitions("known@test.com"))
+    await second.build(partitions("ignored@test.com"))
+
+    await first.add("new@test.com")
+
+    assert await second.might_exist("known@test.com")
+    assert await second.might_exist("new@test.com")
+    assert not await second.might_exist("ignored@test.com")
+
+
+@pytest.mark.anyio
+async def test_redis_email_filter_should_let_every_email_through_when_redis_fails():
+    server = FakeServer()
+    email_filter = EmailFilter(1000, 0.01, redis=FakeRedis(server=server))
+    await email_filter.build(partitions())
+    server.connected = False
+
+    assert await email_filter.might_exist("unknown@test.com")
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.exceptions import ServiceUnavailableError
+from app.core.hashing import PasswordHasher
+from app.core.hashing import SignInTimer
+
+
+@pytest.mark.anyio
+async def test_password_hasher_hash_and_verify_should_match():
+    hasher = PasswordHasher(max_workers=2, max_pending=2)
+    hashed_password = await hasher.hash("test_password")
+
+    assert hashed_password != "test_password"
+    assert await hasher.verify("test_password", hashed_password) is True
+    assert await hasher.verify("wrong_password", hashed_password) is False
+    assert hasher.in_flight == 0
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_password_hasher_saturated_should_raise_503_SERVICE_UNAVAILABLE():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    results = await asyncio.gather(hasher.hash("first"), hasher.hash("second"), return_exceptions=True)
+
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], ServiceUnavailableError)
+    assert results[1].status_code == 503
+    assert results[1].headers == {"Retry-After": "1"}
+    assert hasher.rejected == 1
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_password_hasher_hash_many_should_wait_for_capacity_instead_of_raising_503():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    single, many = await asyncio.gather(hasher.hash("first"), hasher.hash_many(["second", "third"]))
+
+    assert isinstance(single, str)
+    assert len(many) == 2
+    assert hasher.rejected == 0
+    hasher.shutdown()
+
+
+def test_password_hasher_invalid_executor_should_raise_value_error():
+    with pytest.raises(ValueError):
+        PasswordHasher(executor_type="fiber")
+
+
+class CountingHasher(PasswordHasher):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    async def _run(self, operation, func, *args):
+        self.calls.append(operation)
+        return await super()._run(operation, func, *args)
+
+
+@pytest.mark.anyio
+async def test_sign_in_timer_should_verify_once_then_sleep_to_the_estimate():
+    hasher = CountingHasher()
+    timer = SignInTimer(hasher, refresh_interval=60)
+
+    await asyncio.gather(*(timer.pad(time.perf_counter()) for _ in range(3)))
+    assert hasher.calls == ["hash", "verify"]
+    assert timer.estimate > 0
+
+    timer.observe(0.05)
+    started_at = time.perf_counter()
+    await timer.pad(started_at)
+
+    assert time.perf_counter() - started_at >= timer.estimate - 0.01
+    assert hasher.calls == ["hash", "verify"]
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_sign_in_timer_should_refresh_a_stale_estimate_in_the_background():
+    hasher = CountingHasher()
+    timer = SignInTimer(hasher, refresh_interval=0)
+    timer.observe(0.0)
+
+    started_at = time.perf_counter()
+    await timer.pad(started_at)
+    assert time.perf_counter() - started_at < 0.05
+    await timer._refresh
+
+    assert hasher.calls == ["hash", "verify"]
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_sign_in_timer_should_sleep_to_its_floor_when_the_hasher_is_saturated():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    hasher._in_flight = hasher.max_pending
+    timer = SignInTimer(hasher, floor=0.05)
+
+    started_at = time.perf_counter()
+    await timer.pad(started_at)
+
+    assert time.perf_counter() - started_at >= 0.05
+    assert timer.estimate is None
+    hasher.shutdown()
@@ -0,0 +1,95 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.instrumentation import current_query_stats
+from app.core.instrumentation import instrument_engine
+from app.core.instrumentation import QueryInstrumentationMiddleware
+from app.core.instrumentation import QueryStats
+from app.core.settings import settings
+from tests.conftest import setup_users_data
+
+
+@pytest.fixture
+def instrumented_session(session):
+    instrument_engine(session.bind.engine)
+    return session
+
+
+def test_query_stats_should_flag_repeated_statements_as_n_plus_one_suspects():
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("SELECT * FROM users WHERE id = $1", 0.001)
+    stats.record("SELECT count(*) FROM users", 0.002)
+
+    assert stats.count == 4
+    assert stats.duration == pytest.approx(0.005)
+    assert stats.n_plus_one_suspects(threshold=3) == ["SELECT * FROM users WHERE id = $1"]
+
+
+@pytest.mark.anyio
+async def test_request_should_report_its_queries_in_server_timing(instrumented_session, client):
+    await setup_users_data(instrumented_session, normal_users=2)
+    statements = []
+    engine = instrumented_session.bind.engine.sync_engine
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    response = await client.get("/v1/user/?limit=10&count=exact")
+
+    assert response.status_code == 200
+    db_timing, app_timing = response.headers["server-timing"].split(", ")
+    assert db_timing.startswith("db;dur=")
+    # the test session wraps every commit in savepoints, which count as statements too
+    assert db_timing.endswith(f'desc="{len(statements)} queries"')
+    assert len([statement for statement in statements if statement.startswith("SELECT")]) == 2
+    assert app_timing.startswith("app;dur=")
+
+
+@pytest.mark.anyio
+async def test_slow_queries_should_be_logged(instrumented_session, client, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 0)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.instrumentation"):
+        await client.get("/v1/user/?limit=10")
+
+    assert any(record.getMessage().startswith("slow query") for record in caplog.records)
+
+
+@pytest.mark.anyio
+async def test_failed_statements_should_not_leave_a_start_time_on_the_connection(instrumented_session):
+    with pytest.raises(DBAPIError):
+        async with instrumented_session.begin_nested():
+            await instrumented_session.execute(text("SELECT 1 / 0"))
+    await instrumented_session.execute(text("SELECT 1"))
+
+    connection = await instrumented_session.connection()
+    assert "query_started_at" not in connection.info
+
+
+@pytest.mark.anyio
+async def test_middleware_should_log_request_and_n_plus_one_suspects(caplog):
+    app = FastAPI()
+    app.add_middleware(QueryInstrumentationMiddleware)
+
+    @app.get("/loop")
+    async def loop():
+        for _ in range(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            current_query_stats().record("SELECT * FROM users WHERE id = $1", 0.001)
+        return {}
+
+    with caplog.at_level(logging.INFO, logger="app.core.instrumentation"):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as client:
+            await client.get("/loop")
+
+    request_log, suspect_log = caplog.records
+    assert request_log.queries == settings.SQL_N_PLUS_ONE_THRESHOLD
+    assert request_log.path == "/loop"
+    assert request_log.status == 200
+    assert suspect_log.levelno == logging.WARNING
+    assert suspect_log.getMessage().startswith("possible N+1 method=GET path=/loop")
@@ -0,0 +1,83 @@
+import os
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport
+from httpx import AsyncClient
+
+from app.core.metrics import http_request_duration
+from app.core.metrics import MetricsMiddleware
+from app.core.metrics import MetricsRegistry
+
+
+def test_histogram_should_render_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/user/{user_id}")
+
+    lines = registry.render().splitlines()
+
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    assert lines[2:] == [
+        'latency_seconds_bucket{route="/user/{user_id}",le="0.1"} 1.0',
+        'latency_seconds_bucket{route="/user/{user_id}",le="1.0"} 3.0',
+        'latency_seconds_bucket{route="/user/{user_id}",le="+Inf"} 4.0',
+        'latency_seconds_sum{route="/user/{user_id}"} 4.25',
+        'latency_seconds_count{route="/user/{user_id}"} 4.0',
+    ]
+
+
+def test_counter_and_gauge_function_should_render_with_escaped_labels():
+    registry = MetricsRegistry()
+    registry.counter("failures_total", "Failures", ("reason",)).inc('bad "token"')
+    registry.gauge("pool", "Pool", ("state",)).set_function(lambda: {("checked_out",): 3})
+
+    text = registry.render()
+
+    assert 'failures_total{reason="bad \\"token\\""} 1.0' in text
+    assert 'pool{state="checked_out"} 3.0' in text
+
+
+def test_registry_should_merge_worker_snapshots_and_drop_gauges_of_dead_workers(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    registry.counter("requests_total", "Requests").inc(amount=2)
+    registry.gauge("in_flight", "In flight").set(1)
+    registry.histogram("latency_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+    dead_worker = {
+        "requests_total": [[[], 3.0]],
+        "in_flight": [[[], 10.0]],
+        "latency_seconds": [[[], [0.0, 1.0, 2.0, 1.0]]],
+    }
+    (tmp_path / f"{2**22 + 1}.json").write_bytes(orjson.dumps(dead_worker))
+
+    text = registry.render()
+
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+    assert list(tmp_path.glob("*.tmp")) == []
+    assert "requests_total 5.0" in text
+    assert "in_flight 1.0" in text
+    assert 'latency_seconds_bucket{le="1.0"} 1.0' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2.0' in text
+    assert "latency_seconds_sum 2.5" in text
+
+
+@pytest.mark.anyio
+async def test_middleware_should_label_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    key = ("GET", "/items/{item_id}", "200")
+    before = http_request_duration.samples().get(key, [0.0])[-1]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/missing")
+
+    assert http_request_duration.samples()[key][-1] == before + 2
+    assert http_request_duration.samples()[("GET", "<unmatched>", "404")][-1] >= 1
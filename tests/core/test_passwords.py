@@ -0,0 +1,66 @@
+import pytest
+
+from app.core.passwords import Bcrypt
+from app.core.passwords import build_hashes
+from app.core.passwords import calibrate
+from app.core.passwords import PasswordHashes
+
+
+def test_bcrypt_should_verify_and_flag_lower_rounds_for_rehash():
+    weak, strong = Bcrypt(4), Bcrypt(5)
+    hashed_password = weak.hash("test_password")
+
+    assert strong.verify("test_password", hashed_password)
+    assert not strong.verify("wrong_password", hashed_password)
+    assert strong.needs_rehash(hashed_password)
+    assert not weak.needs_rehash(strong.hash("test_password"))
+
+
+def test_argon2id_should_verify_and_flag_weaker_parameters_for_rehash():
+    pytest.importorskip("argon2")
+    from app.core.passwords import Argon2id
+
+    weak, strong = Argon2id(time_cost=1, memory_cost=1024), Argon2id(time_cost=2, memory_cost=1024)
+    hashed_password = weak.hash("test_password")
+
+    assert hashed_password.startswith("$argon2id$")
+    assert strong.verify("test_password", hashed_password)
+    assert not strong.verify("wrong_password", hashed_password)
+    assert not strong.verify("test_password", "$argon2id$not-a-hash")
+    assert strong.needs_rehash(hashed_password)
+    assert not strong.needs_rehash(strong.hash("test_password"))
+
+
+def test_password_hashes_should_verify_every_algorithm_and_upgrade_to_the_default():
+    pytest.importorskip("argon2")
+    hashes = build_hashes("argon2id", bcrypt_rounds=4, argon2_time_cost=1, argon2_memory_cost=1024)
+    legacy_hash = Bcrypt(4).hash("test_password")
+
+    assert hashes.verify("test_password", legacy_hash)
+    assert hashes.needs_rehash(legacy_hash)
+    assert not hashes.needs_rehash(hashes.hash("test_password"))
+    assert not hashes.verify("test_password", "plain text")
+
+
+def test_password_hashes_concurrency_should_fit_the_cpu_and_memory_budget():
+    class Algorithm(Bcrypt):
+        threads = 2
+        memory_kib = 64 * 1024
+
+    hashes = PasswordHashes(Algorithm(4))
+
+    assert hashes.concurrency(cpus=8, memory_budget_kib=1024 * 1024) == 4
+    assert hashes.concurrency(cpus=8, memory_budget_kib=128 * 1024) == 2
+    assert hashes.concurrency(cpus=1, memory_budget_kib=0) == 1
+
+
+def test_build_hashes_unknown_algorithm_should_raise_value_error():
+    with pytest.raises(ValueError):
+        build_hashes("md5")
+
+
+def test_calibrate_should_return_the_last_cost_under_the_target():
+    assert calibrate("bcrypt", target=0.0)["PASSWORD_BCRYPT_ROUNDS"] == 4
+
+    chosen = calibrate("bcrypt", target=0.05)
+    assert chosen["verify_ms"] <= 50
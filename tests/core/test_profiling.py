@@ -0,0 +1,73 @@
+import signal
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport
+from httpx import AsyncClient
+
+from app.core.profiling import ProfilingMiddleware
+from app.core.profiling import render_collapsed
+from app.core.profiling import SamplingProfiler
+
+
+def busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def profiled_app(profiler: SamplingProfiler, **options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, **options)
+
+    @app.get("/busy/{milliseconds}")
+    async def busy(milliseconds: int):
+        busy_loop(milliseconds / 1000)
+        return {}
+
+    return app
+
+
+@pytest.mark.anyio
+async def test_middleware_should_store_collapsed_stacks_by_route_template():
+    profiler = SamplingProfiler(interval=0.001)
+    app = profiled_app(profiler, every=1)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as client:
+        await client.get("/busy/50")
+        await client.get("/busy/20")
+
+    (profile, *_) = profiles = list(profiler.profiles["/busy/{milliseconds}"])
+    assert len(profiles) == 2
+    assert profile.status == 200
+    assert profile.duration >= 0.05
+    stacks = render_collapsed(profiler.aggregate("/busy/{milliseconds}", last=1)).splitlines()
+    assert any(line.rsplit(" ", 1)[0].endswith(":busy_loop") for line in stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
+
+@pytest.mark.anyio
+async def test_middleware_should_only_profile_requests_with_the_token():
+    profiler = SamplingProfiler(interval=0.001)
+    app = profiled_app(profiler, header="X-Profile-Token", token="secret")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as client:
+        await client.get("/busy/5")
+        await client.get("/busy/5", headers={"X-Profile-Token": "wrong"})
+        await client.get("/busy/5", headers={"X-Profile-Token": "secret"})
+
+    assert len(profiler.profiles["/busy/{milliseconds}"]) == 1
+
+
+def test_aggregate_should_only_sum_the_last_profiles():
+    profiler = SamplingProfiler(interval=0.001, keep=3)
+    for stack in ("a;b", "a;b", "a;c", "a;d"):
+        profile = profiler.start("GET")
+        profile.samples[stack] += 1
+        profiler.stop(profile, "/route", 200)
+
+    assert len(profiler.profiles["/route"]) == 3
+    assert profiler.aggregate("/route", last=2) == {"a;c": 1, "a;d": 1}
+    assert profiler.aggregate() == {"a;b": 1, "a;c": 1, "a;d": 1}
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from starlette.requests import Request
+
+from app.core.exceptions import TooManyRequestsError
+from app.core.rate_limit import AuthRateLimit
+from app.core.rate_limit import LocalRateLimiter
+from app.core.rate_limit import Rate
+from app.core.rate_limit import RedisRateLimiter
+
+
+def make_request(host: str = "10.0.0.1", headers=()) -> Request:
+    return Request({"type": "http", "headers": list(headers), "client": (host, 1234)})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.anyio
+async def test_local_limiter_should_allow_a_burst_then_refill(clock):
+    limiter = LocalRateLimiter()
+    bucket = [("key", Rate(3, 30))]
+
+    assert [await limiter.acquire(bucket) for _ in range(3)] == [0, 0, 0]
+    assert await limiter.acquire(bucket) == pytest.approx(10)
+
+    clock[0] += 10
+    assert await limiter.acquire(bucket) == 0
+    assert await limiter.acquire(bucket) > 0
+
+
+@pytest.mark.anyio
+async def test_local_limiter_should_not_take_tokens_when_any_bucket_is_empty(clock):
+    limiter = LocalRateLimiter()
+    await limiter.acquire([("email", Rate(1, 60))])
+
+    assert await limiter.acquire([("ip", Rate(1, 60)), ("email", Rate(1, 60))]) > 0
+    assert await limiter.acquire([("ip", Rate(1, 60))]) == 0
+
+
+@pytest.mark.anyio
+async def test_local_limiter_should_drop_full_buckets_when_over_maxsize(clock):
+    limiter = LocalRateLimiter(maxsize=2)
+    await limiter.acquire([("old", Rate(1, 10))])
+    clock[0] += 10
+
+    await limiter.acquire([("a", Rate(1, 10))])
+    await limiter.acquire([("b", Rate(1, 10))])
+
+    assert set(limiter._buckets) == {"a", "b"}
+
+
+@pytest.mark.anyio
+async def test_redis_limiters_should_share_buckets_across_workers():
+    pytest.importorskip("lupa")
+    server = FakeServer()
+    workers = [RedisRateLimiter(FakeRedis(server=server)) for _ in range(2)]
+    bucket = [("key", Rate(2, 60))]
+
+    assert await workers[0].acquire(bucket) == 0
+    assert await workers[1].acquire(bucket) == 0
+    assert await workers[0].acquire(bucket) == pytest.approx(30, abs=0.1)
+    assert await workers[1].acquire([("other", Rate(2, 60))]) == 0
+
+
+@pytest.mark.anyio
+async def test_redis_limiter_should_let_requests_through_when_redis_fails():
+    server = FakeServer()
+    server.connected = False
+    limiter = RedisRateLimiter(FakeRedis(server=server))
+
+    assert await limiter.acquire([("key", Rate(1, 60))]) == 0
+
+
+@pytest.mark.anyio
+async def test_auth_rate_limit_should_raise_429_with_retry_after(clock):
+    rate_limit = AuthRateLimit(LocalRateLimiter(), per_ip=Rate(10, 60), per_email=Rate(1, 60))
+    await rate_limit.check(make_request(), "sign-in", "User@Test.com")
+
+    with pytest.raises(TooManyRequestsError) as error:
+        await rate_limit.check(make_request("10.0.0.2"), "sign-in", "user@test.com")
+
+    assert error.value.status_code == 429
+    assert error.value.headers == {"Retry-After": "60"}
+    await rate_limit.check(make_request(), "sign-up", "user@test.com")
+
+
+@pytest.mark.parametrize(
+    "trusted_proxies, client_ip",
+    [(0, "10.0.0.1"), (1, "10.0.0.2"), (2, "203.0.113.7"), (5, "198.51.100.9")],
+    ids=["no proxy", "one proxy", "two proxies", "more proxies than entries"],
+)
+def test_auth_rate_limit_should_take_the_entry_of_the_outermost_trusted_proxy(trusted_proxies, client_ip):
+    # the client sent a spoofed 198.51.100.9, the first proxy saw 203.0.113.7 and the second 10.0.0.2
+    forwarded = [(b"x-forwarded-for", b"198.51.100.9, 203.0.113.7, 10.0.0.2")]
+    rate_limit = AuthRateLimit(LocalRateLimiter(), Rate(1, 1), Rate(1, 1), trusted_proxies=trusted_proxies)
+
+    assert rate_limit.client_ip(make_request(headers=forwarded)) == client_ip
+    assert rate_limit.client_ip(make_request()) == "10.0.0.1"
@@ -0,0 +1,77 @@
+from datetime import datetime
+from datetime import timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import APIRouter
+from fastapi import FastAPI
+from httpx import ASGITransport
+from httpx import AsyncClient
+
+from app.core.responses import SerializedRoute
+from app.models import User
+from app.repository.codec import detached_instance
+from app.schemas.user_schema import User as UserSchema
+
+now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+orm_user = detached_instance(
+    User,
+    {
+        "id": uuid4(),
+        "created_at": now,
+        "updated_at": now,
+        "email": "orm@user.com",
+        "username": "orm_user",
+        "password": "hash",
+        "is_active": True,
+        "is_superuser": False,
+    },
+)
+
+router = APIRouter(route_class=SerializedRoute)
+
+
+@router.post("/orm", status_code=201, response_model=UserSchema)
+async def orm_route():
+    return orm_user
+
+
+@router.get("/excluded", response_model=UserSchema, response_model_exclude={"email"})
+async def excluded_route():
+    return orm_user
+
+
+app = FastAPI()
+app.include_router(router)
+
+
+@pytest.fixture
+async def serialized_client():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as client:
+        yield client
+
+
+@pytest.mark.anyio
+async def test_serialized_route_should_dump_orm_rows_through_response_model(serialized_client):
+    response = await serialized_client.post("/orm")
+
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "id": str(orm_user.id),
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+        "email": "orm@user.com",
+        "username": "orm_user",
+        "is_active": True,
+        "is_superuser": False,
+    }
+
+
+@pytest.mark.anyio
+async def test_serialized_route_should_honor_response_model_exclude(serialized_client):
+    response = await serialized_client.get("/excluded")
+
+    assert response.status_code == 200
+    assert "email" not in response.json()
+    assert response.json()["username"] == "orm_user"
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.core.sessions import REVOCATION_CHANNEL
+from app.core.sessions import SessionRegistry
+
+
+async def eventually(condition, timeout: float = 1.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def workers():
+    server = FakeServer()
+    registries = [SessionRegistry(FakeRedis(server=server), poll_timeout=0.05) for _ in range(2)]
+    yield registries
+    for registry in registries:
+        registry.stop()
+
+
+@pytest.mark.anyio
+async def test_local_registry_should_revoke_tokens_and_users():
+    registry = SessionRegistry()
+    first = await registry.open("user-1", ttl=60)
+    second = await registry.open("user-1", ttl=60)
+    other = await registry.open("user-2", ttl=60)
+
+    await registry.revoke(first, time.time() + 60)
+    assert registry.is_revoked(first)
+    assert await registry.revoke_user("user-1") == 2
+
+    assert registry.is_revoked(second)
+    assert not registry.is_revoked(other)
+    assert not registry.is_revoked(None)
+
+
+@pytest.mark.anyio
+async def test_expired_revocations_should_not_be_kept():
+    registry = SessionRegistry()
+
+    await registry.revoke("expired", time.time() - 1)
+
+    assert not registry.is_revoked("expired")
+
+
+@pytest.mark.anyio
+async def test_revocations_should_reach_other_workers_within_a_second(workers):
+    issuer, other = workers
+    other.start()
+    await asyncio.sleep(0.1)
+    jti = await issuer.open("user-1", ttl=60)
+
+    await issuer.revoke_user("user-1")
+
+    assert issuer.is_revoked(jti)
+    assert await eventually(lambda: other.is_revoked(jti))
+
+
+@pytest.mark.anyio
+async def test_starting_worker_should_load_the_stored_denylist(workers):
+    issuer, late = workers
+    jti = await issuer.open("user-1", ttl=60)
+    await issuer.revoke(jti, time.time() + 60)
+
+    late.start()
+
+    assert await eventually(lambda: late.is_revoked(jti))
+
+
+def test_local_registry_should_refuse_to_start_with_more_than_one_worker():
+    SessionRegistry().start(workers=1)
+
+    with pytest.raises(RuntimeError):
+        SessionRegistry().start(workers=2)
+
+
+@pytest.mark.anyio
+async def test_listener_should_survive_malformed_messages(workers):
+    issuer, other = workers
+    other.start()
+    await asyncio.sleep(0.1)
+    jti = await issuer.open("user-1", ttl=60)
+
+    await issuer.redis.publish(REVOCATION_CHANNEL, b"not json")
+    await issuer.redis.publish(REVOCATION_CHANNEL, b"[1, 2]")
+    await issuer.revoke(jti, time.time() + 60)
+
+    assert await eventually(lambda: other.is_revoked(jti))
+    assert not other._listener.done()
@@ -0,0 +1,155 @@
+import time
+
+import orjson
+import pytest
+from jose import jwt
+
+from app.core.tokens import b64url_decode
+from app.core.tokens import b64url_encode
+from app.core.tokens import build_verifier
+from app.core.tokens import InvalidToken
+
+SECRET = "current-secret"
+
+
+def write_key(path, private_key, public_only=False) -> str:
+    serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+    if public_only:
+        pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    else:
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+    path.write_bytes(pem)
+    return str(path)
+
+
+@pytest.fixture
+def verifier():
+    return build_verifier("HS256", "current", secret=SECRET, verification_keys={"previous": "previous-secret"})
+
+
+def claims(ttl: float = 60) -> dict:
+    return {"exp": int(time.time() + ttl), "id": "42"}
+
+
+def forged(header: dict) -> str:
+    segments = (orjson.dumps(header), orjson.dumps(claims()), b"signature")
+    return b".".join(b64url_encode(segment) for segment in segments).decode("ascii")
+
+
+def test_decode_should_return_the_claims_and_cache_them(verifier):
+    token = verifier.encode(claims())
+
+    first = verifier.decode(token)
+
+    assert first["id"] == "42"
+    assert verifier.decode(token) is first
+    assert jwt.get_unverified_header(token) == {"alg": "HS256", "typ": "JWT", "kid": "current"}
+    assert jwt.decode(token, SECRET, algorithms="HS256")["id"] == "42"
+
+
+def test_decode_should_accept_tokens_of_a_rotated_key(verifier):
+    previous = build_verifier("HS256", "previous", secret="previous-secret")
+
+    assert verifier.decode(previous.encode(claims()))["id"] == "42"
+
+
+def test_decode_should_check_tokens_without_kid_against_the_signing_key(verifier):
+    assert verifier.decode(jwt.encode(claims(), SECRET, "HS256"))["id"] == "42"
+    with pytest.raises(InvalidToken):
+        verifier.decode(jwt.encode(claims(), "previous-secret", "HS256"))
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        jwt.encode(claims(), SECRET, "HS256", headers={"kid": "unknown"}),
+        jwt.encode(claims(), SECRET, "HS512", headers={"kid": "current"}),
+        jwt.encode(claims(), "wrong-secret", "HS256", headers={"kid": "current"}),
+        jwt.encode(claims(ttl=-1), SECRET, "HS256", headers={"kid": "current"}),
+        jwt.encode({"id": "42"}, SECRET, "HS256", headers={"kid": "current"}),
+        forged({"alg": "HS256", "kid": {"a": 1}}),
+        forged({"alg": "HS256", "kid": ["current"]}),
+        forged({"alg": ["HS256"], "kid": "current"}),
+        forged({"kid": "current"}),
+        "not-a-token",
+        "a.b.c",
+    ],
+    ids=[
+        "unknown kid",
+        "algorithm mismatch",
+        "bad signature",
+        "expired",
+        "no exp",
+        "object kid",
+        "list kid",
+        "list alg",
+        "no alg",
+        "garbage",
+        "bad segments",
+    ],
+)
+def test_decode_should_reject_invalid_tokens(verifier, token):
+    with pytest.raises(InvalidToken):
+        verifier.decode(token)
+
+
+def test_cached_claims_should_expire_with_the_token(verifier, monkeypatch):
+    token = verifier.encode(claims(ttl=1))
+    verifier.decode(token)
+
+    now, monotonic = time.time(), time.monotonic()
+    monkeypatch.setattr(time, "time", lambda: now + 2)
+    monkeypatch.setattr(time, "monotonic", lambda: monotonic + 2)
+
+    with pytest.raises(InvalidToken):
+        verifier.decode(token)
+
+
+def test_eddsa_tokens_should_verify_with_nothing_but_the_published_jwk(tmp_path):
+    ed25519 = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ed25519")
+    private_key_path = write_key(tmp_path / "ed-1.pem", ed25519.Ed25519PrivateKey.generate())
+    verifier = build_verifier("EdDSA", "ed-1", private_key_path=private_key_path)
+    token = verifier.encode(claims())
+
+    (jwk,) = orjson.loads(verifier.jwks)["keys"]
+    assert jwk["kty"] == "OKP" and jwk["crv"] == "Ed25519" and jwk["kid"] == "ed-1" and "d" not in jwk
+    signing_input, signature = token.encode("ascii").rsplit(b".", 1)
+    public_key = ed25519.Ed25519PublicKey.from_public_bytes(b64url_decode(jwk["x"].encode("ascii")))
+    public_key.verify(b64url_decode(signature), signing_input)
+    assert verifier.decode(token)["id"] == "42"
+
+
+def test_rs256_tokens_should_verify_with_the_published_jwk(tmp_path):
+    rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    verifier = build_verifier("RS256", "rsa-1", private_key_path=write_key(tmp_path / "rsa-1.pem", private_key))
+    token = verifier.encode(claims())
+
+    (jwk,) = orjson.loads(verifier.jwks)["keys"]
+    assert jwt.decode(token, jwk, algorithms="RS256")["id"] == "42"
+    assert verifier.decode(token)["id"] == "42"
+
+
+def test_rotated_keys_should_keep_verifying_and_stay_published(tmp_path):
+    ed25519 = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ed25519")
+    old_key = ed25519.Ed25519PrivateKey.generate()
+    old = build_verifier("EdDSA", "ed-1", private_key_path=write_key(tmp_path / "old.pem", old_key))
+    legacy = build_verifier("HS256", "default", secret=SECRET)
+    current = build_verifier(
+        "EdDSA",
+        "ed-2",
+        verification_keys={"default": SECRET},
+        private_key_path=write_key(tmp_path / "new.pem", ed25519.Ed25519PrivateKey.generate()),
+        public_key_paths={"ed-1": write_key(tmp_path / "old.pub", old_key, public_only=True)},
+    )
+
+    assert current.decode(old.encode(claims()))["id"] == "42"
+    assert current.decode(legacy.encode(claims()))["id"] == "42"
+    assert [jwk["kid"] for jwk in orjson.loads(current.jwks)["keys"]] == ["ed-1", "ed-2"]
+    assert current.jwks_etag != old.jwks_etag
+    with pytest.raises(InvalidToken):
+        old.decode(current.encode(claims()))
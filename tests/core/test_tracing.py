@@ -0,0 +1,92 @@
+from uuid import uuid4
+
+import pytest
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from opentelemetry.trace import StatusCode
+
+from app.core.exceptions import NotFoundError
+from app.core.settings import settings
+from app.core.trace_export import TailSamplingProcessor
+from app.core.tracing import configure_tracing
+from app.core.tracing import shutdown_tracing
+from app.core.tracing import trace_engine
+from app.core.tracing import traced
+
+
+@pytest.fixture
+def exporter(session, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATIO", 1.0)
+    monkeypatch.setattr(settings, "TRACING_ALWAYS_SAMPLE_ERRORS", True)
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter, batch=False)
+    trace_engine(session.bind.engine)
+    yield exporter
+    shutdown_tracing()
+
+
+@pytest.mark.anyio
+async def test_request_should_produce_a_span_per_layer(exporter, client):
+    response = await client.get(f"/v1/user/{uuid4()}")
+
+    assert response.status_code == 404
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    server = spans["GET /v1/user/{user_id}"]
+    route = spans["users_routes.get_user_by_id"]
+    service = spans["BaseService.get_by_id"]
+    repository = spans["BaseRepository.read_by_id"]
+    query = spans["SELECT"]
+    assert server.parent is None
+    assert route.parent.span_id == server.context.span_id
+    assert service.parent.span_id == route.context.span_id
+    assert repository.parent.span_id == service.context.span_id
+    assert query.parent.span_id == repository.context.span_id
+    assert query.attributes["db.statement"].startswith("SELECT")
+    assert server.attributes["http.route"] == "/v1/user/{user_id}"
+    assert server.attributes["http.response.status_code"] == 404
+    assert server.status.status_code is StatusCode.UNSET
+    assert {span.context.trace_id for span in spans.values()} == {server.context.trace_id}
+
+
+@pytest.mark.anyio
+async def test_request_should_continue_an_incoming_traceparent(exporter, client):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    await client.get("/v1/ping", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+
+    server = next(span for span in exporter.get_finished_spans() if span.name == "GET /v1/ping")
+    assert format(server.context.trace_id, "032x") == trace_id
+    assert server.parent.is_remote
+
+
+@pytest.mark.anyio
+async def test_client_errors_should_not_mark_spans_as_failed(exporter):
+    @traced("lookup", "service")
+    async def lookup():
+        raise NotFoundError(detail="Not found")
+
+    with pytest.raises(NotFoundError):
+        await lookup()
+
+    (span,) = exporter.get_finished_spans()
+    assert span.status.status_code is StatusCode.UNSET
+    assert span.events[0].name == "exception"
+
+
+def test_tail_sampling_should_keep_error_traces_when_ratio_is_zero():
+    from opentelemetry.sdk.trace import TracerProvider
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=ALWAYS_ON)
+    provider.add_span_processor(TailSamplingProcessor(SimpleSpanProcessor(exporter), ratio=0.0))
+    tracer = provider.get_tracer("test")
+
+    with tracer.start_as_current_span("ok"):
+        with tracer.start_as_current_span("ok child"):
+            pass
+    with tracer.start_as_current_span("failed"):
+        with tracer.start_as_current_span("failed child") as child:
+            child.set_status(StatusCode.ERROR)
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["failed child", "failed"]
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.default import CACHE_HIT
+
+from app.core.database import dict_to_sqlalchemy_filter_options
+from app.core.database import indexed_columns
+from app.core.database import ordering_to_sqlalchemy_order_by
+from app.core.exceptions import BadRequestError
+from app.core.exceptions import ValidationError
+from app.models import User
+from app.repository.user_repository import UserRepository
+from app.schemas.base_schema import FindBase
+
+
+def compile_clause(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect()))
+
+
+def test_indexed_columns_should_return_primary_unique_and_indexed_columns():
+    assert indexed_columns(User) == ("created_at", "email", "id", "username")
+
+
+def test_filter_options_plain_string_should_use_equality_instead_of_like():
+    clause = compile_clause(dict_to_sqlalchemy_filter_options(User, {"username": "user_1"}))
+
+    assert clause == "users.username = %(username_1)s"
+
+
+def test_filter_options_should_build_operators():
+    clause = compile_clause(
+        dict_to_sqlalchemy_filter_options(
+            User,
+            {
+                "email__ne": "user@test.com",
+                "username__in": "user_1, user_2",
+                "created_at__gte": "2024-01-01",
+                "created_at__lt": "2024-02-01T00:00:00",
+                "id__isnull": "false",
+            },
+        )
+    )
+
+    assert "users.email != %(email_1)s" in clause
+    assert "users.username IN (__[POSTCOMPILE_username_1])" in clause
+    assert "users.created_at >= %(created_at_1)s" in clause
+    assert "users.created_at < %(created_at_2)s" in clause
+    assert "users.id IS NOT NULL" in clause
+
+
+def test_filter_options_not_indexed_column_should_raise_bad_request():
+    with pytest.raises(BadRequestError) as error:
+        dict_to_sqlalchemy_filter_options(User, {"password": "secret"})
+    assert error.value.detail == "Filtering by password is not allowed"
+
+
+def test_filter_options_unknown_operator_should_raise_bad_request():
+    with pytest.raises(BadRequestError) as error:
+        dict_to_sqlalchemy_filter_options(User, {"email__like": "test"})
+    assert error.value.detail == "Invalid filter operator: like"
+
+
+def test_filter_options_invalid_value_should_raise_validation_error():
+    with pytest.raises(ValidationError) as error:
+        dict_to_sqlalchemy_filter_options(User, {"created_at__gte": "yesterday"})
+    assert error.value.status_code == 422
+
+
+def test_ordering_should_build_order_by():
+    order_by = ordering_to_sqlalchemy_order_by(User, "-created_at,username")
+
+    assert [compile_clause(clause) for clause in order_by] == ["users.created_at DESC", "users.username ASC"]
+
+
+@pytest.mark.anyio
+async def test_repeated_filter_shape_should_reuse_compiled_statement(session, session_factory):
+    cache_hits = []
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT"):
+            cache_hits.append(context.cache_hit == CACHE_HIT)
+
+    repository = UserRepository(session_factory=session_factory, cache=None)
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        for email in ["first@test.com", "second@test.com", "third@test.com"]:
+            await repository.read_by_options(FindBase(offset=0, limit=10), filters={"email__in": f"{email},x@test.com"})
+    finally:
+        event.remove(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+    assert cache_hits[1:] == [True, True]
@@ -0,0 +1,145 @@
+from uuid import uuid4
+
+import orjson
+import pytest
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy import text
+
+from app.core.cache import LocalCache
+from app.core.cache import RedisCache
+from app.core.cache import TieredCache
+from app.core.exceptions import NotFoundError
+from app.repository.user_repository import UserRepository
+from app.schemas.base_schema import FindBase
+from app.schemas.user_schema import USER_COLUMNS
+from app.schemas.user_schema import validate_user_rows
+from tests.conftest import setup_users_data
+
+
+@pytest.fixture
+def redis_server():
+    return FakeRedis()
+
+
+def tiered_cache(redis_server) -> TieredCache:
+    return TieredCache(local=LocalCache(maxsize=100, ttl=5), remote=RedisCache(redis_server, prefix="repository:"))
+
+
+async def create_user(session, session_factory, redis_server):
+    clean_user = (await setup_users_data(session, normal_users=1))[0]
+    repository = UserRepository(session_factory=session_factory, cache=tiered_cache(redis_server))
+    user = (await repository.read_by_email(clean_user.email))[0]
+    return repository, user
+
+
+@pytest.mark.anyio
+async def test_read_by_id_should_be_served_from_cache(session, session_factory, redis_server):
+    repository, user = await create_user(session, session_factory, redis_server)
+    await session.execute(text("update users set username = 'changed_behind_cache' where id = :id"), {"id": user.id})
+    await session.commit()
+
+    cached_user = await repository.read_by_id(user.id)
+
+    assert cached_user.id == user.id
+    assert cached_user.username == user.username
+    assert cached_user.created_at == user.created_at
+
+
+@pytest.mark.anyio
+async def test_read_by_id_should_share_redis_tier_across_repositories(session, session_factory, redis_server):
+    _, user = await create_user(session, session_factory, redis_server)
+    await session.execute(text("delete from users where id = :id"), {"id": user.id})
+    await session.commit()
+
+    other_worker_repository = UserRepository(session_factory=session_factory, cache=tiered_cache(redis_server))
+    cached_user = await other_worker_repository.read_by_id(user.id)
+
+    assert cached_user.email == user.email
+    assert cached_user.password is None
+
+
+@pytest.mark.anyio
+async def test_cache_payload_should_be_compact_json(session, session_factory, redis_server):
+    _, user = await create_user(session, session_factory, redis_server)
+
+    payload = await redis_server.get(f"repository:users:id:{user.id}")
+
+    assert orjson.loads(payload)[0:2] == [user.email, user.username]
+    assert payload == await redis_server.get(f"repository:users:email:{user.email}")
+
+
+@pytest.mark.anyio
+async def test_cache_payload_should_not_contain_the_password_hash(session, session_factory, redis_server):
+    repository, user = await create_user(session, session_factory, redis_server)
+
+    payload = await redis_server.get(f"repository:users:id:{user.id}")
+
+    assert user.password.encode() not in payload
+    assert (await repository.read_by_email(user.email))[0].password is None
+    assert (await repository.read_by_email(user.email, cached=False))[0].password == user.password
+
+
+@pytest.mark.anyio
+async def test_update_attr_should_invalidate_cached_entries(session, session_factory, redis_server):
+    repository, user = await create_user(session, session_factory, redis_server)
+    await repository.read_by_id(user.id)
+
+    await repository.update_attr(user.id, "is_active", False)
+
+    assert await redis_server.get(f"repository:users:id:{user.id}") is None
+    assert await redis_server.get(f"repository:users:email:{user.email}") is None
+    assert (await repository.read_by_id(user.id)).is_active is False
+
+
+@pytest.mark.anyio
+async def test_update_changing_email_should_invalidate_the_old_email_key(session, session_factory, redis_server):
+    repository, user = await create_user(session, session_factory, redis_server)
+
+    updated_user = await repository.update_attr(user.id, "email", "changed@email.com")
+
+    assert updated_user.email == "changed@email.com"
+    assert await redis_server.get(f"repository:users:email:{user.email}") is None
+    assert await repository.read_by_email(user.email) == []
+
+
+@pytest.mark.anyio
+async def test_replace_password_should_not_overwrite_a_newer_hash(session, session_factory, redis_server):
+    repository, user = await create_user(session, session_factory, redis_server)
+    stored_hash = (await repository.read_by_email(user.email, cached=False))[0].password
+    await repository.update_attr(user.id, "password", "changed-hash")
+    await repository.read_by_id(user.id)
+
+    assert await repository.replace_password(user.id, stored_hash, "rehashed") is False
+    assert await redis_server.get(f"repository:users:id:{user.id}") is not None
+    assert await repository.replace_password(user.id, "changed-hash", "rehashed") is True
+    assert await redis_server.get(f"repository:users:id:{user.id}") is None
+    assert (await repository.read_by_email(user.email, cached=False))[0].password == "rehashed"
+
+
+@pytest.mark.anyio
+async def test_update_of_unknown_id_should_raise_not_found(session_factory, redis_server):
+    repository = UserRepository(session_factory=session_factory, cache=tiered_cache(redis_server))
+
+    with pytest.raises(NotFoundError):
+        await repository.update_attr(uuid4(), "is_active", False)
+
+
+@pytest.mark.anyio
+async def test_cached_instance_mutation_should_not_leak_into_cache(session, session_factory, redis_server):
+    repository, user = await create_user(session, session_factory, redis_server)
+    found_user = (await repository.read_by_email(user.email))[0]
+    found_user.username = "mutated"
+
+    assert (await repository.read_by_email(user.email))[0].username == user.username
+
+
+@pytest.mark.anyio
+async def test_read_by_options_with_columns_should_return_projected_rows(session, session_factory):
+    clean_users = await setup_users_data(session, normal_users=2)
+    repository = UserRepository(session_factory=session_factory)
+
+    rows = await repository.read_by_options(FindBase(offset=0, limit=10), columns=USER_COLUMNS)
+    users = validate_user_rows(rows)
+
+    assert [tuple(row._fields) for row in rows] == [USER_COLUMNS] * 2
+    assert {user.email for user in users} == {clean_user.email for clean_user in clean_users}
@@ -0,0 +1,55 @@
+import pytest
+from jose import jwt
+
+from app.core.settings import settings
+from app.core.tokens import build_verifier
+from tests.conftest import token
+from tests.core.test_tokens import write_key
+
+ed25519 = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ed25519")
+
+
+@pytest.fixture
+def eddsa_verifier(tmp_path, monkeypatch):
+    verifier = build_verifier(
+        "EdDSA", "ed-1", private_key_path=write_key(tmp_path / "ed-1.pem", ed25519.Ed25519PrivateKey.generate())
+    )
+    monkeypatch.setattr("app.core.security.token_verifier", verifier)
+    monkeypatch.setattr("app.routes.jwks_route.token_verifier", verifier)
+    return verifier
+
+
+@pytest.mark.anyio
+async def test_jwks_should_return_200_OK(client, eddsa_verifier):
+    response = await client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/jwk-set+json"
+    assert response.headers["etag"] == eddsa_verifier.jwks_etag
+    assert response.headers["cache-control"] == f"public, max-age={settings.JWKS_MAX_AGE}"
+    assert [key["kid"] for key in response.json()["keys"]] == ["ed-1"]
+
+
+@pytest.mark.anyio
+async def test_jwks_should_return_304_NOT_MODIFIED_for_a_matching_etag(client, eddsa_verifier):
+    response = await client.get(
+        "/.well-known/jwks.json", headers={"If-None-Match": f'"stale", W/{eddsa_verifier.jwks_etag}'}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == eddsa_verifier.jwks_etag
+    assert response.content == b""
+
+
+@pytest.mark.anyio
+async def test_eddsa_access_tokens_should_authenticate_and_verify_against_the_jwks(session, client, eddsa_verifier):
+    clean_user, access_token = await token(client, session)
+
+    me = await client.get("/v1/auth/me", headers={"Authorization": f"Bearer {access_token}"})
+    jwks = (await client.get("/.well-known/jwks.json")).json()
+
+    assert me.status_code == 200
+    assert me.json()["email"] == clean_user.email
+    assert jwt.get_unverified_header(access_token)["alg"] == "EdDSA"
+    assert eddsa_verifier.decode(access_token)["email"] == clean_user.email
+    assert jwks["keys"][0]["kid"] == jwt.get_unverified_header(access_token)["kid"]
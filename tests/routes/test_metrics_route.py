@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.anyio
+async def test_metrics_should_return_200_OK(client, session):
+    await client.post("/v1/auth/sign-in", json={"email__eq": "nobody@test.com", "password": "test_password"})
+    await client.get("/v1/auth/me", headers={"Authorization": "Bearer not-a-token"})
+    await client.get("/v1/ping")
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'auth_failures_total{reason="unknown_email"}' in response.text
+    assert 'auth_failures_total{reason="invalid_token"}' in response.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/v1/auth/sign-in",status="401"}' in response.text
+    assert 'db_pool_connections{state="checked_out"}' in response.text
+    assert 'db_pool_connections{state="size"}' not in response.text
+    assert "\ndb_pool_size " in response.text
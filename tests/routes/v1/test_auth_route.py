@@ -1,10 +1,21 @@
 from uuid import UUID
 
+import orjson
 import pytest
 from freezegun import freeze_time
 from icecream import ic
-
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+
+from app.core.cache import principal_cache
+from app.core.email_filter import email_filter
+from app.core.passwords import Bcrypt
+from app.core.security import password_hashes
 from app.core.settings import settings
+from app.core.tokens import b64url_encode
+from app.models import User
+from app.repository.user_repository import UserRepository
 from tests.conftest import setup_users_data
 from tests.conftest import token
 from tests.conftest import validate_datetime
@@ -78,7 +89,7 @@ async def test_auth_token_inexistent_user_should_return_401_INVALIDCREDENTIALS(c
     )
 
     assert response.status_code == 401
-    assert response.json() == {"detail": "Incorrect email or user not exist"}
+    assert response.json() == {"detail": "Incorrect email or password"}
 
 
 @pytest.mark.anyio
@@ -91,7 +102,7 @@ async def test_auth_token_wrong_user_should_return_401_INVALIDCREDENTIALS(client
     )
 
     assert response.status_code == 401
-    assert response.json() == {"detail": "Incorrect password"}
+    assert response.json() == {"detail": "Incorrect email or password"}
 
 
 @pytest.mark.anyio
@@ -102,6 +113,15 @@ async def test_auth_get_me_route_without_token_should_return_403_FORBIDDEN(clien
     assert response.json() == {"detail": "Not authenticated"}
 
 
+@pytest.mark.anyio
+async def test_auth_get_me_with_an_unhashable_kid_should_return_403_FORBIDDEN(client, session):
+    header = b64url_encode(orjson.dumps({"alg": "HS256", "kid": {"a": 1}})).decode("ascii")
+    response = await client.get(f"{base_auth_route}/me", headers={"Authorization": f"Bearer {header}.e30.c2ln"})
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Invalid token or expired token"}
+
+
 @pytest.mark.anyio
 async def test_auth_get_me_should_return_200_OK(client, session):
     clean_user, auth_token = await token(client, session)
@@ -216,4 +236,178 @@ async def test_auth_sign_up_should_return_409_email_already_registered(client, s
     assert response.json() == {"detail": "Email already registered"}
 
 
+@pytest.mark.anyio
+async def test_auth_get_me_should_cache_principal_and_invalidate_on_update(
+    client, session, factory_user, count_queries
+):
+    clean_user, auth_token = await token(client, session)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get(f"{base_auth_route}/me", headers=token_header)
+    user_id = UUID(response.json()["id"])
+    assert principal_cache.get(user_id).email == clean_user.email
+
+    with count_queries(expected=0):
+        cached_response = await client.get(f"{base_auth_route}/me", headers=token_header)
+    assert cached_response.json() == response.json()
+
+    update_response = await client.put(
+        f"/v1/user/{user_id}",
+        headers=token_header,
+        json={"email": factory_user.email, "username": clean_user.username, "is_active": True, "is_superuser": False},
+    )
+    assert update_response.status_code == 200
+    assert principal_cache.get(user_id) is None
+
+    response = await client.get(f"{base_auth_route}/me", headers=token_header)
+    assert response.status_code == 200
+    assert response.json()["email"] == factory_user.email
+    assert principal_cache.get(user_id).email == factory_user.email
+
+
+@pytest.mark.anyio
+async def test_refresh_token_should_revoke_the_refreshed_token(client, session):
+    _, auth_token = await token(client, session)
+    old_header = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.post(f"{base_auth_route}/refresh_token", headers=old_header)
+    new_header = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    assert response.status_code == 200
+    assert (await client.get(f"{base_auth_route}/me", headers=new_header)).status_code == 200
+    old_response = await client.get(f"{base_auth_route}/me", headers=old_header)
+    assert old_response.status_code == 403
+    assert old_response.json() == {"detail": "Token has been revoked"}
+
+
+@pytest.mark.anyio
+async def test_sign_out_should_return_200_OK_and_revoke_the_token(client, session):
+    _, auth_token = await token(client, session)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.post(f"{base_auth_route}/sign-out", headers=token_header)
+
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Signed out successfully"}
+    me_response = await client.get(f"{base_auth_route}/me", headers=token_header)
+    assert me_response.status_code == 403
+    assert me_response.json() == {"detail": "Token has been revoked"}
+
+
+@pytest.mark.anyio
+async def test_disable_user_should_revoke_every_token_of_the_user(client, session):
+    clean_user, first_token = await token(client, session)
+    response = await client.post(
+        f"{base_auth_route}/sign-in", json={"email__eq": clean_user.email, "password": clean_user.clean_password}
+    )
+    second_header = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    user_id = (await client.get(f"{base_auth_route}/me", headers=second_header)).json()["id"]
+
+    disable_response = await client.delete(
+        f"/v1/user/disable/{user_id}", headers={"Authorization": f"Bearer {first_token}"}
+    )
+
+    assert disable_response.status_code == 200
+    for auth_token in (first_token, response.json()["access_token"]):
+        me_response = await client.get(f"{base_auth_route}/me", headers={"Authorization": f"Bearer {auth_token}"})
+        assert me_response.status_code == 403
+        assert me_response.json() == {"detail": "Token has been revoked"}
+
+
+@pytest.mark.anyio
+async def test_sign_in_over_the_rate_limit_should_return_429_without_querying(client, session, count_queries):
+    credentials = {"email__eq": "nobody@test.com", "password": "test_password"}
+    for _ in range(settings.RATE_LIMIT_AUTH_PER_EMAIL):
+        assert (await client.post(f"{base_auth_route}/sign-in", json=credentials)).status_code == 401
+
+    with count_queries(expected=0):
+        response = await client.post(f"{base_auth_route}/sign-in", json=credentials)
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Too many attempts, try again later"}
+    assert int(response.headers["Retry-After"]) > 0
+
+
+async def email_partitions(*emails):
+    yield [(email,) for email in emails]
+
+
+@pytest.fixture
+def local_email_filter(monkeypatch):
+    # the tests run in a single process, so the filter can trust its own bits without Redis
+    monkeypatch.setattr(email_filter, "enabled", settings.EMAIL_FILTER_ENABLED)
+
+
+@pytest.mark.anyio
+async def test_sign_in_email_missing_from_the_email_filter_should_return_401_without_querying(
+    client, session, count_queries, local_email_filter
+):
+    clean_user = (await setup_users_data(session, normal_users=1))[0]
+    await email_filter.build(email_partitions(clean_user.email))
+
+    with count_queries(expected=0):
+        response = await client.post(
+            f"{base_auth_route}/sign-in", json={"email__eq": "nobody@test.com", "password": "test_password"}
+        )
+    known_response = await client.post(
+        f"{base_auth_route}/sign-in", json={"email__eq": clean_user.email, "password": clean_user.clean_password}
+    )
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Incorrect email or password"}
+    assert known_response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_sign_up_should_add_the_email_to_the_email_filter(client, session, factory_user, local_email_filter):
+    await email_filter.build(email_partitions())
+
+    await client.post(
+        f"{base_auth_route}/sign-up",
+        json={"email": factory_user.email, "password": factory_user.password, "username": factory_user.username},
+    )
+    response = await client.post(
+        f"{base_auth_route}/sign-in", json={"email__eq": factory_user.email, "password": factory_user.password}
+    )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_sign_in_with_a_weak_password_hash_should_upgrade_it(client, session):
+    clean_user = (await setup_users_data(session, normal_users=1))[0]
+    weak_hash = Bcrypt(4).hash(clean_user.clean_password)
+    await session.execute(update(User).where(User.email == clean_user.email).values(password=weak_hash))
+    await session.commit()
+
+    response = await client.post(
+        f"{base_auth_route}/sign-in", json={"email__eq": clean_user.email, "password": clean_user.clean_password}
+    )
+    stored_hash = await session.scalar(select(User.password).where(User.email == clean_user.email))
+
+    assert response.status_code == 200
+    assert stored_hash != weak_hash
+    assert password_hashes.verify(clean_user.clean_password, stored_hash)
+    assert not password_hashes.needs_rehash(stored_hash)
+
+
+@pytest.mark.anyio
+async def test_sign_in_should_succeed_when_the_password_upgrade_fails(client, session, monkeypatch):
+    clean_user = (await setup_users_data(session, normal_users=1))[0]
+    weak_hash = Bcrypt(4).hash(clean_user.clean_password)
+    await session.execute(update(User).where(User.email == clean_user.email).values(password=weak_hash))
+    await session.commit()
+
+    async def replace_password(*args):
+        raise OperationalError("UPDATE users", {}, ConnectionError("connection lost"))
+
+    monkeypatch.setattr(UserRepository, "replace_password", replace_password)
+    response = await client.post(
+        f"{base_auth_route}/sign-in", json={"email__eq": clean_user.email, "password": clean_user.clean_password}
+    )
+
+    assert response.status_code == 200
+    assert await session.scalar(select(User.password).where(User.email == clean_user.email)) == weak_hash
+
+
 ic
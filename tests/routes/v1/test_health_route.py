@@ -0,0 +1,56 @@
+import pytest
+
+from app.core.settings import settings
+from tests.conftest import token
+
+base_url = "/v1/health"
+
+
+@pytest.mark.anyio
+async def test_password_hasher_status_should_return_200_OK(session, client):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+
+    response = await client.get(f"{base_url}/password-hasher", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "executor": settings.PASSWORD_HASH_EXECUTOR,
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "in_flight": 0,
+        "queue_depth": 0,
+        "rejected": 0,
+    }
+
+
+@pytest.mark.anyio
+async def test_password_hasher_status_should_return_403_FORBIDDEN_for_normal_users(session, client):
+    _, auth_token = await token(client, session)
+
+    response = await client.get(f"{base_url}/password-hasher", headers={"Authorization": f"Bearer {auth_token}"})
+    anonymous_response = await client.get(f"{base_url}/password-hasher")
+
+    assert response.status_code == 403
+    assert anonymous_response.status_code == 403
+
+
+@pytest.mark.anyio
+async def test_database_pool_status_should_return_200_OK(session, client):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+
+    response = await client.get(f"{base_url}/db-pool", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"size", "checked_in", "checked_out", "overflow", "max_overflow"}
+    assert body["checked_out"] >= 0
+    assert body["overflow"] <= body["max_overflow"]
+
+
+@pytest.mark.anyio
+async def test_database_pool_status_should_return_403_FORBIDDEN_for_normal_users(session, client):
+    _, auth_token = await token(client, session)
+
+    response = await client.get(f"{base_url}/db-pool", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == 403
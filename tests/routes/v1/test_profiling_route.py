@@ -0,0 +1,56 @@
+import pytest
+
+from app.core.profiling import profiler
+from tests.conftest import token
+
+base_url = "/v1/profiling"
+
+
+@pytest.fixture
+def profiles():
+    for stack in ("app.main:handler;app.core.security:verify_password", "app.main:handler"):
+        profile = profiler.start("POST")
+        profile.samples[stack] += 2
+        profiler.stop(profile, "/v1/auth/sign-in", 200)
+    yield
+    profiler.clear()
+
+
+@pytest.mark.anyio
+async def test_profiled_routes_should_return_200_OK(session, client, profiles):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get(f"{base_url}/", headers=token_header)
+
+    assert response.status_code == 200
+    (route,) = response.json()
+    assert route["route"] == "/v1/auth/sign-in"
+    assert route["profiles"] == 2
+    assert route["samples"] == 4
+
+
+@pytest.mark.anyio
+async def test_collapsed_stacks_should_return_200_OK(session, client, profiles):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get(f"{base_url}/collapsed", params={"route": "/v1/auth/sign-in"}, headers=token_header)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text.splitlines() == [
+        "app.main:handler;app.core.security:verify_password 2",
+        "app.main:handler 2",
+    ]
+
+
+@pytest.mark.anyio
+async def test_collapsed_stacks_should_return_403_FORBIDDEN_for_normal_users(session, client, profiles):
+    _, auth_token = await token(client, session)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.get(f"{base_url}/collapsed", headers=token_header)
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Not enough permissions"}
@@ -0,0 +1,199 @@
+from uuid import uuid4
+
+import pytest
+
+from tests.conftest import token
+
+base_url = "/v1/resume"
+
+
+def resume_payload(sections: int = 2):
+    return {
+        "title": "Backend developer",
+        "summary": "Python and PostgreSQL",
+        "experiences": [
+            {"company": f"Company {i}", "role": "Developer", "start_date": f"{1990 + i}-01-01"} for i in range(sections)
+        ],
+        "education": [
+            {"institution": f"University {i}", "degree": "BSc", "start_date": f"{1980 + i}-03-01"}
+            for i in range(sections)
+        ],
+        "skills": [{"name": f"skill {i}", "level": "advanced"} for i in range(sections)],
+    }
+
+
+async def create_resume(client, session, sections: int = 2, **kwargs):
+    _, auth_token = await token(client, session, **kwargs)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+    response = await client.post(f"{base_url}/", headers=token_header, json=resume_payload(sections))
+    return token_header, response.json()
+
+
+@pytest.mark.anyio
+async def test_create_resume_should_return_201_CREATED_with_its_sections(session, client):
+    _, auth_token = await token(client, session)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    response = await client.post(f"{base_url}/", headers=token_header, json=resume_payload())
+    response_json = response.json()
+
+    assert response.status_code == 201
+    assert response_json["title"] == "Backend developer"
+    assert [experience["company"] for experience in response_json["experiences"]] == ["Company 0", "Company 1"]
+    assert [education["institution"] for education in response_json["education"]] == ["University 0", "University 1"]
+    assert [skill["name"] for skill in response_json["skills"]] == ["skill 0", "skill 1"]
+
+
+@pytest.mark.anyio
+async def test_create_resume_without_token_should_return_403_FORBIDDEN(client):
+    response = await client.post(f"{base_url}/", json=resume_payload())
+
+    assert response.status_code == 403
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sections", [0, 1, 25])
+async def test_create_resume_should_take_one_query_per_table(session, client, count_queries, sections):
+    _, auth_token = await token(client, session)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    with count_queries(expected=4 if sections else 1):
+        response = await client.post(f"{base_url}/", headers=token_header, json=resume_payload(sections))
+
+    assert response.status_code == 201
+    assert len(response.json()["skills"]) == sections
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sections", [1, 25])
+async def test_get_resume_by_id_should_take_four_queries_whatever_the_sections(
+    session, client, count_queries, sections
+):
+    _, resume = await create_resume(client, session, sections)
+
+    with count_queries(expected=4):
+        response = await client.get(f"{base_url}/{resume['id']}")
+
+    assert response.status_code == 200
+    assert response.json() == resume
+
+
+@pytest.mark.anyio
+async def test_get_resume_by_unknown_id_should_return_404_NOT_FOUND(session, client):
+    id = uuid4()
+    response = await client.get(f"{base_url}/{id}")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": f"id not found: {id}"}
+
+
+@pytest.mark.anyio
+async def test_get_resume_list_should_return_summaries_in_one_query(session, client, count_queries):
+    _, resume = await create_resume(client, session, sections=25)
+
+    with count_queries(expected=1):
+        response = await client.get(f"{base_url}/?user_id__eq={resume['user_id']}")
+    response_json = response.json()
+
+    assert response.status_code == 200
+    assert response_json["search_options"] == {"limit": 100, "offset": 0, "total_count": None}
+    assert response_json["founds"] == [
+        {key: resume[key] for key in ("id", "created_at", "updated_at", "user_id", "title")}
+    ]
+
+
+@pytest.mark.anyio
+async def test_put_resume_should_replace_only_the_sections_sent(session, client):
+    token_header, resume = await create_resume(client, session)
+    experiences = [{"company": "New company", "role": "Lead", "start_date": "2020-05-01", "end_date": "2023-01-31"}]
+
+    response = await client.put(
+        f"{base_url}/{resume['id']}", headers=token_header, json={"title": "Tech lead", "experiences": experiences}
+    )
+    response_json = response.json()
+
+    assert response.status_code == 200
+    assert response_json["title"] == "Tech lead"
+    assert response_json["summary"] == resume["summary"]
+    assert [(e["company"], e["end_date"]) for e in response_json["experiences"]] == [("New company", "2023-01-31")]
+    assert response_json["education"] == resume["education"]
+    assert response_json["skills"] == resume["skills"]
+
+
+@pytest.mark.anyio
+async def test_put_resume_with_an_empty_section_should_clear_it(session, client):
+    token_header, resume = await create_resume(client, session)
+
+    response = await client.put(f"{base_url}/{resume['id']}", headers=token_header, json={"skills": []})
+
+    assert response.status_code == 200
+    assert response.json()["skills"] == []
+    assert len(response.json()["experiences"]) == 2
+
+
+@pytest.mark.anyio
+async def test_put_resume_should_not_grow_with_the_sections(session, client, count_queries):
+    token_header, resume = await create_resume(client, session)
+    skills = [{"name": f"new skill {i}"} for i in range(25)]
+
+    # owner, update, delete and insert the skills, then the nested read
+    with count_queries(expected=8):
+        response = await client.put(f"{base_url}/{resume['id']}", headers=token_header, json={"skills": skills})
+
+    assert response.status_code == 200
+    assert [skill["name"] for skill in response.json()["skills"]] == [skill["name"] for skill in skills]
+
+
+@pytest.mark.anyio
+async def test_put_resume_without_changes_should_return_400_BAD_REQUEST(session, client):
+    token_header, resume = await create_resume(client, session)
+
+    response = await client.put(f"{base_url}/{resume['id']}", headers=token_header, json={})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "No changes detected"}
+
+
+@pytest.mark.anyio
+async def test_put_resume_of_another_user_should_return_403_FORBIDDEN(session, client):
+    _, resume = await create_resume(client, session, normal_users=2)
+    _, other_token = await token(client, session, normal_users=1)
+
+    response = await client.put(
+        f"{base_url}/{resume['id']}", headers={"Authorization": f"Bearer {other_token}"}, json={"title": "Mine"}
+    )
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Not enough permissions"}
+
+
+@pytest.mark.anyio
+async def test_delete_resume_should_remove_its_sections(session, client):
+    token_header, resume = await create_resume(client, session)
+
+    response = await client.delete(f"{base_url}/{resume['id']}", headers=token_header)
+
+    assert response.status_code == 200
+    assert response.json() == {"detail": "Resume has been deleted successfully"}
+    assert (await client.get(f"{base_url}/{resume['id']}")).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_delete_resume_of_another_user_should_return_403_FORBIDDEN(session, client):
+    _, resume = await create_resume(client, session, normal_users=2)
+    _, other_token = await token(client, session, normal_users=1)
+
+    response = await client.delete(f"{base_url}/{resume['id']}", headers={"Authorization": f"Bearer {other_token}"})
+
+    assert response.status_code == 403
+    assert (await client.get(f"{base_url}/{resume['id']}")).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_delete_user_should_delete_their_resumes(session, client):
+    token_header, resume = await create_resume(client, session)
+
+    response = await client.delete(f"/v1/user/{resume['user_id']}", headers=token_header)
+
+    assert response.status_code == 200
+    assert (await client.get(f"{base_url}/{resume['id']}")).status_code == 404
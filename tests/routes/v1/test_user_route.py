@@ -1,9 +1,12 @@
+import json
 from uuid import UUID
 from uuid import uuid4
 
 import pytest
 from icecream import ic
 
+from app.core.security import get_password_hash
+from app.core.settings import settings
 from tests.conftest import setup_users_data
 from tests.conftest import token
 from tests.conftest import validate_datetime
@@ -17,17 +20,19 @@ async def get_user_by_index(client, index: int):
 
 
 @pytest.mark.anyio
-async def test_get_all_users_should_return_200_OK(session, client):
+async def test_get_all_users_should_return_200_OK(session, client, count_queries):
     clean_users = await setup_users_data(
         session=session, normal_users=2, admin_users=2, disable_users=2, disable_admins=2
     )
-    response = await client.get(f"{base_url}/?offset=0&limit=100")
+    # the total is opt-in, so the default list call is the page query alone
+    with count_queries(expected=1):
+        response = await client.get(f"{base_url}/?offset=0&limit=100")
     response_json = response.json()
     users_json = response_json["founds"]
 
     assert response.status_code == 200
     assert len(users_json) == 8
-    assert response_json["search_options"] == {"limit": 100, "offset": 0, "total_count": 8}
+    assert response_json["search_options"] == {"limit": 100, "offset": 0, "total_count": None}
     assert all(
         [
             user.username == users_json[count].get("username") and user.email == users_json[count].get("email")
@@ -38,13 +43,20 @@ async def test_get_all_users_should_return_200_OK(session, client):
     assert all([validate_datetime(user["updated_at"]) for user in users_json])
 
 
+@pytest.mark.anyio
+async def test_user_response_schema_should_declare_email_format(client):
+    schemas = (await client.get("/openapi.json")).json()["components"]["schemas"]
+
+    assert schemas["User"]["properties"]["email"]["format"] == "email"
+
+
 @pytest.mark.anyio
 async def test_get_all_users_with_limit_should_return_200_OK(session, client):
     limit = 5
     clean_users = await setup_users_data(
         session=session, normal_users=2, admin_users=2, disable_users=2, disable_admins=2
     )
-    response = await client.get(f"{base_url}/?offset=0&limit={limit}")
+    response = await client.get(f"{base_url}/?offset=0&limit={limit}&count=exact")
     response_json = response.json()
 
     assert response.status_code == 200
@@ -56,7 +68,7 @@ async def test_get_all_users_with_limit_should_return_200_OK(session, client):
         ]
     )
     assert len(response_json["founds"]) == 5
-    assert response_json["search_options"] == {"limit": limit, "offset": 0, "total_count": limit}
+    assert response_json["search_options"] == {"limit": limit, "offset": 0, "total_count": 8}
     assert all([validate_datetime(user["created_at"]) for user in response_json["founds"]])
     assert all([validate_datetime(user["updated_at"]) for user in response_json["founds"]])
 
@@ -67,7 +79,7 @@ async def test_get_all_users_with_offset_should_return_200_OK(session, client):
     clean_users = await setup_users_data(
         session=session, normal_users=2, admin_users=2, disable_users=2, disable_admins=2
     )
-    response = await client.get(f"{base_url}/?offset={offset}&limit=100")
+    response = await client.get(f"{base_url}/?offset={offset}&limit=100&count=exact")
     response_json = response.json()
 
     assert response.status_code == 200
@@ -79,7 +91,7 @@ async def test_get_all_users_with_offset_should_return_200_OK(session, client):
         ]
     )
     assert len(response_json["founds"]) == 5
-    assert response_json["search_options"] == {"limit": 100, "offset": offset, "total_count": 5}
+    assert response_json["search_options"] == {"limit": 100, "offset": offset, "total_count": 8}
     assert all([validate_datetime(user["created_at"]) for user in response_json["founds"]])
     assert all([validate_datetime(user["updated_at"]) for user in response_json["founds"]])
 
@@ -91,7 +103,7 @@ async def test_get_all_users_with_pagination_should_return_200_OK(session, clien
     clean_users = await setup_users_data(
         session=session, normal_users=2, admin_users=2, disable_users=2, disable_admins=2
     )
-    response = await client.get(f"{base_url}/?offset={offset}&limit={limit}")
+    response = await client.get(f"{base_url}/?offset={offset}&limit={limit}&count=exact")
     response_json = response.json()
 
     assert response.status_code == 200
@@ -103,11 +115,144 @@ async def test_get_all_users_with_pagination_should_return_200_OK(session, clien
         ]
     )
     assert len(response_json["founds"]) == limit
-    assert response_json["search_options"] == {"limit": limit, "offset": offset, "total_count": limit}
+    assert response_json["search_options"] == {"limit": limit, "offset": offset, "total_count": 8}
     assert all([validate_datetime(user["created_at"]) for user in response_json["founds"]])
     assert all([validate_datetime(user["updated_at"]) for user in response_json["founds"]])
 
 
+@pytest.mark.anyio
+async def test_get_all_users_without_count_should_return_null_total_count(session, client):
+    await setup_users_data(session=session, normal_users=2)
+    response = await client.get(f"{base_url}/?offset=0&limit=1&count=none")
+
+    assert response.status_code == 200
+    assert response.json()["search_options"] == {"limit": 1, "offset": 0, "total_count": None}
+
+
+@pytest.mark.anyio
+async def test_get_all_users_with_estimated_count_should_return_200_OK(session, client):
+    await setup_users_data(session=session, normal_users=2)
+    response = await client.get(f"{base_url}/?offset=0&limit=1&count=estimated")
+
+    assert response.status_code == 200
+    assert response.json()["search_options"]["total_count"] >= 0
+
+
+@pytest.mark.anyio
+async def test_get_all_users_with_cursor_should_walk_every_page(session, client):
+    clean_users = await setup_users_data(
+        session=session, normal_users=2, admin_users=2, disable_users=2, disable_admins=2
+    )
+    response = await client.get(f"{base_url}/?pagination=cursor&limit=3&count=exact")
+    response_json = response.json()
+    pages = [response_json]
+
+    assert response.status_code == 200
+    assert response_json["search_options"]["cursor"] is None
+    assert response_json["search_options"]["total_count"] == 8
+
+    while pages[-1]["search_options"]["next_cursor"]:
+        next_cursor = pages[-1]["search_options"]["next_cursor"]
+        response = await client.get(f"{base_url}/", params={"cursor": next_cursor, "limit": 3})
+        assert response.status_code == 200
+        assert response.json()["search_options"]["total_count"] is None
+        pages.append(response.json())
+
+    users_json = [user for page in pages for user in page["founds"]]
+    assert [len(page["founds"]) for page in pages] == [3, 3, 2]
+    assert len({user["id"] for user in users_json}) == 8
+    assert {user["email"] for user in users_json} == {user.email for user in clean_users}
+
+
+@pytest.mark.anyio
+async def test_get_all_users_with_tampered_cursor_should_return_400_BAD_REQUEST(session, client):
+    await setup_users_data(session=session, normal_users=3)
+    response = await client.get(f"{base_url}/?pagination=cursor&limit=1")
+    payload, signature = response.json()["search_options"]["next_cursor"].split(".")
+
+    response = await client.get(f"{base_url}/", params={"cursor": f"{payload}x.{signature}", "limit": 1})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.anyio
+async def test_get_all_users_with_filters_should_return_200_OK(session, client):
+    clean_users = await setup_users_data(session=session, normal_users=4)
+    emails = f"{clean_users[0].email},{clean_users[2].email}"
+    response = await client.get(f"{base_url}/", params={"email__in": emails, "ordering": "-username", "count": "exact"})
+    response_json = response.json()
+
+    assert response.status_code == 200
+    assert [user["email"] for user in response_json["founds"]] == sorted(emails.split(","), reverse=True)
+    assert response_json["search_options"] == {"limit": 100, "offset": 0, "total_count": 2}
+
+
+@pytest.mark.anyio
+async def test_get_all_users_with_equality_filter_should_not_match_substrings(session, client):
+    clean_users = await setup_users_data(session=session, normal_users=2)
+    response = await client.get(f"{base_url}/", params={"username": clean_users[0].username[:-1]})
+
+    assert response.status_code == 200
+    assert response.json()["founds"] == []
+
+
+@pytest.mark.anyio
+async def test_get_all_users_with_date_range_filter_should_return_200_OK(session, client):
+    await setup_users_data(session=session, normal_users=2)
+    response = await client.get(
+        f"{base_url}/", params={"created_at__gte": "2000-01-01", "created_at__lt": "2000-01-02", "count": "exact"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["search_options"]["total_count"] == 0
+
+
+@pytest.mark.anyio
+async def test_get_all_users_with_not_indexed_filter_should_return_400_BAD_REQUEST(session, client):
+    response = await client.get(f"{base_url}/", params={"is_active": "true"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Filtering by is_active is not allowed"}
+
+
+@pytest.mark.anyio
+async def test_search_users_should_return_ranked_matches(session, client):
+    clean_users = await setup_users_data(session=session, normal_users=3)
+    target = clean_users[1]
+    response = await client.get(f"{base_url}/search", params={"q": target.username})
+    response_json = response.json()
+
+    assert response.status_code == 200
+    assert response_json["founds"][0]["email"] == target.email
+    assert response_json["search_options"]["next_cursor"] is None
+
+
+@pytest.mark.anyio
+async def test_search_users_by_email_prefix_should_page_with_cursor(session, client):
+    clean_users = await setup_users_data(session=session, normal_users=5)
+    response = await client.get(f"{base_url}/search", params={"q": "test.co", "limit": 2})
+    pages = [response.json()]
+
+    while pages[-1]["search_options"]["next_cursor"]:
+        cursor = pages[-1]["search_options"]["next_cursor"]
+        response = await client.get(f"{base_url}/search", params={"q": "test.co", "limit": 2, "cursor": cursor})
+        assert response.status_code == 200
+        pages.append(response.json())
+
+    found_emails = [user["email"] for page in pages for user in page["founds"]]
+    assert len(found_emails) == len(set(found_emails)) == 5
+    assert set(found_emails) == {user.email for user in clean_users}
+
+
+@pytest.mark.anyio
+async def test_search_users_without_terms_should_return_400_BAD_REQUEST(client):
+    response = await client.get(f"{base_url}/search", params={"q": "@_."})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Search query must contain letters or digits"}
+
+
 @pytest.mark.anyio
 async def test_get_by_id_should_return_200_OK(session, client):
     user_index = 0
@@ -321,4 +466,235 @@ async def test_put_user_should_return_403_FORBIDDEN(session, client, factory_use
     assert response.status_code == 403
 
 
+@pytest.mark.anyio
+async def test_put_user_should_take_a_single_query(session, client, factory_user, count_queries):
+    _, auth_token = await token(client, session)
+    user = await get_user_by_index(client, index=0)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    with count_queries(expected=1):
+        response = await client.put(
+            f"{base_url}/{user['id']}", headers=token_header, json={**user, "username": factory_user.username}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["username"] == factory_user.username
+
+
+@pytest.mark.anyio
+async def test_put_user_without_changes_should_return_400_BAD_REQUEST_in_a_single_query(session, client, count_queries):
+    _, auth_token = await token(client, session)
+    user = await get_user_by_index(client, index=0)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+    same_user = {key: user[key] for key in ("email", "username", "is_active", "is_superuser")}
+
+    with count_queries(expected=1):
+        response = await client.put(f"{base_url}/{user['id']}", headers=token_header, json=same_user)
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "No changes detected"}
+
+
+@pytest.mark.anyio
+async def test_disable_user_should_take_a_single_query(session, client, count_queries):
+    _, auth_token = await token(client, session)
+    user = await get_user_by_index(client, index=0)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    with count_queries(expected=1):
+        response = await client.delete(f"{base_url}/disable/{user['id']}", headers=token_header)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_delete_user_should_take_a_single_query(session, client, count_queries):
+    _, auth_token = await token(client, session)
+    user = await get_user_by_index(client, index=0)
+    token_header = {"Authorization": f"Bearer {auth_token}"}
+
+    with count_queries(expected=1):
+        response = await client.delete(f"{base_url}/{user['id']}", headers=token_header)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_import_users_from_ndjson_should_report_every_failed_row(session, client):
+    admin, auth_token = await token(client, session, normal_users=0, admin_users=1)
+    lines = [
+        {"email": "first@import.com", "username": "first_import", "password": "secret"},
+        {"email": "second@import.com", "username": "second_import", "password_hash": get_password_hash("secret")},
+        {"email": "not-an-email", "username": "third_import", "password": "secret"},
+        {"email": "first@import.com", "username": "fourth_import", "password": "secret"},
+        {"email": admin.email, "username": "fifth_import", "password": "secret"},
+        {"email": "sixth@import.com", "username": admin.username, "password": "secret"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{not json\n"
+
+    response = await client.post(
+        f"{base_url}/import",
+        content=body,
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "application/x-ndjson"},
+    )
+    response_json = response.json()
+    users = await client.get(f"{base_url}/?offset=0&limit=100")
+
+    assert response.status_code == 200
+    assert response_json["imported"] == 2
+    assert response_json["failed"] == 5
+    assert [(error["row"], error["detail"]) for error in response_json["errors"]][1:] == [
+        (4, "Duplicated email in import"),
+        (5, "Email already registered"),
+        (6, "Username already registered"),
+        (7, "Invalid JSON"),
+    ]
+    assert response_json["errors"][0]["row"] == 3
+    assert {user["username"] for user in users.json()["founds"]} == {admin.username, "first_import", "second_import"}
+
+
+@pytest.mark.anyio
+async def test_import_users_should_report_the_first_errors_by_row(session, client, monkeypatch):
+    monkeypatch.setattr(settings, "USER_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "USER_IMPORT_MAX_ERRORS", 1)
+    admin, auth_token = await token(client, session, normal_users=0, admin_users=1)
+    lines = [
+        {"email": admin.email, "username": "first_import", "password": "secret"},
+        {"email": "not-an-email", "username": "second_import", "password": "secret"},
+        {"email": "third@import.com", "username": "third_import", "password": "secret"},
+        {"email": "not-an-email", "username": "fourth_import", "password": "secret"},
+        {"email": "fifth@import.com", "username": "fifth_import", "password": "secret"},
+    ]
+
+    response = await client.post(
+        f"{base_url}/import",
+        content="\n".join(json.dumps(line) for line in lines),
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "imported": 2,
+        "failed": 3,
+        "errors": [{"row": 1, "detail": "Email already registered"}],
+    }
+
+
+@pytest.mark.anyio
+async def test_import_users_from_csv_should_return_200_OK(session, client):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+    password_hash = get_password_hash("secret")
+    body = f"email,username,password_hash\r\ncsv@import.com,csv_import,{password_hash}\r\nbroken,row\r\n"
+
+    response = await client.post(
+        f"{base_url}/import",
+        content=body,
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "text/csv"},
+    )
+    imported_user = await client.post("/v1/auth/sign-in", json={"email__eq": "csv@import.com", "password": "secret"})
+
+    assert response.status_code == 200
+    assert response.json() == {"imported": 1, "failed": 1, "errors": [{"row": 2, "detail": "Expected 3 columns"}]}
+    assert imported_user.status_code == 200
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("content_type", ["application/x-ndjson", "application/xml"])
+async def test_import_users_as_normal_user_should_return_403_FORBIDDEN(session, client, content_type):
+    _, auth_token = await token(client, session)
+
+    response = await client.post(
+        f"{base_url}/import",
+        content='{"email": "a@import.com", "username": "a_import", "password": "secret"}',
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": content_type},
+    )
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Not enough permissions"}
+
+
+@pytest.mark.anyio
+async def test_import_users_with_unsupported_content_type_should_return_400_BAD_REQUEST(session, client):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+
+    response = await client.post(
+        f"{base_url}/import",
+        content="<users/>",
+        headers={"Authorization": f"Bearer {auth_token}", "Content-Type": "application/xml"},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unsupported content type: application/xml"}
+
+
+@pytest.mark.anyio
+async def test_export_users_as_ndjson_should_stream_every_user(session, client):
+    admin, auth_token = await token(client, session, normal_users=0, admin_users=1)
+    await setup_users_data(session, normal_users=3)
+
+    response = await client.get(f"{base_url}/export", headers={"Authorization": f"Bearer {auth_token}"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(rows) == 4
+    assert set(rows[0]) == {"id", "email", "username", "is_active", "is_superuser", "created_at", "updated_at"}
+    assert admin.email in {row["email"] for row in rows}
+
+
+@pytest.mark.anyio
+async def test_export_users_as_gzipped_csv_should_project_fields_and_apply_filters(session, client):
+    admin, auth_token = await token(client, session, normal_users=0, admin_users=1)
+    await setup_users_data(session, normal_users=2)
+
+    response = await client.get(
+        f"{base_url}/export?format=csv&fields=username,is_superuser&email={admin.email}",
+        headers={"Authorization": f"Bearer {auth_token}", "Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines() == ["username,is_superuser", f"{admin.username},True"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "accept_encoding, compressed",
+    [("gzip;q=0", False), ("gzip;q=0.5, br", True), ("identity", False), ("*", True), ("*, gzip;q=0", False)],
+)
+async def test_export_users_should_honour_accept_encoding_q_values(session, client, accept_encoding, compressed):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+
+    response = await client.get(
+        f"{base_url}/export", headers={"Authorization": f"Bearer {auth_token}", "Accept-Encoding": accept_encoding}
+    )
+
+    assert response.status_code == 200
+    assert ("content-encoding" in response.headers) is compressed
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+@pytest.mark.anyio
+async def test_export_users_with_unknown_field_should_return_400_BAD_REQUEST(session, client):
+    _, auth_token = await token(client, session, normal_users=0, admin_users=1)
+
+    response = await client.get(
+        f"{base_url}/export?fields=email,password", headers={"Authorization": f"Bearer {auth_token}"}
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown export fields: password"}
+
+
+@pytest.mark.anyio
+async def test_export_users_as_normal_user_should_return_403_FORBIDDEN(session, client):
+    _, auth_token = await token(client, session)
+
+    response = await client.get(f"{base_url}/export", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Not enough permissions"}
+
+
 ic